@@ -0,0 +1,318 @@
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+
+'''
+This file holds the static asset pipeline of the visualization server: fingerprinted asset urls, the page script
+bundles, the image atlas of a world and the build step that minifies the page JavaScript and precompresses the static
+and media files.
+Run `python -m SaR_gui.assets` after changing the JavaScript or the images to rebuild the bundles and compressed files.
+'''
+
+static_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+# Folder within the static folder with the built bundles and the manifest describing them
+dist_folder = os.path.join(static_folder, 'dist')
+manifest_file = os.path.join(dist_folder, 'manifest.json')
+
+# Libraries are already minified, so they are only concatenated into the bundles
+LIBRARY_SCRIPTS = ['lib/jquery/jquery-3.4.1.min.js', 'lib/popper/popper-1.16.0.js', 'lib/bootstrap/bootstrap-4.4.1.min.js']
+# The scripts of every page in the order the page loads them
+PAGE_SCRIPTS = {
+    'start': LIBRARY_SCRIPTS + ['js/util.js', 'js/startscreen.js'],
+    'agent': LIBRARY_SCRIPTS + ['js/util.js', 'js/toolbar.js', 'js/context_menu.js', 'js/gen_grid.js', 'js/loop.js'],
+    'god': LIBRARY_SCRIPTS + ['js/util.js', 'js/toolbar.js', 'js/context_menu.js', 'js/gen_grid.js', 'js/loop.js'],
+    'human_agent': LIBRARY_SCRIPTS + ['js/util.js', 'js/toolbar.js', 'js/context_menu.js', 'js/gen_grid.js',
+                                      'js/loop.js', 'js/human_agent.js'],
+}
+# Names of the bundles in the dist folder, with their precompressed variants
+BUNDLE_PATTERN = re.compile(r'^(' + '|'.join(PAGE_SCRIPTS) + r')\.[0-9a-f]{10}\.min\.js(\.gz|\.br)?$')
+# Files of these types are precompressed, images such as png and gif are compressed already
+COMPRESSED_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.html', '.ico', '.ttf', '.eot')
+
+# Images the custom actions switch agents to while they carry a victim, so they are added to the atlas of every world
+RUNTIME_IMAGES = ['/images/carry-healthy-human.svg', '/images/carry-mild-human.svg', '/images/carry-mild-robot.svg',
+                  '/images/carry-critical-final.svg', '/images/carry-mild-final.svg', '/images/rescue-man-final3.svg',
+                  '/images/robot-final4.svg']
+
+_fingerprints = {}
+_manifest = None
+
+
+def fingerprint(path):
+    '''
+    Returns a short hash of the contents of a file, cached per path and modification time.
+    '''
+    mtime = os.path.getmtime(path)
+    cached = _fingerprints.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as asset_file:
+            cached = (mtime, hashlib.sha1(asset_file.read()).hexdigest()[:10])
+        _fingerprints[path] = cached
+    return cached[1]
+
+
+def asset_url(filename):
+    '''
+    Returns the url of a file in the static folder with the fingerprint of its contents, so browsers can cache it forever.
+    '''
+    return f"/static/{filename}?v={fingerprint(os.path.join(static_folder, filename))}"
+
+
+def _sources_fingerprint(filenames):
+    return hashlib.sha1(''.join(fingerprint(os.path.join(static_folder, name)) for name in filenames).encode()).hexdigest()[:10]
+
+
+def _load_manifest():
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file) as json_file:
+                _manifest = json.load(json_file)
+    return _manifest
+
+
+def page_scripts(page):
+    '''
+    Returns the script urls of a page: its minified bundle when it was built from the current sources, otherwise
+    the separate scripts.
+    '''
+    filenames = PAGE_SCRIPTS[page]
+    bundle = _load_manifest().get(page)
+    if bundle is not None and bundle['sources'] == _sources_fingerprint(filenames):
+        return [asset_url('dist/' + bundle['file'])]
+    return [asset_url(filename) for filename in filenames]
+
+
+def minify_js(source):
+    '''
+    Conservative JavaScript minifier: removes comments, indentation and empty lines, but leaves strings, template
+    literals and regular expressions untouched and keeps line breaks, so automatic semicolon insertion is unaffected.
+    '''
+    out = []
+    i, n = 0, len(source)
+
+    def separate(separator):
+        # Merge with a preceding separator, a line break wins over a space
+        if out and out[-1] in (' ', '\n'):
+            if separator == '\n':
+                out[-1] = '\n'
+        elif out:
+            out.append(separator)
+    # Last character of the output that is not whitespace, to tell a regular expression from a division
+    previous = ''
+    while i < n:
+        char = source[i]
+        if char in '"\'`':
+            end = i + 1
+            while end < n and source[end] != char:
+                end += 2 if source[end] == '\\' else 1
+            out.append(source[i:end + 1])
+            previous = char
+            i = end + 1
+        elif source.startswith('//', i):
+            while i < n and source[i] != '\n':
+                i += 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end == -1 else end + 2
+            # A comment still separates tokens, and statements when it spans several lines
+            separate('\n' if '\n' in source[i:end] else ' ')
+            i = end
+        elif char == '/' and (previous == '' or previous in '(,=:[!&|?{};+-*%<>~^'):
+            end, in_class = i + 1, False
+            while end < n and (source[end] != '/' or in_class):
+                if source[end] == '\\':
+                    end += 1
+                elif source[end] == '[':
+                    in_class = True
+                elif source[end] == ']':
+                    in_class = False
+                end += 1
+            out.append(source[i:end + 1])
+            previous = '/'
+            i = end + 1
+        elif char in ' \t\r\n':
+            # Collapse a run of whitespace into a single line break or space, dropping indentation and empty lines
+            end = i
+            while end < n and source[end] in ' \t\r\n':
+                end += 1
+            separate('\n' if '\n' in source[i:end] else ' ')
+            i = end
+        else:
+            out.append(char)
+            previous = char
+            i += 1
+    return ''.join(out).strip() + '\n'
+
+
+def _write_file(path, data):
+    '''
+    Writes the bytes to a temporary file first that then replaces the file, so the visualizers of other sessions that
+    build or serve the same file at the same time never see it half written.
+    '''
+    temp_path = path + f'.{os.getpid()}.tmp'
+    with open(temp_path, 'wb') as temp_file:
+        temp_file.write(data)
+    os.replace(temp_path, path)
+
+
+def _compress(path):
+    '''
+    Writes the gzip and, when the brotli package is installed, the brotli compressed variant of a file next to it.
+    '''
+    with open(path, 'rb') as asset_file:
+        data = asset_file.read()
+    _write_file(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    _write_file(path + '.br', brotli.compress(data))
+
+
+def world_images(builder):
+    '''
+    Returns the svg images of the media folder used by the objects and agents of a world builder, and the images
+    agents switch to while the world runs.
+    '''
+    images = set(RUNTIME_IMAGES)
+    for settings in builder.object_settings + builder.agent_settings:
+        img_name = settings['custom_properties'].get('img_name')
+        if isinstance(img_name, str) and img_name.lower().endswith('.svg') and '/static/' not in img_name:
+            images.add(img_name)
+    return sorted(images)
+
+
+def _prefix_svg(content, prefix):
+    '''
+    Prefixes the ids and classes of an svg, including those in its style sheet, so the images of the atlas do not
+    share the class names and ids that drawing programs give every file.
+    '''
+    def prefix_selectors(style):
+        return re.sub(r'([^{}]+)(\{[^}]*\})', lambda rule: re.sub(r'([.#])(-?[A-Za-z_][\w-]*)', r'\1' + prefix + r'\2',
+                                                                 rule.group(1)) + rule.group(2), style)
+    content = re.sub(r'(<style[^>]*>)(.*?)(</style>)',
+                     lambda match: match.group(1) + prefix_selectors(match.group(2)) + match.group(3), content,
+                     flags=re.S)
+    content = re.sub(r'\bid="([^"]*)"', lambda match: f'id="{prefix}{match.group(1)}"', content)
+    content = re.sub(r'\bclass="([^"]*)"',
+                     lambda match: 'class="' + ' '.join(prefix + name for name in match.group(1).split()) + '"', content)
+    content = re.sub(r'url\(#([^)]*)\)', lambda match: f'url(#{prefix}{match.group(1)})', content)
+    return re.sub(r'href="#([^"]*)"', lambda match: f'href="#{prefix}{match.group(1)}"', content)
+
+
+def _svg_symbol(path, symbol_id, img_name):
+    '''
+    Converts an svg file into a <symbol> of the atlas, with the viewBox of the file or one made from its size.
+    '''
+    with open(path, encoding='utf-8') as svg_file:
+        svg = re.sub(r'<\?xml.*?\?>|<!--.*?-->|<!DOCTYPE[^>]*>', '', svg_file.read(), flags=re.S)
+    root = re.search(r'<svg\b([^>]*)>', svg)
+    attributes = dict(re.findall(r'([\w:-]+)="([^"]*)"', root.group(1)))
+    view_box = attributes.get('viewBox')
+    if view_box is None:
+        view_box = f"0 0 {attributes.get('width', '100').rstrip('px')} {attributes.get('height', '100').rstrip('px')}"
+    aspect = attributes.get('preserveAspectRatio')
+    content = _prefix_svg(svg[root.end():svg.rindex('</svg>')].strip(), symbol_id + '-')
+    return (f'<symbol id="{symbol_id}" data-img="{html.escape(img_name)}" viewBox="{view_box}"'
+            + (f' preserveAspectRatio="{aspect}"' if aspect else '') + f'>{content}</symbol>')
+
+
+def build_atlas(img_names, media_folder):
+    '''
+    Packs the svg images of a world into one svg of <symbol>s in the dist folder, which the grid references instead of
+    requesting and decoding every image separately. Returns the file name of the atlas, an atlas built before from the
+    same images is reused.
+    '''
+    paths = {img_name: os.path.join(media_folder, img_name.lstrip('/\\')) for img_name in img_names}
+    paths = {img_name: path for img_name, path in paths.items() if os.path.isfile(path)}
+    key = ''.join(img_name + fingerprint(path) for img_name, path in sorted(paths.items()))
+    atlas_file = f"atlas.{hashlib.sha1(key.encode()).hexdigest()[:10]}.svg"
+    atlas_path = os.path.join(dist_folder, atlas_file)
+    if not os.path.exists(atlas_path):
+        symbols = [_svg_symbol(path, 'img-' + hashlib.sha1(img_name.encode()).hexdigest()[:10], img_name)
+                   for img_name, path in sorted(paths.items())]
+        os.makedirs(dist_folder, exist_ok=True)
+        _write_file(atlas_path, ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'
+                                 + '\n'.join(symbols) + '</svg>\n').encode('utf-8'))
+        _compress(atlas_path)
+    return atlas_file
+
+
+def build_background(decorations, shape, media_folder):
+    '''
+    Draws decorations (name, location, img_name, size) of a world into one svg the size of the world in tiles, used as
+    the background image of the grid instead of an object per decoration. Images are placed and sized as the grid does
+    for objects. Returns the fingerprinted url of the svg in the dist folder, one drawn before from the same decorations
+    and images is reused.
+    '''
+    paths = {img_name: os.path.join(media_folder, img_name.lstrip('/\\')) for _, _, img_name, _ in decorations}
+    paths = {img_name: path for img_name, path in paths.items() if os.path.isfile(path)}
+    key = repr((list(shape), decorations)) + ''.join(img_name + fingerprint(path) for img_name, path in sorted(paths.items()))
+    background_file = f"background.{hashlib.sha1(key.encode()).hexdigest()[:10]}.svg"
+    background_path = os.path.join(dist_folder, background_file)
+    if not os.path.exists(background_path):
+        symbol_ids = {img_name: 'bg-' + hashlib.sha1(img_name.encode()).hexdigest()[:10] for img_name in paths}
+        symbols = [_svg_symbol(path, symbol_ids[img_name], img_name) for img_name, path in sorted(paths.items())]
+        uses = []
+        for name, (x, y), img_name, size in decorations:
+            if img_name in symbol_ids:
+                # Centered on the tile like the objects of the grid, which are 1 tile by default
+                size = 1 if size is None else size
+                offset = (1 - size) / 2
+                uses.append(f'<use href="#{symbol_ids[img_name]}" x="{x + offset:g}" y="{y + offset:g}" '
+                            f'width="{size:g}" height="{size:g}"/>')
+        os.makedirs(dist_folder, exist_ok=True)
+        _write_file(background_path, (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                                      f'viewBox="0 0 {shape[0]} {shape[1]}" preserveAspectRatio="none"><defs>'
+                                      + '\n'.join(symbols) + '</defs>\n' + '\n'.join(uses) + '</svg>\n').encode('utf-8'))
+        _compress(background_path)
+    return asset_url('dist/' + background_file)
+
+
+def build(media_folder=None):
+    '''
+    Bundles and minifies the scripts of every page, writes the manifest and precompresses the text assets of the
+    static folder and, if given, of the external media folder. Bundles of earlier builds are removed, the atlases and
+    background images that running visualizers draw in the dist folder are left alone.
+    '''
+    global _manifest
+    os.makedirs(dist_folder, exist_ok=True)
+    manifest = {}
+    for page, filenames in PAGE_SCRIPTS.items():
+        parts = []
+        for filename in filenames:
+            with open(os.path.join(static_folder, filename), encoding='utf-8') as script_file:
+                source = script_file.read()
+            parts.append(source if filename in LIBRARY_SCRIPTS else minify_js(source))
+        bundle = ';\n'.join(parts)
+        bundle_file = f"{page}.{hashlib.sha1(bundle.encode()).hexdigest()[:10]}.min.js"
+        with open(os.path.join(dist_folder, bundle_file), 'w', encoding='utf-8') as script_file:
+            script_file.write(bundle)
+        manifest[page] = {'file': bundle_file, 'sources': _sources_fingerprint(filenames)}
+    with open(manifest_file, 'w') as json_file:
+        json.dump(manifest, json_file, indent=4)
+    _manifest = manifest
+    # Visualizers with the manifest of an earlier build load the separate scripts instead, as their sources changed
+    bundle_files = {bundle['file'] for bundle in manifest.values()}
+    for name in os.listdir(dist_folder):
+        match = BUNDLE_PATTERN.match(name)
+        if match and name[:len(name) - len(match.group(2) or '')] not in bundle_files:
+            os.remove(os.path.join(dist_folder, name))
+
+    for folder in [static_folder] + ([media_folder] if media_folder else []):
+        for root, dirs, files in os.walk(folder):
+            for name in files:
+                if name.lower().endswith(COMPRESSED_EXTENSIONS):
+                    _compress(os.path.join(root, name))
+
+
+if __name__ == "__main__":
+    # Usage: python -m SaR_gui.assets [media folder, by default the images folder of the project]
+    build(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(static_folder), '..', 'images'))
+    print("Built the script bundles and compressed assets in", dist_folder)
@@ -0,0 +1,282 @@
+import argparse
+import atexit
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from flask import Flask, render_template, request, jsonify, redirect, abort
+
+from SaR_gui import assets
+from worlds1.RunConfig import make_config, TASK_TYPES, CONDITIONS, BASELINES
+
+'''
+This file holds the session server, which hosts many missions at the same time, for example for a user study with
+many participants. Every session runs main.py with its own settings in a worker process, with its own MATRX api and
+visualizer on a pair of ports of the host and its own folder. The folder holds the output of the session and a copy of
+the 'beliefs' folder, in which RescueBot keeps the trust beliefs and trust timeline of the session. The server is the
+entry point for the participants: its lobby lists the sessions and starts new ones, and /session/<session_id>/<view>
+redirects the browser to that view of the visualizer of the session. The browser then talks to the visualizer and the
+MATRX api of the session on their own ports, so the ports of all sessions have to be reachable for the participants.
+No more than `max_sessions` sessions run at the same time, a session frees its ports when its worker process ends.
+Run `python -m SaR_gui.session_server --help` from the root of the repository.
+'''
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+port = 5000
+# Maximum number of sessions running at the same time on this host
+max_sessions = 8
+# Session i uses the ports base_port + 2 * i for its visualizer and the next one for its MATRX api
+base_port = 3100
+# Folder with a folder for every session, with the logs of its mission, its trust beliefs, its settings and the output
+# of its worker
+sessions_folder = os.path.join("logs", "sessions")
+# Seconds a stopped worker gets to shut down before it is killed
+STOP_TIMEOUT = 5
+app = Flask(__name__, template_folder='templates')
+app.jinja_env.globals.update(asset_url=assets.asset_url)
+
+
+class Session:
+    '''
+    A mission running in a worker process, on the ports of its slot.
+    '''
+    def __init__(self, session_id, slot, config, folder):
+        self.session_id = session_id
+        self.slot = slot
+        self.config = config
+        self.folder = folder
+        self.started = time.time()
+        # main.py runs the mission of the config file without asking anything and quits when it is done
+        config_file = os.path.join(folder, 'config.json')
+        with open(config_file, mode='w') as json_file:
+            json.dump(config, json_file, indent=4)
+        with open(os.path.join(folder, 'worker.log'), mode='w') as log_file:
+            self.process = subprocess.Popen([sys.executable, os.path.join(REPO_FOLDER, 'main.py'), '--config',
+                                             config_file], cwd=REPO_FOLDER, stdin=subprocess.DEVNULL, stdout=log_file,
+                                            stderr=subprocess.STDOUT)
+
+    @property
+    def running(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        if self.running:
+            self.process.terminate()
+            try:
+                self.process.wait(STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def to_json(self):
+        return {'session_id': self.session_id, 'task_type': self.config['task_type'], 'name': self.config['name'],
+                'condition': self.config['condition'], 'running': self.running,
+                'exit_code': self.process.returncode, 'started': self.started,
+                'visualizer_port': self.config['visualizer_port'], 'api_port': self.config['api_port'],
+                'views': {'start': f"/session/{self.session_id}/start", 'god': f"/session/{self.session_id}/god",
+                          'human': f"/session/{self.session_id}/human-agent/{self.config['name']}"},
+                'output_dir': self.config['output_dir']}
+
+
+class SessionManager:
+    '''
+    Starts and keeps track of the sessions of the host, at most `capacity` running at the same time.
+    '''
+    def __init__(self, capacity, first_port, folder):
+        self.capacity = capacity
+        self.first_port = first_port
+        # The workers run in the root of the repository
+        self.folder = os.path.abspath(folder)
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def _free_slot(self):
+        # Slots of running sessions are taken, as are slots of which a port is used by another program
+        taken = {session.slot for session in self.sessions.values() if session.running}
+        if len(taken) >= self.capacity:
+            return None
+        # Slots beyond the capacity take the place of slots with used ports
+        for slot in range(self.capacity * 2):
+            if slot not in taken and not any(_port_in_use(self.first_port + 2 * slot + i) for i in (0, 1)):
+                return slot
+        return None
+
+    def start(self, settings):
+        '''
+        Starts a session with the given settings of main.py (see worlds1/RunConfig.py). The ports and the output folder
+        are chosen by the manager. Raises a ValueError for invalid settings and a RuntimeError when the host is full.
+        '''
+        settings = {key: value for key, value in settings.items()
+                    if key not in ('api_port', 'visualizer_port', 'output_dir', 'work_dir', 'headless')}
+        if settings.get('task_type') is None:
+            raise ValueError("a session needs a task type")
+        # Check the settings before the capacity, so invalid settings are reported as such
+        make_config(dict(settings, visualizer_port=self.first_port, api_port=self.first_port + 1))
+        with self._lock:
+            slot = self._free_slot()
+            if slot is None:
+                raise RuntimeError(f"all {self.capacity} sessions of this host are in use, try again later")
+            session_id = uuid.uuid4().hex[:12]
+            folder = os.path.join(self.folder, session_id)
+            # Every session starts from the trust beliefs of the repository, and keeps its own
+            shutil.copytree(os.path.join(REPO_FOLDER, 'beliefs'), os.path.join(folder, 'beliefs'))
+            config = make_config(dict(settings, visualizer_port=self.first_port + 2 * slot,
+                                      api_port=self.first_port + 2 * slot + 1, output_dir=folder, work_dir=folder))
+            session = Session(session_id, slot, config, folder)
+            self.sessions[session_id] = session
+        return session
+
+    def stop(self, session_id):
+        session = self.sessions[session_id]
+        session.stop()
+        return session
+
+    def stop_all(self):
+        for session in list(self.sessions.values()):
+            session.stop()
+
+    def nr_running(self):
+        return sum(session.running for session in self.sessions.values())
+
+
+def _port_in_use(port_nr):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(('127.0.0.1', port_nr)) == 0
+
+
+# created by run_session_server
+manager = None
+
+
+#########################################################################
+# Session server routes
+#########################################################################
+
+@app.route('/')
+@app.route('/lobby')
+def lobby_view():
+    """
+    Route for the lobby, which lists the sessions of the host and starts new ones.
+
+    Returns
+    -------
+    str
+        The template for this view.
+
+    """
+    sessions = sorted(manager.sessions.values(), key=lambda session: session.started, reverse=True)
+    return render_template('lobby.html', sessions=[session.to_json() for session in sessions],
+                           capacity=manager.capacity, nr_running=manager.nr_running(), task_types=TASK_TYPES,
+                           conditions=CONDITIONS, baselines=BASELINES)
+
+
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    """
+    Returns the sessions of the host and the number of sessions that can still be started.
+    """
+    return jsonify({'sessions': [session.to_json() for session in manager.sessions.values()],
+                    'capacity': manager.capacity, 'available': manager.capacity - manager.nr_running()})
+
+
+@app.route('/sessions', methods=['POST'])
+def start_session():
+    """
+    Starts a session with the settings of main.py given as JSON or as form fields, for example
+    {"task_type": "official", "condition": "normal", "name": "participant1"}. Forms are sent on to the lobby.
+
+    Returns
+    -------
+        The new session (201), the problems of the settings (400) or that the host is full (503).
+    """
+    from_form = not request.is_json
+    settings = request.get_json(silent=True) if not from_form else \
+        {key: value for key, value in request.form.items() if value != ''}
+    if not isinstance(settings, dict):
+        return jsonify({'error': "the settings should be a JSON object"}), 400
+    # Form fields are strings, the settings of main.py are numbers where they are numbers in its defaults
+    for key in ('tick_duration', 'seed', 'max_ticks'):
+        if from_form and key in settings:
+            try:
+                settings[key] = float(settings[key]) if key == 'tick_duration' else int(settings[key])
+            except ValueError:
+                return jsonify({'error': f"{key} should be a number"}), 400
+    try:
+        session = manager.start(settings)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    except RuntimeError as error:
+        return jsonify({'error': str(error)}), 503
+    if from_form:
+        return redirect('/lobby')
+    return jsonify(session.to_json()), 201
+
+
+@app.route('/session/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """
+    Returns a session, or 404 when there is no session with this ID.
+    """
+    if session_id not in manager.sessions:
+        abort(404)
+    return jsonify(manager.sessions[session_id].to_json())
+
+
+@app.route('/session/<session_id>/stop', methods=['POST'])
+def stop_session(session_id):
+    """
+    Stops the worker process of a session, which frees its ports for a new session.
+    """
+    if session_id not in manager.sessions:
+        abort(404)
+    session = manager.stop(session_id)
+    if not request.is_json:
+        return redirect('/lobby')
+    return jsonify(session.to_json())
+
+
+@app.route('/session/<session_id>/<path:view>')
+def session_view(session_id, view):
+    """
+    Sends the browser on to a view of the visualizer of a session, such as start, god or human-agent/<name>. The
+    browser then talks to the visualizer and MATRX api of the session directly.
+    """
+    session = manager.sessions.get(session_id)
+    if session is None:
+        abort(404)
+    if not session.running:
+        abort(410, description=f"Session {session_id} has ended")
+    host = request.host.rsplit(':', 1)[0]
+    return redirect(f"http://{host}:{session.config['visualizer_port']}/{view}")
+
+
+def run_session_server(server_port=None, capacity=None, first_port=None, folder=None):
+    """
+    Serves the session server until it is interrupted, after which all sessions are stopped.
+    """
+    global manager
+    manager = SessionManager(capacity or max_sessions, first_port or base_port, folder or sessions_folder)
+    atexit.register(manager.stop_all)
+    # Stop the sessions also when the server is terminated, not only when it is interrupted
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Session server on port {server_port or port}, for at most {manager.capacity} sessions")
+    app.run(host='0.0.0.0', port=server_port or port, threaded=True, debug=False, use_reloader=False)
+
+
+if __name__ == "__main__":
+    # Usage: python -m SaR_gui.session_server [--port 5000] [--max-sessions 8] [--base-port 3100]
+    # The browsers of the participants need to reach the port of the server and the ports from base_port on
+    parser = argparse.ArgumentParser(description="Host many missions at the same time, each in a worker process.")
+    parser.add_argument('--port', type=int, default=port, help="port of the lobby and the session routes")
+    parser.add_argument('--max-sessions', type=int, default=max_sessions, help="sessions running at the same time")
+    parser.add_argument('--base-port', type=int, default=base_port,
+                        help="first port of the sessions, every session uses two consecutive ports")
+    parser.add_argument('--folder', default=sessions_folder, help="folder with the output of every session")
+    args = parser.parse_args()
+    run_session_server(args.port, args.max_sessions, args.base_port, args.folder)
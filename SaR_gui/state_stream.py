@@ -0,0 +1,162 @@
+import threading
+
+from matrx.api import api
+
+'''
+This file pushes the MATRX state to the views of the visualization with server-sent events, instead of every view
+polling the MATRX api for it. MATRX publishes the states of a tick via api._next_tick, which is wrapped here to wake up
+the streams, after which every stream sends the latest state and the new messages of its agent once.
+A stream starts with a snapshot of the full state and then only sends what changed since its previous update, each
+update numbered so a view that misses one can reconnect for a new snapshot.
+Views only keep the recent messages of a chatroom, older ones are fetched in pages with chat_history.
+'''
+
+# Seconds a stream waits for a new tick before checking whether MATRX was paused or started
+WAIT_TIMEOUT = 0.25
+# Seconds after which an idle stream sends a comment, so closed connections are noticed
+KEEP_ALIVE = 15
+# Largest number of messages returned by one chat_history call
+MAX_HISTORY_PAGE = 200
+
+_tick_condition = threading.Condition()
+_tick_count = 0
+_installed = False
+_closed = False
+
+
+def _publish_after(next_tick):
+    '''
+    Wraps api._next_tick such that the streams are notified after MATRX published the states of a new tick.
+    '''
+    def next_tick_and_publish():
+        global _tick_count
+        next_tick()
+        with _tick_condition:
+            _tick_count += 1
+            _tick_condition.notify_all()
+    return next_tick_and_publish
+
+
+def install():
+    '''
+    Hooks the streams into the MATRX api, safe to call more than once.
+    '''
+    global _installed, _closed
+    if not _installed:
+        api._next_tick = _publish_after(api._next_tick)
+        _installed = True
+    _closed = False
+
+
+def close():
+    '''
+    Ends all streams, so the threads serving them finish when the visualizer shuts down.
+    '''
+    global _closed
+    with _tick_condition:
+        _closed = True
+        _tick_condition.notify_all()
+
+
+def _latest_update(agent_id, chat_offsets):
+    '''
+    Returns the same update as the get_latest_state_and_messages api call, or None when MATRX has no state yet.
+    The chat offsets are moved past the messages in the update, so every message is sent once.
+    '''
+    # The states are module private in the api, there is no public accessor for them
+    states = getattr(api, '__states')
+    tick = api._current_tick
+    message_manager = api._gw_message_manager
+    if tick not in states or message_manager is None:
+        return None
+    state = states[tick].get(agent_id)
+    chatrooms = message_manager.fetch_chatrooms(agent_id=agent_id)
+    messages = message_manager.fetch_messages(agent_id=agent_id, chatroom_mssg_offsets=chat_offsets)
+    for chatroom_ID, chatroom_messages in messages.items():
+        if chatroom_messages:
+            offset = chat_offsets.get(str(chatroom_ID))
+            chat_offsets[str(chatroom_ID)] = (-1 if offset is None else offset) + len(chatroom_messages)
+    return {"matrx_paused": api.matrx_paused, "states": [{agent_id: state} if state is not None else {}],
+            "chatrooms": chatrooms, "messages": messages}
+
+
+def chat_history(agent_id, chatroom_ID, before, count):
+    '''
+    Returns the messages of a chatroom of the agent with an index (chat_mssg_count) below `before`, at most `count` of
+    them and oldest first, as the same JSON strings as the api sends. None when the agent has no such chatroom.
+    '''
+    message_manager = api._gw_message_manager
+    if message_manager is None or chatroom_ID not in message_manager.fetch_chatrooms(agent_id=agent_id):
+        return None
+    # Chatroom IDs are their index in the list of chatrooms of the message manager
+    chatroom_messages = message_manager.chatrooms[chatroom_ID].messages
+    before = min(max(before, 0), len(chatroom_messages))
+    count = min(max(count, 0), MAX_HISTORY_PAGE)
+    return [mssg.to_json() for mssg in chatroom_messages[max(before - count, 0):before]]
+
+
+def _state_delta(previous, state):
+    '''
+    Returns the difference between two states of an agent: the objects that are new or lost a property, which are
+    replaced as a whole, the changed properties of the other objects, and the IDs of the removed objects.
+    '''
+    replaced, changed = {}, {}
+    for obj_id, obj in state.items():
+        previous_obj = previous.get(obj_id)
+        if previous_obj is None or previous_obj.keys() - obj.keys():
+            replaced[obj_id] = obj
+        elif previous_obj is not obj and previous_obj != obj:
+            changed[obj_id] = {prop: value for prop, value in obj.items()
+                               if prop not in previous_obj or previous_obj[prop] != value}
+    removed = [obj_id for obj_id in previous if obj_id not in state]
+    return replaced, changed, removed
+
+
+def _encode_update(update, agent_id, previous_state, seq):
+    '''
+    Turns an update into a snapshot, or into a delta against the previous state of the stream when there is one for
+    the same world. Returns the encoded update and the state to compute the next delta against.
+    '''
+    agent_state = update['states'][0].get(agent_id)
+    state = None if agent_state is None else agent_state['state']
+    update['seq'] = seq
+    if state is None or previous_state is None \
+            or previous_state.get('World', {}).get('world_ID') != state.get('World', {}).get('world_ID'):
+        update['snapshot'] = True
+        return update, state
+    update['snapshot'] = False
+    update['replaced'], update['changed'], update['removed'] = _state_delta(previous_state, state)
+    del update['states']
+    return update, state
+
+
+def stream(agent_id, chat_offsets, dumps):
+    '''
+    Generates the server-sent events of one view: an update for every tick of MATRX and whenever MATRX is paused or
+    started, encoded with `dumps`. Ticks that pass while the view is still receiving an update are skipped.
+    The first update is a snapshot, the next ones are deltas numbered with consecutive sequence numbers.
+    '''
+    chat_offsets = dict(chat_offsets or {})
+    last_tick_count, last_paused = None, None
+    previous_state, seq = None, 0
+    idle = 0
+    while not _closed:
+        with _tick_condition:
+            if _tick_count == last_tick_count and not _closed:
+                _tick_condition.wait(WAIT_TIMEOUT)
+            tick_count = _tick_count
+        paused = api.matrx_paused
+        if tick_count != last_tick_count or paused != last_paused:
+            last_tick_count = tick_count
+            update = _latest_update(agent_id, chat_offsets)
+            if update is not None:
+                last_paused = paused
+                idle = 0
+                seq += 1
+                update, previous_state = _encode_update(update, agent_id, previous_state, seq)
+                yield f"id: {seq}\ndata: {dumps(update)}\n\n"
+                continue
+        idle += WAIT_TIMEOUT
+        if idle >= KEEP_ALIVE:
+            idle = 0
+            yield ": keep alive\n\n"
@@ -1,5 +1,5 @@
 var matrx_url = 'http://' + window.location.hostname,
-    port = "3001",
+    port = matrx_api_port,
     matrx_context_menu_other = "fetch_context_menu_of_other";
     matrx_context_menu_self = "fetch_context_menu_of_self";
 
@@ -19,6 +19,14 @@ var matrx_url = 'http://' + window.location.hostname,
                 var x = obj[0].cell_x;
                 var y = obj[0].cell_y;
 
+                // objects drawn on the static layer are found by the element that was clicked
+                var hit = (typeof e.target.hit_test === 'function') ? e.target.hit_test() : null;
+                if (hit != null) {
+                    obj_id = hit['id'];
+                    x = hit['x'];
+                    y = hit['y'];
+                }
+
                 post_data = {'agent_id_who_clicked': lv_agent_id,
                         'clicked_object_id': obj_id,
                         'click_location': [x,y],
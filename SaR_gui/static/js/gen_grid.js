@@ -10,6 +10,9 @@ Parses the MATRX state and generates and updates the grid
 // Note: it is not recommended to set this value to higher than ~0.9, as the exact duration between ticks can
 // slightly vary between ticks, resulting in jittery movement
 var animation_duration_perc = 0.8;
+// Whether to draw the static objects (walls, roofs, streets, area tiles, etc.) once on a canvas instead of as separate
+// html elements, which is much faster on slow computers. Can also be turned on with ?renderer=canvas in the url
+var static_layer_enabled = new URLSearchParams(window.location.search).get("renderer") == "canvas";
 
 // Variables that will be parsed from the World settings
 var tps = null,
@@ -38,7 +41,14 @@ var firstDraw = true,
 var saved_prev_objs = {}, // obj containing the IDs of objects and their visualization settings of the previous tick
     saved_objs = {}, // obj containing the IDs of objects and their visualization settings of the current tick
     bg_tile_ids = [], // obj_IDS of background tiles
-    matrx_tile_ids = []; // obj_IDS of MATRX objects
+    matrx_tile_ids = [], // obj_IDS of MATRX objects
+    atlas_symbols = {}; // for every image in the image atlas of the world (img_name), the ID of its svg symbol
+
+// the static layer
+var static_objs = {}, // obj containing the IDs of the static objects and their location, depth and vis settings
+    static_cells = {}, // for every "x_y" cell, the ID of the top static object drawn there
+    static_images = {}, // loaded images by url
+    static_layer_scheduled = false; // whether the static layer will be redrawn in the next animation frame
 
 // track
 var object_selected = false; //
@@ -53,6 +63,34 @@ function initialize_grid() {
 }
 
 
+/**
+ * Fetch the image atlas of the world, an svg with all its images as symbols, and add it hidden to the page such that
+ * objects can reference their image in it instead of loading and decoding every image separately.
+ * Objects with an image that is not in the atlas still use a separate image.
+ */
+function load_image_atlas() {
+    return $.ajax({
+        url: "/image_atlas",
+        dataType: "text"
+    }).done(function(atlas) {
+        // display:none would stop gradients in the symbols from rendering, so the container is hidden by its size
+        $('#image_atlas').remove();
+        $('body').append("<div id='image_atlas' style='position:absolute; width:0; height:0; overflow:hidden;'>" +
+            atlas + "</div>");
+
+        atlas_symbols = {};
+        $('#image_atlas symbol').each(function() {
+            atlas_symbols[this.getAttribute('data-img')] = this.id;
+        });
+        // restyle the objects already drawn with a separate image
+        redraw_required = true;
+    }).fail(function() {
+        console.log("No image atlas available, using separate images");
+        atlas_symbols = {};
+    });
+}
+
+
 
 /**
  * Generate the grid and all its objects
@@ -85,7 +123,22 @@ function draw(state, world_settings, new_messages, accessible_chatrooms, new_tic
 
     // Loop through the IDs of the objects we received in the MATRX state
     var obj_ids = Object.keys(state);
-    var saved_prev_obj_keys = Object.keys(saved_prev_objs);
+    // the objects of the previous tick that were not seen yet in this tick
+    var saved_prev_obj_keys = Object.assign({}, saved_prev_objs);
+
+    // the static objects of the previous tick, and whether the static layer has to be redrawn
+    var saved_static_objs = static_objs,
+        static_layer_changed = redraw_required;
+    static_objs = {};
+    // static objects go on the static layer when they are below or level with all other objects
+    var dynamic_min_depth = Infinity;
+    if (static_layer_enabled) {
+        obj_ids.forEach(function(objID) {
+            if (objID !== "World" && !is_static_object(state[objID])) {
+                dynamic_min_depth = Math.min(dynamic_min_depth, state[objID]['visualization']['depth']);
+            }
+        });
+    }
     obj_ids.forEach(function(objID) {
 
         // skip the World object
@@ -101,9 +154,13 @@ function draw(state, world_settings, new_messages, accessible_chatrooms, new_tic
         var y = obj['location'][1];
 
         // fetch bg img if defined
-        var obj_img = null;
+        var obj_img = null,
+            obj_symbol = null;
         if (Object.keys(obj).includes('img_name')) {
             obj_img = fix_img_url(obj['img_name']);
+            if (atlas_symbols.hasOwnProperty(obj['img_name'])) {
+                obj_symbol = atlas_symbols[obj['img_name']];
+            }
         }
 
         var show_busy_condition =  (obj.hasOwnProperty("is_blocked_by_action") &&                               
@@ -113,6 +170,7 @@ function draw(state, world_settings, new_messages, accessible_chatrooms, new_tic
         // save visualization settings for this object
         var obj_vis_settings = {
             "img": obj_img,
+            "symbol": obj_symbol, // ID of the image in the image atlas, if it is in there
             "shape": obj['visualization']['shape'],
             "size": obj['visualization']['size'], // percentage how much of tile is filled
             "colour": hexToRgba(obj['visualization']['colour'], obj['visualization']['opacity']),
@@ -128,13 +186,27 @@ function draw(state, world_settings, new_messages, accessible_chatrooms, new_tic
             obj_vis_settings['subtile_loc'] = obj["subtile_loc"];
         }
 
+        // draw static objects on the static layer instead of as html element
+        if (static_layer_enabled && is_static_object(obj) && obj['visualization']['depth'] <= dynamic_min_depth) {
+            static_objs[objID] = {"x": x, "y": y, "depth": obj['visualization']['depth'], "vis": obj_vis_settings};
+            if (!compare_objects(saved_static_objs[objID], static_objs[objID])) {
+                static_layer_changed = true;
+            }
+            // remove the html element if the object was drawn as such before
+            if (saved_prev_obj_keys.hasOwnProperty(objID)) {
+                remove_element(objID);
+                delete saved_prev_obj_keys[objID];
+            }
+            return;
+        }
+
         var obj_element = null; // the html element of this object
         var animate_movement = false; // whether any x,y position changes should be animated
         var object_is_new = false; // whether this is a new object, not present in the html yet
         var style_object = true; // whether this object should be regenerated, e.g. because vis settings changed
 
         // check if this is a new object
-        if (!saved_prev_obj_keys.includes(objID)) {
+        if (!saved_prev_objs.hasOwnProperty(objID)) {
             // create a html element for this object and set classes / ID
             obj_element = document.createElement("div");
             obj_element.className = "object";
@@ -213,17 +285,27 @@ function draw(state, world_settings, new_messages, accessible_chatrooms, new_tic
         saved_objs[objID] = obj_vis_settings;
 
         // remove this item from our list of tracked objs from the previous tick
-        saved_prev_obj_keys = saved_prev_obj_keys.filter(function(e) {
-            return e !== objID
-        })
+        delete saved_prev_obj_keys[objID];
     });
 
+    // redraw the static layer if a static object was added, changed or removed
+    if (static_layer_enabled) {
+        Object.keys(saved_static_objs).forEach(function(objID) {
+            if (!static_objs.hasOwnProperty(objID)) {
+                static_layer_changed = true;
+            }
+        });
+        if (static_layer_changed) {
+            draw_static_layer();
+        }
+    }
+
     // all objects have been redrawn, so this can be set to false again
     redraw_required = false;
 
     // any objects present in the previous tick but not present in the current
     // tick should be removed
-    saved_prev_obj_keys.forEach(function(objID) {
+    Object.keys(saved_prev_obj_keys).forEach(function(objID) {
         remove_element(objID);
     });
 
@@ -629,12 +711,26 @@ function gen_circle(obj_vis_settings, obj_element) {
 }
 
 /**
- * Add an image html object. This is a rectangle with an image src added
+ * Add an image html object. This is a rectangle with an image src added, or with a reference to the image in the
+ * image atlas if it is in there
  *
  * @param {Object} obj_vis_settings: contains the visualization settings of the object
  * @param {HTML Element} obj_element: contains the HTML element of the object
  */
 function gen_image(obj_vis_settings, obj_element) {
+    if (obj_vis_settings["symbol"] != null) {
+        // add a rectangle with an svg that uses the symbol of the image
+        var shape = gen_rectangle(obj_vis_settings, obj_element);
+        shape.innerHTML = '<svg width="100%" height="100%" style="display:block;"><use href="#' +
+            obj_vis_settings["symbol"] + '"></use></svg>';
+
+        // set the background as transparent
+        shape.style.background = "transparent";
+        shape.style.opacity = obj_vis_settings["opacity"];
+
+        return shape;
+    }
+
     // add a rectangular "img" HTML element
     var shape = gen_rectangle(obj_vis_settings, obj_element, element_type = "img");
 
@@ -650,6 +746,161 @@ function gen_image(obj_vis_settings, obj_element) {
 
 
 
+/*********************************************************************
+ * Static layer
+ ********************************************************************/
+
+/**
+ * Whether an object never moves by itself, such that it can be drawn on the static layer
+ */
+function is_static_object(obj) {
+    return !obj.hasOwnProperty('isAgent') && obj['is_movable'] === false;
+}
+
+/**
+ * Get the canvas of the static layer with the size of the grid, creating it if needed
+ */
+function get_static_layer_canvas() {
+    var canvas = document.getElementById("static_layer");
+    if (canvas == null) {
+        canvas = document.createElement("canvas");
+        canvas.id = "static_layer";
+        // clicks go to the bg tiles below, which find the static object that was clicked
+        canvas.style = "position:absolute; left:0px; top:0px; pointer-events:none;";
+        grid.prepend(canvas);
+    }
+
+    // scale with the pixel ratio of the screen to keep the drawing sharp
+    var ratio = window.devicePixelRatio || 1;
+    var width = grid_size[0] * tile_size,
+        height = grid_size[1] * tile_size;
+    if (canvas.width != Math.round(width * ratio) || canvas.height != Math.round(height * ratio)) {
+        canvas.width = Math.round(width * ratio);
+        canvas.height = Math.round(height * ratio);
+        canvas.style.width = width + "px";
+        canvas.style.height = height + "px";
+    }
+    return canvas;
+}
+
+/**
+ * Draw all static objects on the static layer, from the lowest to the highest depth
+ */
+function draw_static_layer() {
+    var canvas = get_static_layer_canvas();
+    var ctx = canvas.getContext("2d");
+    var ratio = canvas.width / (grid_size[0] * tile_size);
+    ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+    ctx.clearRect(0, 0, grid_size[0] * tile_size, grid_size[1] * tile_size);
+
+    var obj_ids = Object.keys(static_objs);
+    obj_ids.sort(function(a, b) {
+        return static_objs[a]['depth'] - static_objs[b]['depth'];
+    });
+
+    static_cells = {};
+    var max_depth = 0;
+    obj_ids.forEach(function(objID) {
+        var static_obj = static_objs[objID];
+        draw_static_object(ctx, static_obj);
+        static_cells[static_obj['x'] + "_" + static_obj['y']] = objID;
+        max_depth = Math.max(max_depth, static_obj['depth']);
+    });
+
+    // below all html objects, which are at least as deep
+    canvas.style.zIndex = max_depth;
+}
+
+/**
+ * Redraw the static layer in the next animation frame, e.g. once an image has loaded
+ */
+function schedule_static_layer() {
+    if (!static_layer_scheduled) {
+        static_layer_scheduled = true;
+        window.requestAnimationFrame(function() {
+            static_layer_scheduled = false;
+            draw_static_layer();
+        });
+    }
+}
+
+/**
+ * Draw one static object on the canvas, at the same place and size as gen_rectangle would put its html element
+ */
+function draw_static_object(ctx, static_obj) {
+    var obj_vis_settings = static_obj['vis'],
+        size = obj_vis_settings['size'],
+        left = static_obj['x'] * tile_size,
+        top = static_obj['y'] * tile_size,
+        width = size * tile_size,
+        height = size * tile_size;
+
+    // use subtiles if they are defined and their location is valid
+    if ("subtiles" in obj_vis_settings
+            && obj_vis_settings['subtile_loc'][0] >= 0
+            && obj_vis_settings['subtile_loc'][0] < obj_vis_settings['subtiles'][0]
+            && obj_vis_settings['subtile_loc'][1] >= 0
+            && obj_vis_settings['subtile_loc'][1] < obj_vis_settings['subtiles'][1]) {
+        var tileW = tile_size / obj_vis_settings["subtiles"][0],
+            tileH = tile_size / obj_vis_settings["subtiles"][1];
+        left += tileW * obj_vis_settings["subtile_loc"][0] + (1 - size) * 0.5 * tileW;
+        top += tileH * obj_vis_settings["subtile_loc"][1] + (1 - size) * 0.5 * tileH;
+        width = size * tileW;
+        height = size * tileH;
+    } else {
+        left += (1 - size) * 0.5 * tile_size;
+        top += (1 - size) * 0.5 * tile_size;
+    }
+
+    // images are scaled to fit, keeping their aspect ratio like an img element does
+    if (obj_vis_settings['img'] != null) {
+        var img = static_images[obj_vis_settings['img']];
+        if (img === undefined) {
+            img = new Image();
+            img.onload = function() {
+                this.loaded = true;
+                schedule_static_layer();
+            };
+            img.src = obj_vis_settings['img'];
+            static_images[obj_vis_settings['img']] = img;
+        }
+        if (img.loaded) {
+            // svgs without a width and height have no natural size, those fill the whole rectangle
+            var img_width = img.naturalWidth || width,
+                img_height = img.naturalHeight || height;
+            var scale = Math.min(width / img_width, height / img_height);
+            ctx.globalAlpha = obj_vis_settings['opacity'];
+            ctx.drawImage(img, left + (width - img_width * scale) / 2, top + (height - img_height * scale) / 2,
+                img_width * scale, img_height * scale);
+            ctx.globalAlpha = 1;
+        }
+        return;
+    }
+
+    ctx.fillStyle = obj_vis_settings['colour'];
+    ctx.beginPath();
+    if (obj_vis_settings['shape'] == 1) {
+        ctx.moveTo(left, top + height);
+        ctx.lineTo(left + width / 2, top);
+        ctx.lineTo(left + width, top + height);
+    } else if (obj_vis_settings['shape'] == 2) {
+        ctx.ellipse(left + width / 2, top + height / 2, width / 2, height / 2, 0, 0, 2 * Math.PI);
+    } else {
+        ctx.rect(left, top, width, height);
+    }
+    ctx.fill();
+}
+
+/**
+ * Find the static object on top at a cell, for the hit-testing of clicks on the static layer. Returns null if there is
+ * none.
+ */
+function static_object_at(x, y) {
+    var objID = static_cells[x + "_" + y];
+    return objID === undefined ? null : {"id": objID, "x": x, "y": y};
+}
+
+
 /**
  * Regenerate all bg tiles in the correct size
  */
@@ -669,6 +920,12 @@ function draw_bg_tiles() {
             var tile = document.createElement("div");
             tile.className = "tile";
             tile.id = "tile_" + x + "_" + y;
+            tile.cell_x = x;
+            tile.cell_y = y;
+            // a click on a tile is a click on the static object drawn on top of it, if there is one
+            tile.hit_test = function() {
+                return static_object_at(this.cell_x, this.cell_y);
+            };
 
             // add click listeners
             tile.setAttribute("onmousedown", "startDrawErase(id)");
@@ -750,7 +1007,7 @@ function add_context_menu(object) {
             // console.log("Execute API call with message:", selectedMenu[0].mssg)
 
             var matrx_url = 'http://' + window.location.hostname,
-                port = "3001",
+                port = matrx_api_port,
                 matrx_send_message_pickled = "send_message_pickled";
 
             post_data = {'sender': lv_agent_id, 'message': selectedMenu[0].mssg}
@@ -18,6 +18,11 @@ var lv_tick_duration = 0.5,
     lv_current_tick = 0,
     lv_grid_size_loop = [1, 1],
     lv_open_update_request = false, // whether a new request to MATRX is pending right now
+    lv_use_stream = !!window.EventSource, // whether to receive the updates as a stream pushed by the server
+    lv_state_stream = null, // the EventSource of the stream, if it is open
+    lv_stream_update = false, // whether the stream pushed an update which has not been drawn yet
+    lv_stream_seq = null, // sequence number of the last update of the stream
+    lv_stream_states = null, // the states of the last snapshot of the stream, with all later updates applied
     lv_first_tick = true,
     lv_matrx_version = null;
 
@@ -38,9 +43,10 @@ var lv_tps = 1, // placeholder value
 
 // MATRX API urls
 var lv_base_url = window.location.hostname,
-    lv_init_url = 'http://' + lv_base_url + ':3001/get_info',
-    lv_update_url = 'http://' + lv_base_url + ':3001/get_latest_state_and_messages',
-    lv_send_userinput_url = 'http://' + lv_base_url + ':3001/send_userinput/',
+    lv_init_url = 'http://' + lv_base_url + ':' + matrx_api_port + '/get_info',
+    lv_update_url = 'http://' + lv_base_url + ':' + matrx_api_port + '/get_latest_state_and_messages',
+    lv_send_userinput_url = 'http://' + lv_base_url + ':' + matrx_api_port + '/send_userinput/',
+    lv_stream_url = '/state_stream/',
     lv_agent_id = "",
     lv_agent_type = null;
 
@@ -80,6 +86,7 @@ function init() {
     // init a number of vis variables
     lv_reinitialize_vis = false;
     lv_open_update_request = false;
+    close_state_stream();
 
     // fetch the canvas element from the html
     initialize_grid();
@@ -102,8 +109,10 @@ function init() {
         // if MATRX is running, change the start/pause button to match that
         sync_play_button(lv_matrx_paused);
 
-        // start the visualization loop
-        world_loop();
+        // start the visualization loop once the image atlas of the world is loaded (or turned out to be unavailable)
+        load_image_atlas().always(function() {
+            world_loop();
+        });
     });
 
     // if the request gave an error, print to console and try again
@@ -173,6 +182,12 @@ function parse_initial_state(data) {
  * The visualization loop for a MATRX world
  */
 function world_loop() {
+    // MATRX pushes its updates, so only draw the ones that arrived
+    if (lv_use_stream) {
+        stream_loop();
+        return;
+    }
+
     lv_timestamp = Date.now();
 
     // keep track of number of frames per second
@@ -243,6 +258,119 @@ function world_loop() {
     }
 }
 
+/*
+ * The visualization loop for a MATRX world when the updates are pushed via the state stream
+ */
+function stream_loop() {
+    if (lv_state_stream == null) {
+        open_state_stream();
+    }
+
+    // we received an update for a different world from our current, so reinitialize the visualization
+    if (lv_new_world_ID != null && lv_world_ID != lv_new_world_ID) {
+        console.log("New world ID received:", lv_new_world_ID);
+        lv_first_tick = false;
+        lv_reinitialize_vis = true;
+        sync_play_button(lv_matrx_paused);
+        close_state_stream();
+        return;
+    }
+
+    // redraw the screen if a new update arrived, and go to the next frame
+    if (lv_stream_update) {
+        lv_stream_update = false;
+        lv_first_tick = false;
+        // an update for a tick that was drawn already (MATRX was paused or started) can still contain messages
+        if (lv_current_tick == latest_tick_processed && !redraw_required) {
+            process_messages(lv_messages, lv_chatrooms);
+        } else {
+            draw(lv_state, lv_world_settings, lv_messages, lv_chatrooms, new_tick = true);
+        }
+    }
+    request_new_frame();
+}
+
+/*
+ * Open the stream over which the visualization server pushes an update for every MATRX tick
+ */
+function open_state_stream() {
+    var lv_received_update = false;
+    lv_state_stream = new EventSource(lv_stream_url + encodeURIComponent(lv_agent_id) + "?chat_offsets=" +
+        encodeURIComponent(JSON.stringify(chat_offsets)));
+
+    lv_state_stream.onmessage = function(event) {
+        lv_received_update = true;
+        var lv_update = apply_state_delta(JSON.parse(event.data));
+
+        // an update was missed, so reconnect to receive a new snapshot
+        if (lv_update == null) {
+            console.log("Missed a state update, resynchronizing");
+            close_state_stream();
+            open_state_stream();
+            return;
+        }
+
+        // every message is pushed only once, so keep the messages of an update that was not drawn yet
+        var lv_undrawn_messages = lv_stream_update ? lv_messages : {};
+        process_MATRX_update(lv_update);
+        Object.keys(lv_undrawn_messages).forEach(function(chatroom_ID) {
+            lv_messages[chatroom_ID] = lv_undrawn_messages[chatroom_ID].concat(lv_messages[chatroom_ID] || []);
+        });
+        lv_stream_update = true;
+    };
+
+    // the stream broke, so reinitialize. If it never delivered an update, the server does not support it: poll instead
+    lv_state_stream.onerror = function() {
+        console.log("State stream closed, reinitializing");
+        if (!lv_received_update) {
+            lv_use_stream = false;
+        }
+        close_state_stream();
+        lv_reinitialize_vis = true;
+    };
+}
+
+function close_state_stream() {
+    if (lv_state_stream != null) {
+        lv_state_stream.close();
+        lv_state_stream = null;
+    }
+    lv_stream_update = false;
+    lv_stream_seq = null;
+    lv_stream_states = null;
+}
+
+/*
+ * Apply an update of the state stream: a snapshot replaces the state, a delta replaces, changes and removes the
+ * objects that changed since the previous update. Returns the update with the resulting states, or null when the
+ * delta does not follow the previous update.
+ */
+function apply_state_delta(update) {
+    if (update['snapshot']) {
+        lv_stream_seq = update['seq'];
+        lv_stream_states = update['states'];
+        return update;
+    }
+    if (lv_stream_seq == null || update['seq'] != lv_stream_seq + 1) {
+        return null;
+    }
+    lv_stream_seq = update['seq'];
+
+    var lv_delta_state = lv_stream_states[lv_stream_states.length - 1][lv_agent_id]['state'];
+    Object.keys(update['replaced']).forEach(function(obj_id) {
+        lv_delta_state[obj_id] = update['replaced'][obj_id];
+    });
+    Object.keys(update['changed']).forEach(function(obj_id) {
+        Object.assign(lv_delta_state[obj_id], update['changed'][obj_id]);
+    });
+    update['removed'].forEach(function(obj_id) {
+        delete lv_delta_state[obj_id];
+    });
+
+    update['states'] = lv_stream_states;
+    return update;
+}
+
 function request_new_frame() {
 
     // method 1
@@ -279,25 +407,7 @@ function get_MATRX_update() {
         data: JSON.stringify(data),
         success: function(data) {
             //        console.log("Received update request:", lv_update_request);
-            lv_messages = data.messages;
-            lv_chatrooms = data.chatrooms;
-
-            // view is disconnected
-            if (!Object.keys(data['states'][data['states'].length - 1]).includes(lv_agent_id)){
-                $("body").append(`<div class="disconnected_notification">View Disconnected - <span>Agent doesn't exist (anymore)</span></div>`)
-            }
-
-            // decode lv_state and other info from the request
-            lv_state = data['states'][data['states'].length - 1][lv_agent_id]['state'];
-            var lv_new_tick = lv_state['World']['nr_ticks'];
-            curr_tick_timestamp = lv_state['World']['curr_tick_timestamp'];
-            lv_tick_duration = lv_state['World']['tick_duration'];
-            lv_tps = (1.0 / lv_tick_duration).toFixed(1); // round to 1 decimal behind the dot
-
-            lv_world_settings = lv_state['World'];
-
-            // check what the ID of this world is. Is it still the same world we were expecting, or a different world?
-            lv_new_world_ID = lv_state['World']['world_ID'];
+            process_MATRX_update(data);
 
             // we request more often than the lv_tick_duration, as to not miss any ticks
             lv_wait_for_next_tick = lv_tick_duration * 1000 * 0.6;
@@ -306,16 +416,6 @@ function get_MATRX_update() {
             if (lv_wait_for_next_tick > 500) {
                 lv_wait_for_next_tick = 500;
             }
-
-            // note our new current tick
-            lv_current_tick = lv_new_tick;
-
-            // make sure to synchronize the play/pause button of the frontend with the current MATRX version
-            var matrx_paused = data.matrx_paused;
-            if (matrx_paused != lv_matrx_paused) {
-                lv_matrx_paused = matrx_paused;
-                sync_play_button(lv_matrx_paused);
-            }
         },
     });
 
@@ -323,6 +423,42 @@ function get_MATRX_update() {
 }
 
 
+/*
+ * Parse an update from MATRX with the latest state, chatrooms and new messages of this agent
+ */
+function process_MATRX_update(data) {
+    lv_messages = data.messages;
+    lv_chatrooms = data.chatrooms;
+
+    // view is disconnected
+    if (!Object.keys(data['states'][data['states'].length - 1]).includes(lv_agent_id)){
+        $("body").append(`<div class="disconnected_notification">View Disconnected - <span>Agent doesn't exist (anymore)</span></div>`)
+    }
+
+    // decode lv_state and other info from the request
+    lv_state = data['states'][data['states'].length - 1][lv_agent_id]['state'];
+    var lv_new_tick = lv_state['World']['nr_ticks'];
+    curr_tick_timestamp = lv_state['World']['curr_tick_timestamp'];
+    lv_tick_duration = lv_state['World']['tick_duration'];
+    lv_tps = (1.0 / lv_tick_duration).toFixed(1); // round to 1 decimal behind the dot
+
+    lv_world_settings = lv_state['World'];
+
+    // check what the ID of this world is. Is it still the same world we were expecting, or a different world?
+    lv_new_world_ID = lv_state['World']['world_ID'];
+
+    // note our new current tick
+    lv_current_tick = lv_new_tick;
+
+    // make sure to synchronize the play/pause button of the frontend with the current MATRX version
+    var matrx_paused = data.matrx_paused;
+    if (matrx_paused != lv_matrx_paused) {
+        lv_matrx_paused = matrx_paused;
+        sync_play_button(lv_matrx_paused);
+    }
+}
+
+
 /*
  * Send the object "data" to MATRX as JSON data. The agent ID is automatically appended.
  */
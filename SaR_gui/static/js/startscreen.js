@@ -1,4 +1,4 @@
-var ss_update_url = 'http://127.0.0.1:3001/get_latest_state/';
+var ss_update_url = 'http://127.0.0.1:' + matrx_api_port + '/get_latest_state/';
 
 var ss_state = null,
     ss_world_settings = null,
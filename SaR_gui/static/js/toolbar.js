@@ -1,6 +1,6 @@
 // data on the MATRX API
 var matrx_url = 'http://' + window.location.hostname,
-    port = "3001",
+    port = matrx_api_port,
     matrx_send_message_url = "send_message";
 
 var chat_blocked = true;
@@ -179,8 +179,26 @@ var all_chatrooms = {};
 var chat_offsets = {};
 // the currently opened chatroom
 var current_chatwindow = {};
-// our database with messages, indexed by chat room name
+// our database with messages, indexed by chat room name. A message repeated directly after itself is stored once,
+// with the number of repeats. Only the recent messages of a chatroom are kept, older ones are fetched on demand
 var messages = {};
+// index (chat_mssg_count) of the oldest message in our database for each chatroom, older messages are on the server
+var chat_history_start = {};
+// maximum number of messages kept in the database of a chatroom
+var chat_history_limit = 300;
+// maximum number of messages shown in the chat while it is scrolled to the newest message
+var chat_render_limit = 100;
+// number of older messages shown per click on the show older messages button
+var chat_page_size = 50;
+// number of messages fetched per request for older messages from the server
+var chat_history_page = 200;
+// index in the database of the current chatroom of the oldest message shown in the chat
+var chat_render_start = 0;
+// whether older messages are being fetched from the server right now
+var chat_history_request = false;
+var chat_history_url = '/chat_history/';
+// messages only sent for the visualization, such as the score, which are not shown in the chat
+var hidden_chat_messages = ["Our score is", "You ignored me", "Your workload", "Your performance"];
 
 /*
  * Add a key listener to the input text box, such that the message will be sent when the user
@@ -307,6 +325,7 @@ function add_chatroom(chat_name, chatroom_display_name, chatroom_ID, room_type,
 
     // add a new list that will keep track of the messages of this chatroom
     messages[chatroom_ID] = [];
+    chat_history_start[chatroom_ID] = null;
 
     // set the offset to the first message
     chat_offsets[chatroom_ID] = null;
@@ -389,6 +408,7 @@ function open_chatroom(chatroom_display_name, chatroom_ID, chatroom_type) {
     }
 
     // set the chat room as selected
+    var previous_chatroom_ID = current_chatwindow['chatroom_ID'];
     current_chatwindow = {
         'chatroom_ID': chatroom_ID,
         'name': chatroom_display_name,
@@ -408,17 +428,17 @@ function open_chatroom(chatroom_display_name, chatroom_ID, chatroom_type) {
     document.getElementById("chatroom_" + chatroom_ID + "_notification").style.display = "none";
 
     // remove messages from the old chatroom
-    var mssgs_container = document.getElementById("messages");
-    while (mssgs_container.firstChild) {
-        mssgs_container.removeChild(mssgs_container.firstChild);
-    }
+    clear_chat_pane(previous_chatroom_ID);
 
-    // display messages of this chatroom, if any
+    // display the most recent messages of this chatroom, if any
+    chat_render_start = 0;
     if (Object.keys(messages).includes(chatroom_ID)) {
-        messages[chatroom_ID].forEach(function(message) {
-            add_message(chatroom_ID, message);
-        });
+        chat_render_start = Math.max(messages[chatroom_ID].length - chat_render_limit, 0);
+        for (var i = chat_render_start; i < messages[chatroom_ID].length; i++) {
+            add_message(chatroom_ID, messages[chatroom_ID][i]);
+        }
     }
+    update_older_messages_button();
 
     // scroll message container to bottom
     scrollToBottom(document.getElementById("messages"));
@@ -426,18 +446,64 @@ function open_chatroom(chatroom_display_name, chatroom_ID, chatroom_type) {
 }
 
 /*
- * Add 1 message to the currently opened chatroom
+ * Get the text of a message, objects are shown as strings
  */
-function add_message(chatroom_ID, mssg) {
-    mssg_content = "";
+function message_text(mssg) {
     // cleanup and validate the input
     if (typeof mssg.content == "string") {
-        mssg_content = mssg.content.trim();
+        return mssg.content.trim();
     }
-    // show objects as strings by default
-    else {
-        mssg_content = JSON.stringify(mssg.content);
+    return JSON.stringify(mssg.content);
+}
+
+/*
+ * Whether a message is only sent for the visualization and not shown in the chat
+ */
+function is_hidden_message(mssg) {
+    var text = message_text(mssg);
+    return hidden_chat_messages.some(function(hidden) {
+        return text.includes(hidden);
+    });
+}
+
+/*
+ * Whether a message repeats the message of a database entry: the same content from the same other agent, such as
+ * the prompts RescueBot repeats until the human answers
+ */
+function is_repeated_message(entry, mssg) {
+    return entry != null && mssg.from_id != lv_agent_id && entry.mssg.from_id == mssg.from_id &&
+        message_text(entry.mssg) == message_text(mssg);
+}
+
+/*
+ * Create the database entry of a message
+ */
+function new_chat_entry(mssg) {
+    return {
+        'mssg': mssg,
+        'first_count': mssg['chat_mssg_count'], // index of the first of the repeated messages
+        'repeats': 1,
+        'html': null, // the formatted content, once shown
+        'div': null // the div of the message, while it is shown
+    };
+}
+
+/*
+ * Show the score sent with the hidden score message
+ */
+function update_score(mssg) {
+    var mssg_content = message_text(mssg);
+    if (mssg_content.includes("Our score is")) {
+        const text = mssg_content.split(".").join("").split(" ").at(-1);
+        document.getElementById('score').innerHTML = 'Score: ' + text;
     }
+}
+
+/*
+ * Format the content of a message as html, with the images of the victims and obstacles it mentions
+ */
+function message_html(mssg) {
+    var mssg_content = message_text(mssg);
     /*
     const img = document.createElement("img");
     img.src = "/static/images/critically injured girl.svg";
@@ -513,45 +579,207 @@ function add_message(chatroom_ID, mssg) {
     mssg_content = mssg_content.replaceAll("stones", "<img src='/static/images/stone-small.svg' height= 30 width=30/>");
     mssg_content = mssg_content.replaceAll("tree", "<img src='/static/images/tree-fallen2.svg' height= 30 width=30/>");
 
-    if (mssg_content.includes("Our score is")) {
-        function score() {
-            const text = mssg_content.split(".").join("").split(" ").at(-1);
+    return mssg_content;
+}
 
-            document.getElementById('score').innerHTML = 'Score: ' + text;
-        }
-        score()
+/*
+ * Add 1 message of the database to the currently opened chatroom, at the end or before the div of another message
+ */
+function add_message(chatroom_ID, entry, before = null) {
+    if (entry.html == null) {
+        entry.html = message_html(entry.mssg);
     }
 
     var div = document.createElement("div");
     div.className = "message_you"; // by default assume we sent this message
 
     // check if sent or received this message
-    if (mssg.from_id != lv_agent_id) {
+    if (entry.mssg.from_id != lv_agent_id) {
         div.className = "message_other";
 
         // display the sender name
-        // console.log("adding sender");
         var mssg_sender = document.createElement('span');
         mssg_sender.className = "chat-mssg-sender";
-        mssg_sender.appendChild(document.createTextNode(mssg.from_id + ": "));
+        mssg_sender.appendChild(document.createTextNode(entry.mssg.from_id + ": "));
         div.appendChild(mssg_sender);
     }
 
     // add the message text to the message div
-    if (!mssg_content.includes("Our score is") && !mssg_content.includes("You ignored me") && !mssg_content.includes("Your workload") && !mssg_content.includes("Your performance")) {
     var content = document.createElement('span');
     content.className = "chat-content";
-    content.innerHTML = mssg_content;
+    content.innerHTML = entry.html;
     div.appendChild(content);
-    
+
+    // add the number of repeats of the message
+    var repeats = document.createElement('span');
+    repeats.className = "chat-mssg-repeats";
+    div.appendChild(repeats);
+    entry.div = div;
+    update_message_repeats(entry);
+
     // add the message div
     var mssgs_container = document.getElementById("messages");
-    mssgs_container.appendChild(div);
-    
-    // scroll to the new message
-//    scrollSmoothToBottom(mssgs_container)
-    scrollToBottom(mssgs_container);
+    mssgs_container.insertBefore(div, before);
+}
+
+/*
+ * Show how often a shown message was repeated
+ */
+function update_message_repeats(entry) {
+    if (entry.div != null) {
+        entry.div.lastChild.textContent = entry.repeats > 1 ? "\u00d7" + entry.repeats : "";
+    }
+}
+
+/*
+ * Remove the shown messages of a chatroom from the chat
+ */
+function clear_chat_pane(chatroom_ID) {
+    if (chatroom_ID != null && Object.keys(messages).includes(chatroom_ID)) {
+        messages[chatroom_ID].forEach(function(entry) {
+            entry.div = null;
+        });
+    }
+    var mssgs_container = document.getElementById("messages");
+    while (mssgs_container.firstChild) {
+        mssgs_container.removeChild(mssgs_container.firstChild);
+    }
+    mssgs_container.appendChild(get_older_messages_button());
+}
+
+/*
+ * Get the button above the messages which shows older messages, created the first time
+ */
+var older_messages_button = null;
+function get_older_messages_button() {
+    if (older_messages_button == null) {
+        older_messages_button = document.createElement('div');
+        older_messages_button.className = "chat-older-messages";
+        older_messages_button.appendChild(document.createTextNode("Show older messages"));
+        older_messages_button.addEventListener('click', show_older_messages);
+    }
+    return older_messages_button;
 }
+
+/*
+ * Show the button for older messages only if the current chatroom has any
+ */
+function update_older_messages_button() {
+    var chatroom_ID = current_chatwindow['chatroom_ID'];
+    get_older_messages_button().style.display = (chat_render_start > 0 || chat_history_start[chatroom_ID] > 0) ?
+        "block" : "none";
+}
+
+/*
+ * Whether the chat is scrolled to the newest message
+ */
+function is_scrolled_to_bottom(div) {
+    return div.scrollHeight - div.scrollTop - div.clientHeight < 5;
+}
+
+/*
+ * Remove the oldest shown messages of the current chatroom beyond chat_render_limit
+ */
+function trim_chat_pane(chatroom_ID) {
+    var chatroom_mssgs = messages[chatroom_ID];
+    while (chatroom_mssgs.length - chat_render_start > chat_render_limit) {
+        chatroom_mssgs[chat_render_start].div.remove();
+        chatroom_mssgs[chat_render_start].div = null;
+        chat_render_start += 1;
+    }
+}
+
+/*
+ * Forget the oldest messages of a chatroom beyond chat_history_limit, except for the shown messages
+ */
+function trim_chat_history(chatroom_ID) {
+    var excess = messages[chatroom_ID].length - chat_history_limit;
+    if (current_chatwindow['chatroom_ID'] == chatroom_ID) {
+        excess = Math.min(excess, chat_render_start);
+    }
+    if (excess > 0) {
+        messages[chatroom_ID].splice(0, excess);
+        chat_history_start[chatroom_ID] = messages[chatroom_ID][0].first_count;
+        if (current_chatwindow['chatroom_ID'] == chatroom_ID) {
+            chat_render_start -= excess;
+        }
+    }
+}
+
+/*
+ * Show the previous page of messages of the current chatroom, from our database or otherwise from the server
+ */
+function show_older_messages() {
+    var chatroom_ID = current_chatwindow['chatroom_ID'];
+    var chatroom_mssgs = messages[chatroom_ID];
+    if (chatroom_mssgs == null) {
+        return;
+    }
+
+    // show the older messages that are still in our database
+    if (chat_render_start > 0) {
+        var mssgs_container = document.getElementById("messages");
+        var old_height = mssgs_container.scrollHeight;
+        var start = Math.max(chat_render_start - chat_page_size, 0);
+        for (var i = chat_render_start - 1; i >= start; i--) {
+            add_message(chatroom_ID, chatroom_mssgs[i], chatroom_mssgs[i + 1].div);
+        }
+        chat_render_start = start;
+        // keep the messages that were shown at the same position
+        mssgs_container.scrollTop += mssgs_container.scrollHeight - old_height;
+        update_older_messages_button();
+        return;
+    }
+
+    // fetch older messages from the server
+    if (chat_history_request || !(chat_history_start[chatroom_ID] > 0)) {
+        return;
+    }
+    chat_history_request = true;
+    var fetched = false;
+    $.getJSON(chat_history_url + encodeURIComponent(lv_agent_id) + "/" + chatroom_ID,
+        {'before': chat_history_start[chatroom_ID], 'count': chat_history_page})
+    .done(function(page) {
+        // skip if the chat was reset or another chatroom was opened in the meantime
+        if (messages[chatroom_ID] !== chatroom_mssgs || current_chatwindow['chatroom_ID'] != chatroom_ID) {
+            return;
+        }
+        var older = [];
+        page.forEach(function(mssg) {
+            mssg = jQuery.parseJSON(mssg);
+            if (is_hidden_message(mssg)) {
+                return;
+            }
+            if (is_repeated_message(older[older.length - 1], mssg)) {
+                older[older.length - 1].repeats += 1;
+            } else {
+                older.push(new_chat_entry(mssg));
+            }
+        });
+        chat_history_start[chatroom_ID] = page.length > 0 ? jQuery.parseJSON(page[0])['chat_mssg_count'] : 0;
+
+        // the newest of the older messages can be repeated by the oldest message we have
+        var last = older[older.length - 1];
+        if (chatroom_mssgs.length > 0 && is_repeated_message(last, chatroom_mssgs[0].mssg)) {
+            chatroom_mssgs[0].repeats += last.repeats;
+            chatroom_mssgs[0].first_count = last.first_count;
+            update_message_repeats(chatroom_mssgs[0]);
+            older.pop();
+        }
+        Array.prototype.unshift.apply(chatroom_mssgs, older);
+        chat_render_start += older.length;
+        fetched = true;
+    })
+    .always(function() {
+        chat_history_request = false;
+        // show the fetched messages, or fetch further if they were all hidden
+        if (fetched) {
+            update_older_messages_button();
+            if (chat_render_start > 0 || chat_history_start[chatroom_ID] > 0) {
+                show_older_messages();
+            }
+        }
+    });
 }
 
 /**
@@ -605,10 +833,7 @@ function reset_chat() {
     });
 
     // remove old messages
-    var mssgs_container = document.getElementById("messages");
-    while (mssgs_container.firstChild) {
-        mssgs_container.removeChild(mssgs_container.firstChild);
-    }
+    clear_chat_pane(current_chatwindow['chatroom_ID']);
 
     // reset the vars
     active_chatrooms = [];
@@ -616,6 +841,10 @@ function reset_chat() {
     chat_offsets = {};
     current_chatwindow = {};
     messages = {};
+    chat_history_start = {};
+    chat_render_start = 0;
+    chat_history_request = false;
+    update_older_messages_button();
 }
 
 
@@ -656,34 +885,52 @@ function process_messages(new_messages, chatrooms) {
 
         // fetch the messages for this chatroom
         new_chatroom_mssgs = new_messages[chatroom_ID]
+        var chatroom_mssgs = messages[chatroom_ID];
+        var shown = current_chatwindow['chatroom_ID'] == chatroom_ID;
+        var mssgs_container = document.getElementById("messages");
+        var at_bottom = shown && is_scrolled_to_bottom(mssgs_container);
+        var shown_new_mssg = false;
+
+        // add each message to our database, and to the GUI if the chatroom is currently active
+        new_chatroom_mssgs.forEach(function(mssg) {
+            mssg = jQuery.parseJSON(mssg);
+            chat_offsets[chatroom_ID] = mssg['chat_mssg_count']; // memorize the last mssg index
+            if (chat_history_start[chatroom_ID] == null) {
+                chat_history_start[chatroom_ID] = mssg['chat_mssg_count'];
+            }
 
-        // the chatroom is currently active, so add and show the new messages
-        if (current_chatwindow['chatroom_ID'] == chatroom_ID) {
-
-            // add each message to our database and the GUI
-            new_chatroom_mssgs.forEach(function(mssg) {
-                mssg = jQuery.parseJSON(mssg);
-                chat_offsets[chatroom_ID] = mssg['chat_mssg_count']; // memorize the last mssg index
-                messages[chatroom_ID].push(mssg); // add to db
-                add_message(chatroom_ID, mssg); // add to GUI
-//                console.log("Adding message:", mssg, " type ", all_chatrooms[chatroom_ID]['type'], " chatroom ", all_chatrooms[chatroom_ID]['name']);
-//                console.log("Latest message offset is:", mssg['chat_mssg_count']);
-            });
-
-
-        // only add messages to our database but don't show
-        } else {
-            new_chatroom_mssgs.forEach(function(mssg) {
-                mssg = jQuery.parseJSON(mssg);
-                chat_offsets[chatroom_ID] = mssg['chat_mssg_count']; // memorize the last mssg index
-                messages[chatroom_ID].push(mssg); // add to db
-//                console.log("Adding message:", mssg, " type ", all_chatrooms[chatroom_ID]['type'], " chatroom ", all_chatrooms[chatroom_ID]['name']);
-//                console.log("Latest message offset (hidden) is:", mssg['chat_mssg_count']);
-            })
-            if (new_chatroom_mssgs.length != 0 ) {
-                // show the notification for the chat room
-                document.getElementById("chatroom_" + chatroom_ID + "_notification").style.display = "inline-block";
+            // hidden messages are not kept, they only update the visualization
+            if (is_hidden_message(mssg)) {
+                update_score(mssg);
+                return;
+            }
+            shown_new_mssg = true;
+
+            // count a repeated message instead of adding it again
+            var last = chatroom_mssgs[chatroom_mssgs.length - 1];
+            if (is_repeated_message(last, mssg)) {
+                last.repeats += 1;
+                update_message_repeats(last);
+                return;
+            }
+            var entry = new_chat_entry(mssg);
+            chatroom_mssgs.push(entry); // add to db
+            if (shown) {
+                add_message(chatroom_ID, entry); // add to GUI
             }
+        });
+
+        // keep the chat at the newest message, showing a limited number of messages
+        if (at_bottom) {
+            trim_chat_pane(chatroom_ID);
+            scrollToBottom(mssgs_container);
+        }
+        trim_chat_history(chatroom_ID);
+        if (shown) {
+            update_older_messages_button();
+        } else if (shown_new_mssg) {
+            // show the notification for the chat room
+            document.getElementById("chatroom_" + chatroom_ID + "_notification").style.display = "inline-block";
         }
     });
 
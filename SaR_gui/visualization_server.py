@@ -1,6 +1,14 @@
+import os
+import json
 import threading
 import logging
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, abort
+from flask import json as flask_json
+from werkzeug.serving import BaseWSGIServer
+
+from SaR_gui import assets, state_stream
 
 '''
 This file holds the code for the MATRX RESTful api. 
@@ -12,10 +20,28 @@ For visualization, see the seperate MATRX visualization folder / package.
 
 debug = True
 port = 3000
+# Number of worker threads handling the requests of the browsers concurrently
+workers = 16
+# Number of views receiving state streams at the same time, each holds a worker thread of its own on top of the
+# workers above. Views beyond this get a 503 for their stream and poll the MATRX api instead
+max_streams = 32
+# Seconds browsers may cache fingerprinted static files (url with ?v=) and external media before revalidating them
+STATIC_MAX_AGE = 365 * 24 * 3600
+MEDIA_MAX_AGE = 3600
 app = Flask(__name__, template_folder='templates')
+app.jinja_env.globals.update(asset_url=assets.asset_url, page_scripts=assets.page_scripts)
+# The pages call the MATRX api directly, on the port it was started on
+app.jinja_env.globals.update(api_port=lambda: state_stream.api._port)
+
+# the running server, set by run_matrx_visualizer
+_server = None
+# limits the open state streams to max_streams, set by run_matrx_visualizer
+_streams = None
 
 # the path to the media folder of the user (outside of the MATRX package)
 ext_media_folder = ""
+# file name of the image atlas of the current world in the dist folder, see assets.build_atlas
+atlas_file = None
 
 #########################################################################
 # Visualization server routes
@@ -99,11 +125,10 @@ def shutdown():
         True
     -------
     """
-    func = request.environ.get('werkzeug.server.shutdown')
-    if func is None:
-        raise RuntimeError('Unable to shutdown visualizer server. Not running with the Werkzeug Server')
-    func()
-    print("Visualizer server shutting down...")
+    if _server is None:
+        raise RuntimeError('Unable to shutdown visualizer server. It was not started with run_matrx_visualizer')
+    # Stop from another thread, so this request can still be answered
+    threading.Thread(target=stop_matrx_visualizer).start()
     return jsonify(True)
 
 
@@ -120,38 +145,198 @@ def external_media(filename):
     -------
         Returns the url (relative from the website root) to that file
     """
-    return send_from_directory(ext_media_folder, filename, as_attachment=True)
+    return _send_asset(ext_media_folder, filename, MEDIA_MAX_AGE)
+
+
+@app.route('/state_stream/<agent_id>')
+def state_stream_view(agent_id):
+    """ Streams the state and new messages of an agent to its view as server-sent events, one event per MATRX tick
+
+    Parameters
+    ----------
+    agent_id
+        The agent ID, or "god". Is obtained from the URL.
+
+    Returns
+    -------
+        An event stream with a snapshot of the state, followed by the changes to it every tick (see
+        state_stream.stream). The `chat_offsets` URL parameter (JSON) gives the messages the view already has.
+    """
+    try:
+        chat_offsets = json.loads(request.args.get('chat_offsets', '{}'))
+    except ValueError:
+        chat_offsets = None
+    if not isinstance(chat_offsets, dict):
+        abort(400, description="chat_offsets should be a JSON object")
+    # A stream holds its worker thread until the view closes it, so the other requests keep the workers for themselves
+    if not _streams.acquire(blocking=False):
+        abort(503, description="Too many state streams, poll the MATRX api instead")
+    response = Response(state_stream.stream(agent_id, chat_offsets, flask_json.dumps), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Werkzeug closes the response when the stream ends or the view disconnects
+    response.call_on_close(_streams.release)
+    return response
+
+
+@app.route('/chat_history/<agent_id>/<int:chatroom_ID>')
+def chat_history_view(agent_id, chatroom_ID):
+    """ Returns a page of the older messages of a chatroom, which the chat of a view no longer keeps in memory
+
+    Parameters
+    ----------
+    agent_id
+        The agent ID, or "god". Is obtained from the URL.
+    chatroom_ID
+        The ID of the chatroom. Is obtained from the URL.
+
+    Returns
+    -------
+        A JSON list with the messages before the index given by the `before` URL parameter, at most `count` of them,
+        oldest first. A 404 if the agent has no such chatroom.
+    """
+    page = state_stream.chat_history(agent_id, chatroom_ID, request.args.get('before', 0, type=int),
+                                     request.args.get('count', 50, type=int))
+    if page is None:
+        abort(404)
+    return jsonify(page)
+
+
+@app.route('/image_atlas')
+def image_atlas():
+    """ Serves the image atlas of the current world, with the images of the world as svg symbols
+
+    Returns
+    -------
+        The svg with the symbols, or a 404 if the visualizer was started without images
+    """
+    if atlas_file is None:
+        abort(404)
+    return _send_asset(assets.dist_folder, atlas_file, 0)
+
+
+def static_files(filename):
+    """ Serves the static folder: fingerprinted urls are cached forever, other files are revalidated with their ETag
+
+    Parameters
+    ----------
+    filename
+        path to the file in the static folder.
+    """
+    if request.args.get('v'):
+        response = _send_asset(app.static_folder, filename, STATIC_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+    return _send_asset(app.static_folder, filename, 0)
+
+
+# Replace the view of Flask's own static route, so it serves the precompressed files as well
+app.view_functions['static'] = static_files
+
+
+def _send_asset(folder, filename, max_age):
+    """
+    Sends a file with ETag and Last-Modified headers, or its precompressed brotli or gzip variant when the browser
+    accepts it and the variant is not older than the file (see SaR_gui/assets.py)
+    """
+    path = os.path.join(folder, filename)
+    for encoding, extension in [('br', '.br'), ('gzip', '.gz')]:
+        if encoding in request.accept_encodings and os.path.isfile(path + extension) \
+                and os.path.isfile(path) and os.path.getmtime(path + extension) >= os.path.getmtime(path):
+            response = send_from_directory(folder, filename + extension, max_age=max_age,
+                                           download_name=os.path.basename(filename),
+                                           mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(folder, filename, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    return response
 
 
 #########################################################################
 # Visualization Flask methods
 #########################################################################
 
-def _flask_thread():
+class PooledWSGIServer(BaseWSGIServer):
     """
-    Starts the Flask server on localhost:3000
+    WSGI server that hands every connection to a fixed pool of worker threads, so the requests of many browsers are
+    served concurrently without starting a new thread per request. The pool has `nr_workers` threads for requests and
+    one more for each of the at most `nr_streams` state streams.
     """
+    multithread = True
 
-    if not debug:
-        log = logging.getLogger('werkzeug')
-        log.setLevel(logging.ERROR)
+    def __init__(self, host, port, app, nr_workers, nr_streams=0):
+        super().__init__(host, port, app)
+        self._pool = ThreadPoolExecutor(max_workers=nr_workers + nr_streams, thread_name_prefix="visualizer")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_in_worker, request, client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
 
-    app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
 
-def run_matrx_visualizer(verbose, media_folder):
+
+def _flask_thread(server):
+    """
+    Serves the Flask app on localhost:3000 until stop_matrx_visualizer is called
+    """
+    server.serve_forever()
+
+def load_world_images(images, media_folder):
+    """
+    Serves the given svg images of the media folder as the image atlas, for the world that starts next. Views load the
+    atlas again when they switch to a new world.
+    """
+    global atlas_file
+    atlas_file = assets.build_atlas(images, media_folder) if images else None
+
+def run_matrx_visualizer(verbose, media_folder, nr_workers=None, images=None):
     """
     Creates a seperate Python thread in which the visualization server (Flask) is started, serving the JS visualization
+    with a pool of `nr_workers` threads (by default the `workers` setting of this module) and a thread for each of at
+    most `max_streams` state streams.
+    The given svg images of the media folder, e.g. assets.world_images(builder), are served as one image atlas.
     :return: MATRX visualization Python thread
     """
-    global debug, ext_media_folder
+    global debug, ext_media_folder, _server, _streams
     debug = verbose
     ext_media_folder = media_folder
+    load_world_images(images, media_folder)
+    state_stream.install()
+
+    if not debug:
+        log = logging.getLogger('werkzeug')
+        log.setLevel(logging.ERROR)
 
     print("Starting visualization server")
     print("Initialized app:", app)
-    vis_thread = threading.Thread(target=_flask_thread)
+    _streams = threading.BoundedSemaphore(max_streams)
+    _server = PooledWSGIServer('0.0.0.0', port, app, nr_workers or workers, max_streams)
+    vis_thread = threading.Thread(target=_flask_thread, args=(_server,))
     vis_thread.start()
     return vis_thread
 
+def stop_matrx_visualizer():
+    """
+    Stops the visualization server started by run_matrx_visualizer, after which its thread finishes
+    """
+    global _server
+    server, _server = _server, None
+    if server is not None:
+        print("Visualizer server shutting down...")
+        state_stream.close()
+        # Waits until serve_forever returned, after which the socket and the pool of workers can be closed
+        server.shutdown()
+        server.server_close()
+
 if __name__ == "__main__":
-    run_matrx_visualizer()
\ No newline at end of file
+    run_matrx_visualizer(verbose=False, media_folder="")
\ No newline at end of file
@@ -5,13 +5,15 @@ from dataclasses import dataclass
 from typing import Optional
 
 from matrx import utils
-from matrx.agents.agent_utils.navigator import Navigator
 from matrx.agents.agent_utils.state_tracker import StateTracker
 from matrx.messages.message import Message
 
 from actions1.CustomActions import *
 from actions1.CustomActions import CarryObject, Drop
+from agents1.WorldTopology import TopologyNavigator, WorldTopology
 from brains1.ArtificialBrain import ArtificialBrain
+from loggers.TickProfiler import TickProfiler, profiled
+from loggers.TrustEventLog import DEBUG, INFO, TrustEventLog
 
 
 class Phase(enum.Enum):
@@ -57,10 +59,16 @@ random_willingness: float = float(random.uniform(-1, 1))
 
 
 class BaselineAgent(ArtificialBrain):
-    def __init__(self, slowdown, condition, name, folder):
+    def __init__(self, slowdown, condition, name, folder, profiler=None, trust_events=None, own_random=False):
         super().__init__(slowdown, condition, name, folder)
         # Initialization of some relevant variables
         self._tick = 0
+        # Draw from the agent's own random generator instead of numpy's global one, for agents deciding in parallel
+        self._own_random = own_random
+        # Profiler timing ticks, phases and helpers, disabled unless one is passed by the world builder
+        self._profiler = profiler if profiler is not None else TickProfiler()
+        # Leveled log of trust belief updates, only warnings are kept unless the world builder passes another log
+        self._trust_events = trust_events if trust_events is not None else TrustEventLog()
         self._slowdown = slowdown
         self._condition = condition
         self._human_name = name
@@ -91,6 +99,8 @@ class BaselineAgent(ArtificialBrain):
         self._recent_vic = None
         self._received_messages = []
         self._moving = False
+        # Static objects of the world, taken from the first full state and left out of the state every tick after
+        self._topology = None
 
         self._atomic_actions = ['Search', 'Collect', 'Found', "Remove"]
 
@@ -117,16 +127,30 @@ class BaselineAgent(ArtificialBrain):
     def initialize(self):
         # Initialization of the state tracker and navigation algorithm
         self._state_tracker = StateTracker(agent_id=self.agent_id)
-        self._navigator = Navigator(agent_id=self.agent_id, action_set=self.action_set,
-                                    algorithm=Navigator.A_STAR_ALGORITHM)
+        self._navigator = TopologyNavigator(agent_id=self.agent_id, action_set=self.action_set,
+                                            traversability_map_func=self._traversability_map)
+        # Time path planning and state tracking as well when profiling is enabled
+        self._profiler.wrap(self._navigator, 'get_move_action', 'navigator')
+        self._profiler.wrap(self._state_tracker, 'update', 'navigator', 'state_tracker_update')
 
+    @profiled('helper')
     def filter_observations(self, state):
-        # Filtering of the world state before deciding on an action 
+        # Filtering of the world state before deciding on an action, keeping only the objects the agent decides on and
+        # leaving the walls, area tiles and decorations to the topology of the world
+        if self._topology is None or self._topology.world_id != state['World']['world_ID']:
+            self._topology = WorldTopology(state)
+        state.state_update(self._topology.filter(state, self.agent_id))
         return state
 
+    def _traversability_map(self, state=None):
+        # The navigator plans with the walls of the topology and the other objects of the (memorized) state
+        return self._topology.traversability_map(state)
+
+    @profiled('tick')
     def decide_on_actions(self, state):
         # Identify team members
         self._tick += 1
+        self._profiler.tick = self._tick
         agent_name = state[self.agent_id]['obj_id']
         for member in state['World']['team_members']:
             if member != agent_name and member not in self._team_members:
@@ -186,6 +210,11 @@ class BaselineAgent(ArtificialBrain):
         # Send the hidden score message for displaying and logging the score during the task, DO NOT REMOVE THIS
         self._send_message('Our score is ' + str(state['rescuebot']['score']) + '.', 'RescueBot')
 
+        # Time the phase state machine under the phase the agent is in at the start of this tick
+        with self._profiler.span('phase', self._phase.name):
+            return self._decide_on_phase_actions(state, trustBeliefs)
+
+    def _decide_on_phase_actions(self, state, trustBeliefs):
         # Ongoing loop until the task is terminated, using different phases for defining the agent's behavior
         while True:
 
@@ -299,8 +328,8 @@ class BaselineAgent(ArtificialBrain):
                     self.received_messages = []
                     self.received_messages_content = []
                     self._send_message('Going to re-search all areas.', 'RescueBot')
-                    print("Re-search again so willingness goes down")
                     willingness -= 0.4
+                    self._trust_events.info(self._tick, 're_search_areas', 'willingness', -0.4, willingness)
                     self._update_csv(competence, willingness)
                     self._phase = Phase.FIND_NEXT_GOAL
                 # If there are still areas to search, define which one to search next
@@ -312,7 +341,7 @@ class BaselineAgent(ArtificialBrain):
                             state.get_room_doors(self._getClosestRoom(state, unsearched_rooms, agent_location))[
                                 0]
                         self._doormat = \
-                            state.get_room(self._getClosestRoom(state, unsearched_rooms, agent_location))[-1]['doormat']
+                            self._topology.get_doormat(self._getClosestRoom(state, unsearched_rooms, agent_location))
                         # Workaround for one area because of some bug
                         if self._door['room_name'] == 'area 1':
                             self._doormat = (3, 5)
@@ -323,8 +352,7 @@ class BaselineAgent(ArtificialBrain):
                         self._door = \
                             state.get_room_doors(self._getClosestRoom(state, unsearched_rooms, self._current_door))[0]
                         self._doormat = \
-                            state.get_room(self._getClosestRoom(state, unsearched_rooms, self._current_door))[-1][
-                                'doormat']
+                            self._topology.get_doormat(self._getClosestRoom(state, unsearched_rooms, self._current_door))
                         if self._door['room_name'] == 'area 1':
                             self._doormat = (3, 5)
                         self._phase = Phase.PLAN_PATH_TO_ROOM
@@ -340,7 +368,7 @@ class BaselineAgent(ArtificialBrain):
                     # Retrieve the victim's room location and related information
                     victim_location = self._found_victim_logs[self._goal_vic]['room']
                     self._door = state.get_room_doors(victim_location)[0]
-                    self._doormat = state.get_room(victim_location)[-1]['doormat']
+                    self._doormat = self._topology.get_doormat(victim_location)
 
                     # Handle special case for 'area 1'
                     if self._door['room_name'] == 'area 1':
@@ -477,13 +505,14 @@ class BaselineAgent(ArtificialBrain):
                             if self.idle_since is not None and self._tick - self.idle_since > self._calculate_timeout(
                                     self._loadBelief(self._team_members, self._folder, baseline),
                                     50):  # Updates timeout based on expected time of removal
-                                competence -= self._calculate_competence_update(trustBeliefs,
-                                                                                0.2 if baseline is None else 0.0)
+                                delta = self._calculate_competence_update(trustBeliefs,
+                                                                          0.2 if baseline is None else 0.0)
+                                competence -= delta
+                                self._trust_events.info(self._tick, 'remove_timeout', 'competence', -delta, competence)
 
                                 trustBeliefs[self._human_name]["willingness"] = willingness
                                 trustBeliefs[self._human_name]['competence'] = competence
                                 self._update_csv(competence, willingness)
-                                print("UPDATE: Decreases competence because timeout exceeded")
                                 self._waiting = False
                                 self._phase = Phase.FIND_NEXT_GOAL
                                 self.idle_since = None
@@ -595,9 +624,10 @@ class BaselineAgent(ArtificialBrain):
                         else:
                             if self.idle_since is not None and self._tick - self.idle_since > self._calculate_timeout(
                                     self._loadBelief(self._team_members, self._folder, baseline), 30):
-                                print("UPDATE: Decreases competence because timeout exceeded")
-                                competence -= self._calculate_competence_update(trustBeliefs,
-                                                                                0.2 if baseline is None else 0.0)
+                                delta = self._calculate_competence_update(trustBeliefs,
+                                                                          0.2 if baseline is None else 0.0)
+                                competence -= delta
+                                self._trust_events.info(self._tick, 'remove_timeout', 'competence', -delta, competence)
                                 trustBeliefs[self._human_name]['competence'] = competence
                                 self._update_csv(competence, willingness)
                                 self.idle_since = None
@@ -655,11 +685,7 @@ class BaselineAgent(ArtificialBrain):
                 self._agent_loc = int(self._door['room_name'].split()[-1])
 
                 # Store the locations of all area tiles in the current room
-                room_tiles = [info['location'] for info in state.values()
-                              if 'class_inheritance' in info
-                              and 'AreaTile' in info['class_inheritance']
-                              and 'room_name' in info
-                              and info['room_name'] == self._door['room_name']]
+                room_tiles = self._topology.get_room_tiles(self._door['room_name'])
                 self._roomtiles = room_tiles
 
                 # Make the plan for searching the area
@@ -718,8 +744,9 @@ class BaselineAgent(ArtificialBrain):
                                         clock - extra time when rescuing alone: 15 seconds \n afstand - distance between us: ' + self._distance_human,
                                                        'RescueBot')
                                     if vic in self._collected_victims:
-                                        print("You lied in collecting a victim so willingness goes down")
                                         willingness -= 0.5
+                                        self._trust_events.info(self._tick, 'lied_about_collecting', 'willingness',
+                                                                -0.5, willingness)
                                         self._update_csv(competence, willingness)
                                     self._waiting = True
 
@@ -732,8 +759,9 @@ class BaselineAgent(ArtificialBrain):
                                         afstand - distance between us: ' + self._distance_human, 'RescueBot')
                                     self._waiting = True
                                     if vic in self._collected_victims:
-                                        print("You lied in collecting a victim so willingness goes down")
                                         willingness -= 0.5
+                                        self._trust_events.info(self._tick, 'lied_about_collecting', 'willingness',
+                                                                -0.5, willingness)
                                         self._update_csv(competence, willingness)
                                     # Execute move actions to explore the area
                     return action, {}
@@ -744,7 +772,9 @@ class BaselineAgent(ArtificialBrain):
                     self._send_message(self._goal_vic + ' not present in ' + str(self._door[
                                                                                      'room_name']) + ' because I searched the whole area without finding ' + self._goal_vic + '.',
                                        'RescueBot')
-                    willingness -= self._calculate_willingness_update(trustBeliefs, 0.15 if baseline is None else 0.0)
+                    delta = self._calculate_willingness_update(trustBeliefs, 0.15 if baseline is None else 0.0)
+                    willingness -= delta
+                    self._trust_events.info(self._tick, 'victim_not_present', 'willingness', -delta, willingness)
                     trustBeliefs[self._human_name]['willingness'] = willingness
                     self._update_csv(competence, willingness)
                     # Remove the victim location from memory
@@ -764,7 +794,9 @@ class BaselineAgent(ArtificialBrain):
                     self._answered = True
                     self._waiting = False
 
-                    print("UPDATE: Willingness and Competence increase because a critical victim is rescued together")
+                    if self._trust_events.is_enabled_for(DEBUG):
+                        self._trust_events.debug(self._tick, 'rescue_critical_together',
+                                                 message='Human decided to rescue ' + str(self._recent_vic) + ' together')
                     # Tell the human to come over and help carry the critically injured victim
                     if not state[{'is_human_agent': True}]:
                         self._send_message('Please come to ' + str(self._door['room_name']) + ' to carry ' + str(
@@ -783,15 +815,18 @@ class BaselineAgent(ArtificialBrain):
                     self._rescue = 'together'
                     self._answered = True
                     self._waiting = False
-                    willingness += self._calculate_willingness_update(trustBeliefs, 0.05)
-                    competence += self._calculate_competence_update(trustBeliefs, 0.05)
+                    willingness_delta = self._calculate_willingness_update(trustBeliefs, 0.05)
+                    competence_delta = self._calculate_competence_update(trustBeliefs, 0.05)
+                    willingness += willingness_delta
+                    competence += competence_delta
+                    self._trust_events.info(self._tick, 'rescue_mild_together', 'willingness', willingness_delta,
+                                            willingness)
+                    self._trust_events.info(self._tick, 'rescue_mild_together', 'competence', competence_delta,
+                                            competence)
 
                     trustBeliefs[self._human_name]["willingness"] = willingness
                     trustBeliefs[self._human_name]['competence'] = competence
                     self._update_csv(competence, willingness)
-
-                    print(
-                        "UPDATE: Willingness and Competence increase because a mildly injured victim is rescued together")
                     # Tell the human to come over and help carry the mildly injured victim
                     if not state[{'is_human_agent': True}]:
                         self._send_message('Please come to ' + str(self._door['room_name']) + ' to carry ' + str(
@@ -857,11 +892,7 @@ class BaselineAgent(ArtificialBrain):
 
             if Phase.TAKE_VICTIM == self._phase:  # Independent of trust
                 # Store all area tiles in a list
-                room_tiles = [info['location'] for info in state.values()
-                              if 'class_inheritance' in info
-                              and 'AreaTile' in info['class_inheritance']
-                              and 'room_name' in info
-                              and info['room_name'] == self._found_victim_logs[self._goal_vic]['room']]
+                room_tiles = self._topology.get_room_tiles(self._found_victim_logs[self._goal_vic]['room'])
                 self._roomtiles = room_tiles
                 objects = []
                 # When the victim has to be carried by human and agent together, check whether human has arrived at the victim's location
@@ -885,10 +916,12 @@ class BaselineAgent(ArtificialBrain):
                             self._moving = False
                             if self.idle_since is not None and self._tick - self.idle_since > self._calculate_timeout(
                                     self._loadBelief(self._team_members, self._folder, baseline), 0):
-                                competence -= self._calculate_competence_update(trustBeliefs,
-                                                                                0.2 if baseline is None else 0.0)  # Reduce competence since the timeout was exceeded
+                                # Reduce competence since the timeout was exceeded
+                                delta = self._calculate_competence_update(trustBeliefs,
+                                                                          0.2 if baseline is None else 0.0)
+                                competence -= delta
+                                self._trust_events.info(self._tick, 'rescue_timeout', 'competence', -delta, competence)
                                 self._update_csv(competence, willingness)
-                                print("UPDATE: Decreases competence because timeout exceeded")
                                 self._waiting = False
                                 self._moving = True
                                 self.idle_since = None
@@ -969,7 +1002,9 @@ class BaselineAgent(ArtificialBrain):
 
             # Copying values to disk
             if update:
-                print(f"Update, {willingness}, {competence}")
+                if self._trust_events.is_enabled_for(DEBUG):
+                    self._trust_events.debug(self._tick, 'persist_beliefs',
+                                             message=f"willingness={willingness} competence={competence}")
                 trustBeliefs[self._human_name]["willingness"] = willingness
                 trustBeliefs[self._human_name]['competence'] = competence
                 with open(self._folder + '/beliefs/currentTrustBelief.csv', mode='w') as csv_file:
@@ -991,6 +1026,7 @@ class BaselineAgent(ArtificialBrain):
                 zones.append(place)
         return zones
 
+    @profiled('helper')
     def _process_messages(self, state, teamMembers, condition):
         '''
         process incoming messages received from the team members
@@ -1063,12 +1099,12 @@ class BaselineAgent(ArtificialBrain):
                 if msg.startswith('Remove:'):
                     # Come over immediately when the agent is not carrying a victim
                     competence = trustBeliefs[self._human_name]['competence']
-                    we_trust = True if competence > 0.20 else np.random.uniform(0, 1) > 0.6
+                    we_trust = True if competence > 0.20 else (self.rnd_gen if self._own_random else np.random).uniform(0, 1) > 0.6
                     if not self._carrying and we_trust:
                         # Identify at which location the human needs help
                         area = 'area ' + msg.split()[-1]
                         self._door = state.get_room_doors(area)[0]
-                        self._doormat = state.get_room(area)[-1]['doormat']
+                        self._doormat = self._topology.get_doormat(area)
                         if area in self._searched_rooms:
                             self._searched_rooms.remove(area)
                         # Clear received messages (bug fix)
@@ -1095,6 +1131,7 @@ class BaselineAgent(ArtificialBrain):
                                                    '14']:
                 self._human_loc = int(mssgs[-1].split()[-1])
 
+    @profiled('helper')
     def _loadBelief(self, members, folder, baseline):
         '''
         Loads trust belief values if agent already collaborated with human before, otherwise trust belief values are initialized using default values.
@@ -1145,16 +1182,17 @@ class BaselineAgent(ArtificialBrain):
                     trustBeliefs[self._human_name] = {'competence': competence, 'willingness': willingness}
         return trustBeliefs
 
+    @profiled('helper')
     def _trustBelief(self, tick, members, trustBeliefs, folder, receivedMessages,
                      state, baseline):
         '''
         Baseline implementation of a trust belief. Creates a dictionary with trust belief scores for each team member, for example based on the received messages.
         '''
         agent_beliefs = trustBeliefs[self._human_name]
-        all_rooms = state.get_all_room_names().remove('world_bounds')
+        all_rooms = self._topology.get_all_room_names().remove('world_bounds')
 
         for message in receivedMessages:
-            print(message)
+            self._trust_events.debug(tick, 'message_received', message=message)
             # Increase agent trust in a team member that rescued a victim
             action_type = message.split(":")[0]
 
@@ -1166,35 +1204,27 @@ class BaselineAgent(ArtificialBrain):
 
                 # Log search goal
                 if action_type == 'Search':
-                    agent_beliefs['willingness'] += self._calculate_willingness_update(trustBeliefs,
-                                                                                       0.05 if baseline is None else 0.0)
-                    print("UPDATE: Willingness increased since human said he is going to search area ", area)
+                    self._adjust_belief(agent_beliefs, 'willingness', self._calculate_willingness_update(
+                        trustBeliefs, 0.05 if baseline is None else 0.0), 'announced_search', tick)
 
                 # Log found event
                 if action_type == 'Found':
                     if any(obj.area == area for obj in self._objectiveHistory.get('Search', [])):
-                        agent_beliefs['willingness'] += self._calculate_willingness_update(trustBeliefs,
-                                                                                           0.02 if baseline is None else 0.0)
-                        print(
-                            "UPDATE: Competence increased since human said found a victim in an area he said he would search")
+                        self._adjust_belief(agent_beliefs, 'willingness', self._calculate_willingness_update(
+                            trustBeliefs, 0.02 if baseline is None else 0.0), 'found_in_announced_area', tick)
                     else:
-                        print(
-                            "UPDATE: Competence decreased since human said found in an area he wasn't going to search")
-                        agent_beliefs['willingness'] -= self._calculate_willingness_update(trustBeliefs,
-                                                                                           0.08 if baseline is None else 0.0)
+                        self._adjust_belief(agent_beliefs, 'willingness', -self._calculate_willingness_update(
+                            trustBeliefs, 0.08 if baseline is None else 0.0), 'found_in_unannounced_area', tick)
 
                 # Log collect goal
                 if action_type == 'Collect':
                     if not any(area == obj.area for obj in self._objectiveHistory.get('Search', [])):
-                        print(
-                            "UPDATE: Willingness decreased since it is collecting a victim in an area he was not going to search")
-                        agent_beliefs['willingness'] -= self._calculate_willingness_update(trustBeliefs, (
-                            0.05 if baseline is None else 0.0))
+                        self._adjust_belief(agent_beliefs, 'willingness', -self._calculate_willingness_update(
+                            trustBeliefs, 0.05 if baseline is None else 0.0), 'collect_in_unannounced_area', tick)
 
                     if not any(area == obj.area for obj in self._objectiveHistory.get('Found', [])):
-                        print("UPDATE: Willingness decreased since collecting victim he did not found")
-                        agent_beliefs['willingness'] -= self._calculate_willingness_update(trustBeliefs,
-                                                                                           0.05 if baseline is None else 0.0)
+                        self._adjust_belief(agent_beliefs, 'willingness', -self._calculate_willingness_update(
+                            trustBeliefs, 0.05 if baseline is None else 0.0), 'collect_unfound_victim', tick)
 
                     self._objectiveHistory.get(action_type, []).append(
                         Objective(action="Rescue together", start_time=tick, area=area))
@@ -1212,15 +1242,13 @@ class BaselineAgent(ArtificialBrain):
 
             # Log message to ask for help when removing
             if action_type == 'Help remove':
-                print("UPDATE: Increase willingness because human is willing to collaborate")
-                agent_beliefs['willingness'] += self._calculate_willingness_update(trustBeliefs,
-                                                                                   (0.02 if baseline is None else 0.0))
+                self._adjust_belief(agent_beliefs, 'willingness', self._calculate_willingness_update(
+                    trustBeliefs, 0.02 if baseline is None else 0.0), 'help_remove', tick)
 
             # Decrease willingness slightly when asking to continue
             if action_type == 'Continue':
-                print("UPDATE: Decrease willingness because human told agent to delay task")
-                agent_beliefs['willingness'] -= self._calculate_willingness_update(trustBeliefs,
-                                                                                   (0.04 if baseline is None else 0.0))
+                self._adjust_belief(agent_beliefs, 'willingness', -self._calculate_willingness_update(
+                    trustBeliefs, 0.04 if baseline is None else 0.0), 'continue_searching', tick)
 
         # Joint Removal event asked from the Robot's side
         if not self._aid_remove:
@@ -1229,13 +1257,11 @@ class BaselineAgent(ArtificialBrain):
                     objective.end_time = tick
                     threshold = self._calculate_threshold(agent_beliefs, 'remove', True)
                     if objective.end_time - objective.start_time < threshold:
-                        print("UPDATE: Increase competence since it removes within threshold")
-                        agent_beliefs['competence'] += self._calculate_competence_update(trustBeliefs,
-                                                                                         0.05 if baseline is None else 0.0)
+                        self._adjust_belief(agent_beliefs, 'competence', self._calculate_competence_update(
+                            trustBeliefs, 0.05 if baseline is None else 0.0), 'remove_within_threshold', tick)
                     else:
-                        print("UPDATE: Decreases competence since it removes out of threshold")
-                        agent_beliefs['competence'] -= self._calculate_competence_update(trustBeliefs,
-                                                                                         0.075 if baseline is None else 0.0)
+                        self._adjust_belief(agent_beliefs, 'competence', -self._calculate_competence_update(
+                            trustBeliefs, 0.075 if baseline is None else 0.0), 'remove_out_of_threshold', tick)
 
         # Joint Rescue event asked from the Robot's side
         if self._carrying_together:
@@ -1244,23 +1270,21 @@ class BaselineAgent(ArtificialBrain):
                     objective.end_time = tick
                     if tick - objective.end_time < self._calculate_threshold(agent_beliefs, 'rescue'):
                         if baseline is None:
-                            agent_beliefs['competence'] += self._calculate_competence_update(trustBeliefs, 0.05)
-                            agent_beliefs['willingness'] += self._calculate_willingness_update(trustBeliefs, 0.05 if (
-                                        self._goal_vic is not None and "mild" in self._goal_vic) else 0.025)
-                            print("UPDATE: Increase both since it rescues within threshold")
+                            self._adjust_belief(agent_beliefs, 'competence', self._calculate_competence_update(
+                                trustBeliefs, 0.05), 'rescue_within_threshold', tick)
+                            self._adjust_belief(agent_beliefs, 'willingness', self._calculate_willingness_update(
+                                trustBeliefs, 0.05 if (self._goal_vic is not None and "mild" in self._goal_vic)
+                                else 0.025), 'rescue_within_threshold', tick)
                     else:
                         if baseline is None:
-                            print("UPDATE: Decreases competence since it rescues out of threshold")
-                            agent_beliefs['competence'] -= self._calculate_competence_update(trustBeliefs, (0.1 if (
-                                    self._goal_vic is not None and "critical" in self._goal_vic) else 0.05))
+                            self._adjust_belief(agent_beliefs, 'competence', -self._calculate_competence_update(
+                                trustBeliefs, 0.1 if (self._goal_vic is not None and "critical" in self._goal_vic)
+                                else 0.05), 'rescue_out_of_threshold', tick)
 
         # If all rooms have been searched but not all victims rescued -> human lies -> willingness goes down
         if self._searched_rooms == all_rooms and len(self._found_victims) < 8:
-            print(
-                "UPDATE: All rooms have been searched but not all victims rescued -> human lies -> willingness goes down")
-
-            trustBeliefs[self._human_name]['willingness'] -= self._calculate_willingness_update(trustBeliefs, (
-                0.3 if baseline is None else 0.0))
+            self._adjust_belief(trustBeliefs[self._human_name], 'willingness', -self._calculate_willingness_update(
+                trustBeliefs, 0.3 if baseline is None else 0.0), 'all_areas_searched_victims_missing', tick)
 
         # Restrict the competence and willingness belief to a range of -1 to 1
         trustBeliefs[self._human_name]['willingness'] = np.clip(trustBeliefs[self._human_name]['willingness'], -1, 1)
@@ -1276,11 +1300,20 @@ class BaselineAgent(ArtificialBrain):
         self._update_csv(trustBeliefs[self._human_name]['competence'], trustBeliefs[self._human_name]['willingness'])
         trustBeliefs[self._human_name] = agent_beliefs
 
-        print("Tick: " + str(tick) + " " + str(agent_beliefs))
+        if self._trust_events.is_enabled_for(DEBUG):
+            self._trust_events.debug(tick, 'tick_beliefs', message=str(agent_beliefs))
         self._dictionary_to_print[tick] = agent_beliefs
-        self._plot_ticks()
+        self._plot_ticks(os.path.join(self._folder, 'trust_logs', 'trust_beliefs_per_tick.csv'))
         return trustBeliefs
 
+    def _adjust_belief(self, beliefs, belief, delta, rule, tick):
+        '''
+        Applies a trust update to the beliefs of the human and records the rule that caused it in the trust event log.
+        '''
+        beliefs[belief] += delta
+        if self._trust_events.is_enabled_for(INFO):
+            self._trust_events.info(tick, rule, belief, delta, beliefs[belief])
+
     def _calculate_threshold(self, beliefs: dict[str, int], action: str, distance: bool = False):
         """
         Calculates the dynamic threshold to complete an action
@@ -0,0 +1,108 @@
+import numpy as np
+from matrx.agents.agent_utils.navigator import AStarPlanner, Navigator
+
+'''
+This file holds the static topology of a world as seen by an agent: the walls, area tiles and decorations that never
+change while the world runs. It is taken from the first full state of a world, after which the agent only keeps the
+objects it decides on in its state every tick (see WorldTopology.filter) and asks the topology for the rest.
+Since the walls are then no longer in the state, paths are planned with a TopologyNavigator.
+'''
+
+# Classes of the objects that never move, change or disappear, the decorations and signs are plain EnvObjects
+STATIC_CLASSES = ('Wall', 'AreaTile', 'EnvObject')
+
+
+class WorldTopology:
+    '''
+    The static objects of a world, by location and by room, taken from the full state of an agent.
+    '''
+    def __init__(self, state):
+        self.world_id = state['World']['world_ID']
+        self.grid_shape = tuple(state['World']['grid_shape'])
+        self.static_ids = set()
+        self._at_location = {}
+        self._room_tiles = {}
+        self._doormats = {}
+        self._room_names = []
+        # Intraversable static objects, with 1 where the agent cannot move as in MATRX's inverted traversability map
+        self._blocked = np.zeros(self.grid_shape, dtype=int)
+        for obj_id, obj in state.items():
+            if obj_id == 'World' or obj['class_inheritance'][0] not in STATIC_CLASSES:
+                continue
+            self.static_ids.add(obj_id)
+            self._at_location.setdefault(obj['location'], []).append(obj)
+            if not obj['is_traversable']:
+                self._blocked[obj['location']] = 1
+            room_name = obj.get('room_name')
+            if room_name is not None and room_name not in self._room_names:
+                self._room_names.append(room_name)
+            if obj['class_inheritance'][0] == 'AreaTile' and room_name is not None:
+                self._room_tiles.setdefault(room_name, []).append(obj)
+                if 'doormat' in obj:
+                    self._doormats[room_name] = obj['doormat']
+        self._room_of = {tile['location']: room_name for room_name, tiles in self._room_tiles.items() for tile in tiles}
+
+    def get_all_room_names(self):
+        '''
+        Returns the names of all rooms, including the world bounds, as State.get_all_room_names does.
+        '''
+        return list(self._room_names)
+
+    def get_room_tiles(self, room_name):
+        '''
+        Returns the locations of the area tiles of a room.
+        '''
+        return [tile['location'] for tile in self._room_tiles.get(room_name, [])]
+
+    def get_doormat(self, room_name):
+        '''
+        Returns the doormat of a room, the location in front of its door.
+        '''
+        return self._doormats[room_name]
+
+    def get_room_of(self, location):
+        '''
+        Returns the name of the room the area tile at a location belongs to, or None outside of the rooms.
+        '''
+        return self._room_of.get(tuple(location))
+
+    def filter(self, state, agent_id):
+        '''
+        Returns the objects of a full state the agent decides on: the world, the agents, victims, obstacles, doors and
+        drop zone ghosts, which are all objects that are not static, plus the area tiles of the room the agent is in and
+        the static objects at the agent's location, such as water.
+        '''
+        static_ids = self.static_ids
+        filtered = {obj_id: obj for obj_id, obj in state.items() if obj_id not in static_ids}
+        location = filtered[agent_id]['location']
+        room_name = self._room_of.get(location)
+        if room_name is not None:
+            filtered.update((tile['obj_id'], tile) for tile in self._room_tiles[room_name])
+        filtered.update((obj['obj_id'], obj) for obj in self._at_location.get(location, []))
+        return filtered
+
+    def traversability_map(self, state=None):
+        '''
+        Returns MATRX's inverted traversability map of a (memorized) state, with 1 where the agent cannot move, for the
+        navigator. The static objects come from the topology, so the state only needs to hold the other objects.
+        '''
+        traverse_map = self._blocked.copy()
+        for obj_id, obj in state.items():
+            if obj_id != 'World' and not obj['is_traversable']:
+                traverse_map[obj['location']] = 1
+        # The navigator does not use the grid with the objects per location
+        return traverse_map, None
+
+
+class TopologyNavigator(Navigator):
+    '''
+    MATRX's A* navigator, planning with a given traversability map function such as WorldTopology.traversability_map.
+    MATRX only uses the given function for custom algorithms, and its reset_full forgets it, so both are handled here.
+    '''
+    def __init__(self, agent_id, action_set, traversability_map_func):
+        self._topology_args = (agent_id, action_set, traversability_map_func)
+        super().__init__(agent_id=agent_id, action_set=action_set, algorithm="topology_a_star",
+                         custom_algorithm_class=AStarPlanner, traversability_map_func=traversability_map_func)
+
+    def reset_full(self):
+        self.__init__(*self._topology_args)
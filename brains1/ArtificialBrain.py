@@ -637,8 +637,10 @@ class ArtificialBrain(ArtificialAgentBrain, ABC):
         params['max_objects']=1
         # find state locations with water
         water_locs = []
-        if state[{"name": "water"}]:
-            for water in state[{"name": "water"}]:
+        waters = state[{"name": "water"}]
+        if waters:
+            # The state returns a single object instead of a list when there is only one water tile in it
+            for water in [waters] if isinstance(waters, dict) else waters:
                 if water['location'] not in water_locs:
                     water_locs.append(water['location'])
         # remove doormat from water_locs
@@ -1,12 +1,20 @@
+import atexit
 from matrx.logger.logger import GridWorldLogger
 from matrx.grid_world import GridWorld
+from loggers.ActionSummary import ActionSummary, checkpoint_summary_next_to, write_summary_next_to
 
 class ActionLogger(GridWorldLogger):
     '''
     Logger for saving the actions of all agents during each tick of the task.
+    It also keeps the summary of the actions up to date, which is saved as output.csv on the last tick.
+    Every `checkpoint_every` ticks and at exit the running summary is saved as summary.csv, so it survives a crash.
+    Once the last tick is logged the summary is final, and the logger is no longer saved at exit.
     '''
-    def __init__(self, save_path="", file_name_prefix="", file_extension=".csv", delimiter=";"):
+    def __init__(self, save_path="", file_name_prefix="", file_extension=".csv", delimiter=";", checkpoint_every=100):
         super().__init__(save_path=save_path, file_name=file_name_prefix, file_extension=file_extension, delimiter=delimiter, log_strategy=1)
+        self.summary = ActionSummary()
+        self._checkpoint_every = checkpoint_every
+        atexit.register(self.checkpoint)
 
     def log(self, grid_world, agent_data):
         # Create a dictionary with the log data
@@ -18,5 +26,23 @@ class ActionLogger(GridWorldLogger):
         for agent_id, agent_body in grid_world.registered_agents.items():
             log_data[agent_id + '_action'] = agent_body.current_action
             log_data[agent_id + '_location'] = agent_body.location
-                
-        return log_data
\ No newline at end of file
+
+        self.summary.add_agents(log_data['score'], log_data['completeness'], grid_world.current_nr_ticks,
+                                grid_world.registered_agents.values())
+        if self._checkpoint_every and grid_world.current_nr_ticks % self._checkpoint_every == 0:
+            self.checkpoint()
+        return log_data
+
+    def _grid_world_log(self, grid_world, agent_data, last_tick=False, goal_status=None):
+        super()._grid_world_log(grid_world, agent_data, last_tick=last_tick, goal_status=goal_status)
+        if last_tick:
+            self.checkpoint()
+            write_summary_next_to(self.summary, self.file_name)
+            # The next missions of the process have loggers of their own
+            atexit.unregister(self.checkpoint)
+
+    def checkpoint(self):
+        '''
+        Saves the running summary of the actions as summary.csv, replacing the previous checkpoint.
+        '''
+        checkpoint_summary_next_to(self.summary, self.file_name)
@@ -0,0 +1,124 @@
+import csv
+import os
+
+# Human actions that are also counted as actions of the agent, since they are performed together
+TOGETHER_ACTIONS = ('RemoveObjectTogether', 'CarryObjectTogether', 'DropObjectTogether')
+
+OUTPUT_HEADER = ['completeness', 'score', 'no_ticks', 'agent_actions', 'human_actions']
+# The running summary has the columns of output.csv, followed by the number of actions per agent and of Together actions
+SUMMARY_HEADER = OUTPUT_HEADER + ['agent_action_count', 'human_action_count', 'together_actions']
+
+
+class ActionSummary:
+    '''
+    Summary of an action log as saved in output.csv: the final completeness, score and tick, and the number of unique
+    (action, location) pairs of the agent and the human.
+    The summary is updated one tick at a time and only keeps the unique pairs and the last values, so it can be fed
+    by the action loggers while the task runs or by streaming over an existing action log.
+    Like plot_logs, it also counts the actions of each agent and the Together actions, where an action that lasts
+    several ticks is counted once.
+    '''
+    def __init__(self):
+        self.agent_actions = set()
+        self.human_actions = set()
+        self.score = None
+        self.completeness = None
+        self.no_ticks = None
+        self.agent_action_count = 0
+        self.human_action_count = 0
+        self.together_actions = 0
+        self._prev_agent_action = ''
+        self._prev_human_action = ''
+
+    def add(self, score, completeness, tick_nr, agent_action, agent_location, human_action, human_location):
+        '''
+        Adds one tick of the action log, with the action and location of the agent and the human.
+        '''
+        if agent_action:
+            self.agent_actions.add((agent_action, agent_location))
+            if agent_action != self._prev_agent_action:
+                self.agent_action_count += 1
+        if human_action:
+            self.human_actions.add((human_action, human_location))
+            if human_action in TOGETHER_ACTIONS:
+                self.agent_actions.add((human_action, human_location))
+            if human_action != self._prev_human_action:
+                self.human_action_count += 1
+                if 'Together' in human_action:
+                    self.together_actions += 1
+        self._prev_agent_action = agent_action or ''
+        self._prev_human_action = human_action or ''
+        self.score = score
+        self.completeness = completeness
+        self.no_ticks = tick_nr
+
+    def add_agents(self, score, completeness, tick_nr, agent_bodies):
+        '''
+        Adds one tick of a running world, with the action and location of RescueBot and the human picked from the
+        bodies of all its agents by their type: the first artificial agent and the first human agent, as in the
+        action file. An agent that is missing counts as an agent without actions.
+        '''
+        agent_body = next((body for body in agent_bodies if not body.is_human_agent), None)
+        human_body = next((body for body in agent_bodies if body.is_human_agent), None)
+        self.add(score, completeness, tick_nr, *_action_and_location(agent_body), *_action_and_location(human_body))
+
+    def add_rows(self, rows):
+        '''
+        Adds the rows of an action log as returned by csv.reader, starting with the header.
+        '''
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            return
+        score = header.index('score')
+        completeness = header.index('completeness')
+        tick_nr = header.index('tick_nr')
+        for row in rows:
+            if row:
+                self.add(row[score], row[completeness], row[tick_nr], row[2], row[3], row[4], row[5])
+
+    def write(self, path):
+        '''
+        Saves the summary as the output.csv file of a run.
+        '''
+        with open(path, mode='w') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csv_writer.writerow(OUTPUT_HEADER)
+            csv_writer.writerow([self.completeness, self.score, self.no_ticks, len(self.agent_actions),
+                                 len(self.human_actions)])
+
+    def checkpoint(self, path):
+        '''
+        Saves the running summary, including the action counts, to a temporary file that then replaces the previous
+        checkpoint, so the file is never left half written when the task stops abnormally.
+        '''
+        temp_path = path + '.tmp'
+        with open(temp_path, mode='w') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csv_writer.writerow(SUMMARY_HEADER)
+            csv_writer.writerow([self.completeness, self.score, self.no_ticks, len(self.agent_actions),
+                                 len(self.human_actions), self.agent_action_count, self.human_action_count,
+                                 self.together_actions])
+        os.replace(temp_path, path)
+
+
+def _action_and_location(agent_body):
+    if agent_body is None:
+        return None, None
+    return agent_body.current_action, tuple(agent_body.location)
+
+
+def write_summary_next_to(summary, log_file_name):
+    '''
+    Saves the summary of an action logger as output.csv in the folder of its log file.
+    '''
+    if summary.no_ticks is not None:
+        summary.write(os.path.join(os.path.dirname(log_file_name), 'output.csv'))
+
+
+def checkpoint_summary_next_to(summary, log_file_name):
+    '''
+    Saves the running summary of an action logger as summary.csv in the folder of its log file.
+    '''
+    if summary.no_ticks is not None:
+        summary.checkpoint(os.path.join(os.path.dirname(log_file_name), 'summary.csv'))
@@ -0,0 +1,105 @@
+import atexit
+import sys
+
+import numpy as np
+from matrx.logger.logger import GridWorldLogger
+from loggers.ActionSummary import ActionSummary, checkpoint_summary_next_to, write_summary_next_to
+# The reading of the logs lives in its own module without MATRX
+from loggers.ColumnarLogReader import COLUMNAR_EXTENSION, _row_dtype, export_csv
+
+
+class ColumnarActionLogger(GridWorldLogger):
+    '''
+    Logger for saving the actions of all agents during each tick of the task, like the ActionLogger, but in typed columns.
+    Ticks are stored as int32, locations as int16 and action names as int16 codes into a dictionary of the names seen so far.
+    Rows are collected in a preallocated chunk and appended to the file once the chunk is full, on the last tick and at exit,
+    unless the last tick was already logged.
+    The file starts with the agent ids, followed per chunk by the action names that are new in that chunk and the rows.
+    '''
+    def __init__(self, save_path="", file_name_prefix="", file_extension=COLUMNAR_EXTENSION, delimiter=";", chunk_size=1024, checkpoint_every=100):
+        super().__init__(save_path=save_path, file_name=file_name_prefix, file_extension=file_extension, delimiter=delimiter, log_strategy=1)
+        self._chunk_size = chunk_size
+        self._world_nr = 1
+        self._agent_ids = None
+        self._rows = None
+        self._nr_rows = 0
+        # Code 0 is reserved for ticks without an action
+        self._action_codes = {'': 0}
+        self._new_action_names = ['']
+        self._header_written = False
+        self.summary = ActionSummary()
+        self._checkpoint_every = checkpoint_every
+        atexit.register(self.flush)
+        atexit.register(self.checkpoint)
+
+    def _set_world_nr(self, world_nr):
+        super()._set_world_nr(world_nr)
+        self._world_nr = world_nr
+
+    def log(self, grid_world, agent_data):
+        if self._agent_ids is None:
+            self._agent_ids = list(grid_world.registered_agents.keys())
+            self._rows = np.zeros(self._chunk_size, dtype=_row_dtype(self._agent_ids))
+        # We will log score and completeness of the task
+        row = [grid_world.current_nr_ticks, self._world_nr, grid_world.simulation_goal.score(grid_world),
+               grid_world.simulation_goal.progress(grid_world)]
+        # For both human and agent, log their action and location per tick
+        for agent_id in self._agent_ids:
+            agent_body = grid_world.registered_agents[agent_id]
+            row.append(self._action_code(agent_body.current_action))
+            row.extend(agent_body.location)
+        self._rows[self._nr_rows] = tuple(row)
+        self.summary.add_agents(row[2], row[3], row[0], grid_world.registered_agents.values())
+        if self._checkpoint_every and row[0] % self._checkpoint_every == 0:
+            self.checkpoint()
+        self._nr_rows += 1
+        if self._nr_rows == self._chunk_size:
+            self.flush()
+        # Nothing is returned, so the csv file of the base logger is never written
+        return {}
+
+    def _grid_world_log(self, grid_world, agent_data, last_tick=False, goal_status=None):
+        super()._grid_world_log(grid_world, agent_data, last_tick=last_tick, goal_status=goal_status)
+        if last_tick:
+            self.flush()
+            self.checkpoint()
+            write_summary_next_to(self.summary, self.file_name)
+            # The next missions of the process have loggers of their own
+            atexit.unregister(self.flush)
+            atexit.unregister(self.checkpoint)
+
+    def checkpoint(self):
+        '''
+        Saves the running summary of the actions as summary.csv, so it survives when the task stops abnormally.
+        '''
+        checkpoint_summary_next_to(self.summary, self.file_name)
+
+    def _action_code(self, action_name):
+        action_name = action_name or ''
+        code = self._action_codes.get(action_name)
+        if code is None:
+            code = len(self._action_codes)
+            self._action_codes[action_name] = code
+            self._new_action_names.append(action_name)
+        return code
+
+    def flush(self):
+        '''
+        Appends the collected rows and the action names that are new since the previous chunk to the log file.
+        '''
+        if self._nr_rows == 0:
+            return
+        with open(self.file_name, mode='ab') as log_file:
+            if not self._header_written:
+                np.save(log_file, np.array(self._agent_ids, dtype=str))
+                self._header_written = True
+            np.save(log_file, np.array(self._new_action_names, dtype=str))
+            np.save(log_file, self._rows[:self._nr_rows])
+        self._new_action_names = []
+        self._nr_rows = 0
+
+
+if __name__ == "__main__":
+    # Usage: python -m loggers.ColumnarActionLogger <columnar action log> [<columnar action log> ...]
+    for log_path in sys.argv[1:]:
+        print("Exported", export_csv(log_path))
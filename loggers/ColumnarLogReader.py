@@ -0,0 +1,81 @@
+import csv
+import os
+
+import numpy as np
+
+'''
+This file reads the columnar action logs written by the ColumnarActionLogger. It does not depend on MATRX, so analyzing
+the logs does not import it.
+'''
+
+# Extension of the columnar action logs, the file is a stream of numpy arrays written one after the other
+COLUMNAR_EXTENSION = ".npys"
+
+
+def _row_dtype(agent_ids):
+    fields = [('tick_nr', np.int32), ('world_nr', np.int16), ('score', np.int32), ('completeness', np.float64)]
+    for agent_id in agent_ids:
+        fields += [(agent_id + '_action', np.int16), (agent_id + '_x', np.int16), (agent_id + '_y', np.int16)]
+    return np.dtype(fields)
+
+
+def _read_chunks(path):
+    '''
+    Returns the agent ids, the action names in the order of their codes and all rows of a columnar action log.
+    '''
+    action_names = []
+    chunks = []
+    with open(path, mode='rb') as log_file:
+        size = os.fstat(log_file.fileno()).st_size
+        agent_ids = [str(agent_id) for agent_id in np.load(log_file)]
+        while log_file.tell() < size:
+            action_names.extend(str(name) for name in np.load(log_file))
+            chunks.append(np.load(log_file))
+    rows = np.concatenate(chunks) if chunks else np.zeros(0, dtype=_row_dtype(agent_ids))
+    return agent_ids, action_names, rows
+
+
+def load_action_log(path):
+    '''
+    Reads a columnar action log into a dictionary of numpy columns, with the action codes decoded to their names.
+    The columns are those of the csv action log, with every location split into an x and a y column.
+    '''
+    agent_ids, action_names, rows = _read_chunks(path)
+    action_names = np.array(action_names, dtype=str)
+    columns = {'score': rows['score'], 'completeness': rows['completeness']}
+    for agent_id in agent_ids:
+        columns[agent_id + '_action'] = action_names[rows[agent_id + '_action']]
+        columns[agent_id + '_x'] = rows[agent_id + '_x']
+        columns[agent_id + '_y'] = rows[agent_id + '_y']
+    columns['world_nr'] = rows['world_nr']
+    columns['tick_nr'] = rows['tick_nr']
+    return columns
+
+
+def read_action_rows(path):
+    '''
+    Yields the header and then every row of a columnar action log as strings, exactly as csv.reader returns them for the
+    csv action log of the ActionLogger.
+    '''
+    agent_ids, action_names, rows = _read_chunks(path)
+    header = ['score', 'completeness']
+    for agent_id in agent_ids:
+        header += [agent_id + '_action', agent_id + '_location']
+    yield header + ['world_nr', 'tick_nr']
+    for row in rows.tolist():
+        tick_nr, world_nr, score, completeness = row[:4]
+        values = [str(score), str(completeness)]
+        for i in range(4, len(row), 3):
+            values += [action_names[row[i]], f"({row[i + 1]}, {row[i + 2]})"]
+        yield values + [str(world_nr), str(tick_nr)]
+
+
+def export_csv(path, csv_path=None):
+    '''
+    Converts a columnar action log to the semicolon separated format of the ActionLogger, next to the original by default.
+    '''
+    csv_path = csv_path or os.path.splitext(path)[0] + ".csv"
+    with open(csv_path, mode='w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        csv_writer.writerows(read_action_rows(path))
+    return csv_path
@@ -0,0 +1,168 @@
+import glob
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from loggers.ColumnarLogReader import COLUMNAR_EXTENSION, _read_chunks
+
+# Folder, inside the root folder of the discovered logs or the folder of a given log, where the parsed logs are cached
+CACHE_FOLDER = ".parsed"
+# Version of the parsed format, cached files of another version are parsed again
+CACHE_VERSION = 1
+
+
+def discover_action_logs(root="logs"):
+    '''
+    Returns the action logs of all runs under the given folder, preferring the columnar log when a run has both a
+    columnar log and a csv export of it.
+    '''
+    paths = glob.glob(os.path.join(root, '**', 'world_*', 'actions_*'), recursive=True)
+    columnar = {os.path.splitext(path)[0] for path in paths if path.endswith(COLUMNAR_EXTENSION)}
+    return sorted(path for path in paths if path.endswith(COLUMNAR_EXTENSION)
+                  or (path.endswith('.csv') and os.path.splitext(path)[0] not in columnar))
+
+
+def discover_trust_logs(root="trust_logs"):
+    '''
+    Returns the trust belief logs (Tick;Willingness;Competence) under the given folder.
+    '''
+    return sorted(glob.glob(os.path.join(root, '**', '*.csv'), recursive=True))
+
+
+def parse_action_log(path):
+    '''
+    Parses an action log into a dictionary of numpy columns: 'agent_ids', 'action_names', 'tick_nr', 'world_nr',
+    'score', 'completeness' and per agent '<id>_action' (codes into 'action_names'), '<id>_x' and '<id>_y'.
+    '''
+    if path.endswith(COLUMNAR_EXTENSION):
+        agent_ids, action_names, rows = _read_chunks(path)
+        table = {name: rows[name] for name in rows.dtype.names}
+        table['agent_ids'] = np.array(agent_ids, dtype=str)
+        table['action_names'] = np.array(action_names, dtype=str)
+        return table
+
+    df = pd.read_csv(path, delimiter=';', keep_default_na=False, dtype=str)
+    agent_ids = [column[:-len('_action')] for column in df.columns if column.endswith('_action')]
+    # Encode the actions of all agents with one dictionary, so the codes can be compared between agents
+    actions = pd.Categorical(np.concatenate([df[agent_id + '_action'].to_numpy() for agent_id in agent_ids]))
+    action_codes = actions.codes.astype(np.int16).reshape(len(agent_ids), len(df))
+    table = {'agent_ids': np.array(agent_ids, dtype=str),
+             'action_names': np.asarray(actions.categories, dtype=str),
+             'tick_nr': df['tick_nr'].to_numpy(dtype=np.int32),
+             'world_nr': df['world_nr'].to_numpy(dtype=np.int16),
+             'score': pd.to_numeric(df['score']).to_numpy(),
+             'completeness': pd.to_numeric(df['completeness']).to_numpy(dtype=np.float64)}
+    for i, agent_id in enumerate(agent_ids):
+        table[agent_id + '_action'] = action_codes[i]
+        # Locations repeat a lot, so only the unique ones are parsed
+        locations = pd.Categorical(df[agent_id + '_location'])
+        xy = np.array([[int(value) for value in location.strip('()[]').split(',')]
+                       for location in locations.categories], dtype=np.int16).reshape(-1, 2)
+        table[agent_id + '_x'] = xy[locations.codes, 0]
+        table[agent_id + '_y'] = xy[locations.codes, 1]
+    return table
+
+
+def parse_trust_log(path):
+    '''
+    Parses a trust belief log into the numpy columns 'tick', 'willingness' and 'competence'.
+    '''
+    df = pd.read_csv(path, delimiter=';')
+    return {'tick': df['Tick'].to_numpy(dtype=np.int64),
+            'willingness': df['Willingness'].to_numpy(dtype=np.float64),
+            'competence': df['Competence'].to_numpy(dtype=np.float64)}
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _cache_path(path, cache_dir):
+    # Without a cache folder, the parse is cached next to the log
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_FOLDER)
+    name = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:20]
+    return os.path.join(cache_dir, name + '.npz')
+
+
+def _load_cache(path, cache_dir):
+    '''
+    Returns the cached parse of the file, or None when there is none or the file changed since it was cached.
+    '''
+    cache_path = _cache_path(path, cache_dir)
+    if not os.path.exists(cache_path):
+        return None
+    with np.load(cache_path) as cached:
+        if str(cached['_path']) != os.path.abspath(path) or not np.array_equal(cached['_key'], _cache_key(path)):
+            return None
+        return {name: cached[name] for name in cached.files if not name.startswith('_')}
+
+
+def _parse_and_cache(path, parser, cache_dir):
+    key = _cache_key(path)
+    table = parser(path)
+    cache_path = _cache_path(path, cache_dir)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Write to a temporary file first, so other processes never read a half written cache
+    temp_path = cache_path[:-len('.npz')] + f'.{os.getpid()}.tmp.npz'
+    np.savez(temp_path, _path=os.path.abspath(path), _key=key, **table)
+    os.replace(temp_path, cache_path)
+    return table
+
+
+def ingest(paths, parser, cache_dir, processes=None):
+    '''
+    Returns the parsed tables of the given files as a dictionary by path.
+    Files that were parsed before and did not change since are read from the cache, the others are parsed in
+    parallel by a pool of `processes` worker processes (all cores by default) and cached for the next time, in
+    `cache_dir` or, when it is None, in a folder next to every file.
+    '''
+    tables = {}
+    to_parse = []
+    for path in paths:
+        table = _load_cache(path, cache_dir)
+        if table is None:
+            to_parse.append(path)
+        else:
+            tables[path] = table
+    if len(to_parse) == 1 or processes == 1:
+        for path in to_parse:
+            tables[path] = _parse_and_cache(path, parser, cache_dir)
+    elif to_parse:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            parsed = pool.map(_parse_and_cache, to_parse, [parser] * len(to_parse), [cache_dir] * len(to_parse))
+            tables.update(zip(to_parse, parsed))
+    return {path: tables[path] for path in paths}
+
+
+def load_action_logs(paths=None, root="logs", cache_dir=None, processes=None):
+    '''
+    Returns the parsed action logs by path, of the given files or of all runs found under `root`. By default the logs
+    found under `root` are cached in a folder of `root`, and the given files next to themselves.
+    '''
+    if paths is None:
+        return ingest(discover_action_logs(root), parse_action_log, cache_dir or os.path.join(root, CACHE_FOLDER),
+                      processes)
+    return ingest(list(paths), parse_action_log, cache_dir, processes)
+
+
+def load_trust_logs(paths=None, root="trust_logs", cache_dir=None, processes=None):
+    '''
+    Returns the parsed trust belief logs by path, of the given files or of all files found under `root`. By default
+    the logs found under `root` are cached in a folder of `root`, and the given files next to themselves.
+    '''
+    if paths is None:
+        return ingest(discover_trust_logs(root), parse_trust_log, cache_dir or os.path.join(root, CACHE_FOLDER),
+                      processes)
+    return ingest(list(paths), parse_trust_log, cache_dir, processes)
+
+
+if __name__ == "__main__":
+    # Parses and caches all logs, so later analysis passes only read the cache
+    action_logs = load_action_logs()
+    trust_logs = load_trust_logs() if os.path.isdir("trust_logs") else {}
+    print(f"Ingested {len(action_logs)} action logs and {len(trust_logs)} trust logs")
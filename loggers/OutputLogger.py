@@ -1,40 +1,41 @@
-import os, requests
-import sys
+import os
 import csv
 import glob
-import pathlib
+import shutil
+from loggers.ActionSummary import ActionSummary
+from loggers.ColumnarLogReader import COLUMNAR_EXTENSION, read_action_rows
 
-def output_logger(fld):
-    recent_dir = max(glob.glob(os.path.join(fld, '*/')), key=os.path.getmtime)
-    recent_dir = max(glob.glob(os.path.join(recent_dir, '*/')), key=os.path.getmtime)
+def read_action_file(action_file):
+    '''
+    Yields the header and rows of an action log as strings, for both the csv and the columnar action logs.
+    '''
+    if action_file.endswith(COLUMNAR_EXTENSION):
+        yield from read_action_rows(action_file)
+    else:
+        with open(action_file) as csvfile:
+            yield from csv.reader(csvfile, delimiter=';', quotechar="'")
+
+def output_logger(fld, baseline=None, logs_folder=None):
+    # The experiments are in the logs folder, by default the most recently changed folder in fld
+    if logs_folder is None:
+        logs_folder = max(glob.glob(os.path.join(fld, '*/')), key=os.path.getmtime)
+    recent_dir = max(glob.glob(os.path.join(logs_folder, '*/')), key=os.path.getmtime)
     action_files = glob.glob(os.path.join(recent_dir, 'world_1/action*'))
     if action_files:
         action_file = action_files[0]
     else:
         print(f"No action files found in {os.path.join(recent_dir, 'world_1')}")
         return
-    action_header = []
-    action_contents=[]
     trustfile_header = []
     trustfile_contents = []
-    # Calculate the unique human and agent actions
-    unique_agent_actions = []
-    unique_human_actions = []
-    with open(action_file) as csvfile:
-        reader = csv.reader(csvfile, delimiter=';', quotechar="'")
-        for row in reader:
-            if action_header==[]:
-                action_header=row
-                continue
-            if row[2:4] not in unique_agent_actions and row[2]!="":
-                unique_agent_actions.append(row[2:4])
-            if row[4:6] not in unique_human_actions and row[4]!="":
-                unique_human_actions.append(row[4:6])
-            if row[4] == 'RemoveObjectTogether' or row[4] == 'CarryObjectTogether' or row[4] == 'DropObjectTogether':
-                if row[4:6] not in unique_agent_actions:
-                    unique_agent_actions.append(row[4:6])
-            res = {action_header[i]: row[i] for i in range(len(action_header))}
-            action_contents.append(res)
+    # The action logger saves the summary of the actions on the last tick, otherwise calculate it from the action file
+    output_file = os.path.join(recent_dir, 'world_1/output.csv')
+    if not os.path.exists(output_file):
+        # Calculate the unique human and agent actions, score, completeness and number of ticks in a single pass
+        summary = ActionSummary()
+        summary.add_rows(read_action_file(action_file))
+        print("Saving output...")
+        summary.write(output_file)
 
     with open(fld+'/beliefs/currentTrustBelief.csv') as csvfile:
         reader = csv.reader(csvfile, delimiter=';', quotechar="'")
@@ -49,16 +50,14 @@ def output_logger(fld):
     name = trustfile_contents[-1]['name']
     competence = trustfile_contents[-1]['competence']
     willingness = trustfile_contents[-1]['willingness']
-    # Retrieve the number of ticks to finish the task, score, and completeness
-    no_ticks = action_contents[-1]['tick_nr']
-    score = action_contents[-1]['score']
-    completeness = action_contents[-1]['completeness']
-    # Save the output as a csv file
-    print("Saving output...")
-    with open(os.path.join(recent_dir,'world_1/output.csv'),mode='w') as csv_file:
+    # Keep the trust of this run and its per tick timeline next to its action logs, for the trust analytics
+    with open(os.path.join(recent_dir, 'world_1/trust.csv'), mode='w') as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-        csv_writer.writerow(['completeness','score','no_ticks','agent_actions','human_actions'])
-        csv_writer.writerow([completeness,score,no_ticks,len(unique_agent_actions),len(unique_human_actions)])
+        csv_writer.writerow(['name', 'competence', 'willingness', 'baseline'])
+        csv_writer.writerow([name, competence, willingness, baseline or 'NONE'])
+    trust_timeline = os.path.join(fld, 'trust_logs/trust_beliefs_per_tick.csv')
+    if os.path.exists(trust_timeline):
+        shutil.copyfile(trust_timeline, os.path.join(recent_dir, 'world_1/trust_beliefs_per_tick.csv'))
     with open(fld + '/beliefs/allTrustBeliefs.csv', mode='a+') as csv_file:
         csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
         csv_writer.writerow([name,competence,willingness])
\ No newline at end of file
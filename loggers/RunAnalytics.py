@@ -0,0 +1,136 @@
+import argparse
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from loggers.LogIngestion import load_action_logs
+
+# Above these numbers of runs the legend and the labels of the bar chart are left out, since they would not be readable
+MAX_LEGEND_RUNS = 10
+MAX_LABELED_BARS = 30
+# Maximum number of points drawn per run, longer series are thinned out
+MAX_PLOT_POINTS = 1000
+
+# Cumulative series of one run, one value per tick in `ticks`
+RunResult = namedtuple('RunResult', ['label', 'ticks', 'rescuebot_cumsum', 'human_cumsum', 'collab_cumsum'])
+
+
+def _action_codes(table, human_name):
+    '''
+    Returns the ticks, the action codes of RescueBot and the human, and the stripped names of the codes of a parsed log.
+    Stripping happens once per unique name instead of once per row.
+    '''
+    names, remap = np.unique(np.char.strip(table['action_names']), return_inverse=True)
+    return table['tick_nr'], remap[table['rescuebot_action']], remap[table[human_name + '_action']], names
+
+
+def _change_flags(codes, empty_code):
+    '''
+    Flags the ticks where a new action starts: the action is not empty and differs from the previous tick.
+    '''
+    flags = codes != empty_code
+    flags[1:] &= codes[1:] != codes[:-1]
+    return flags
+
+
+def analyze_table(table, human_name, label):
+    '''
+    Computes the cumulative number of actions of RescueBot and the human, and of collaborative actions, per tick.
+    The counts are the same as those of plot_logs.plot_1_run_results, but computed on integer codes.
+    '''
+    ticks, rescuebot_codes, human_codes, names = _action_codes(table, human_name)
+    order = np.argsort(ticks, kind='stable')
+    ticks, rescuebot_codes, human_codes = ticks[order], rescuebot_codes[order], human_codes[order]
+    empty = np.searchsorted(names, '')
+    empty_code = empty if empty < len(names) and names[empty] == '' else -1
+    together = np.char.find(names, 'Together') >= 0
+
+    rescuebot_flags = _change_flags(rescuebot_codes, empty_code)
+    human_flags = _change_flags(human_codes, empty_code)
+    collab_flags = human_flags & together[human_codes]
+
+    # Group the flags by tick and accumulate them
+    unique_ticks, tick_index = np.unique(ticks, return_inverse=True)
+    def cumulative(flags):
+        return np.cumsum(np.bincount(tick_index, weights=flags, minlength=len(unique_ticks))).astype(np.int64)
+    return RunResult(label, unique_ticks, cumulative(rescuebot_flags), cumulative(human_flags),
+                     cumulative(collab_flags))
+
+
+def analyze_run(path, human_name, label=None):
+    '''
+    Analyzes a single csv or columnar action log, see analyze_table.
+    '''
+    return analyze_runs([(path, label)], human_name)[0]
+
+
+def analyze_runs(runs, human_name, processes=None):
+    '''
+    Analyzes a list of (path, label) pairs and returns their RunResults in the same order.
+    The logs are parsed in parallel and cached by the log ingestion, so runs analyzed before are not parsed again.
+    '''
+    tables = load_action_logs([path for path, label in runs], processes=processes)
+    return [analyze_table(tables[path], human_name, label or os.path.basename(path)) for path, label in runs]
+
+
+def _save_figure(fig, path):
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def _thin_out(ticks, values):
+    step = max(1, len(ticks) // MAX_PLOT_POINTS)
+    if step == 1:
+        return ticks, values
+    # Keep the last point, so the series still ends at the final count
+    index = np.append(np.arange(0, len(ticks) - 1, step), len(ticks) - 1)
+    return ticks[index], values[index]
+
+
+def plot_runs(results, folder, human_name='human'):
+    '''
+    Saves the comparison of the runs as images in the given folder, without opening any window:
+    the cumulative human and agent actions of all runs, and a bar chart of the final collaborative actions.
+    '''
+    # Imported here, so analyzing runs does not load matplotlib
+    from matplotlib.figure import Figure
+    os.makedirs(folder, exist_ok=True)
+    for series, who, file_name in [('human_cumsum', human_name.capitalize(), 'human_actions.png'),
+                                   ('rescuebot_cumsum', 'Agent', 'agent_actions.png')]:
+        fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        for result in results:
+            ax.plot(*_thin_out(result.ticks, getattr(result, series)), label=result.label)
+        ax.set_xlabel('Tick Number')
+        ax.set_ylabel(f'Cumulative {who} Actions')
+        ax.set_title(f'{who} Actions Over Time (All Runs)')
+        if len(results) <= MAX_LEGEND_RUNS:
+            ax.legend(loc='upper left')
+        ax.grid(True)
+        _save_figure(fig, os.path.join(folder, file_name))
+
+    fig = Figure(figsize=(8, 6))
+    ax = fig.add_subplot()
+    ax.bar(np.arange(len(results)),
+           [result.collab_cumsum[-1] if len(result.collab_cumsum) else 0 for result in results], color='green')
+    if len(results) <= MAX_LABELED_BARS:
+        ax.set_xticks(np.arange(len(results)))
+        ax.set_xticklabels([result.label for result in results], rotation=90 if len(results) > 6 else 0)
+    ax.set_xlabel('Mission')
+    ax.set_ylabel('Final Cumulative Collaborative Actions')
+    ax.set_title('Comparison of Collaborative Actions Across Missions and Baselines')
+    _save_figure(fig, os.path.join(folder, 'collaborative_actions.png'))
+
+
+if __name__ == "__main__":
+    # Usage: python -m loggers.RunAnalytics --human <name> --out <folder> <action log> [<action log> ...]
+    parser = argparse.ArgumentParser(description="Compare the actions of many runs and save the figures.")
+    parser.add_argument('action_logs', nargs='+', help="csv or columnar action logs, the file name is used as label")
+    parser.add_argument('--human', required=True, help="name of the human agent in the action logs")
+    parser.add_argument('--out', default='figures', help="folder to save the figures in")
+    parser.add_argument('--processes', type=int, default=None, help="number of processes parsing new logs")
+    args = parser.parse_args()
+    run_results = analyze_runs([(path, None) for path in args.action_logs], args.human, args.processes)
+    plot_runs(run_results, args.out, args.human)
+    print(f"Saved the figures of {len(run_results)} runs in {args.out}")
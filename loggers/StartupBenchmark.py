@@ -0,0 +1,101 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+'''
+This file measures how long the entry points of the repository take to start, for example before many batch workers
+can build their worlds. Every entry point is started in a fresh interpreter a number of times, and the median wall time
+is reported with the heavy modules it ended up importing. With --importtime the modules that took longest to import for
+one entry point are listed, from Python's -X importtime output.
+Run `python -m loggers.StartupBenchmark --help` from the root of the repository.
+'''
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Code run by every entry point, in a temporary working directory so nothing is written in the repository
+ENTRY_POINTS = {
+    'interpreter': "pass",
+    'main prompt': "import pathlib, threading\nfrom worlds1.RunConfig import load_config\nload_config([])",
+    'headless world': "from worlds1.WorldPool import WorldPool\n"
+                      "WorldPool(folder=os.getcwd()).get_world('official', 'normal', 'benchmark')",
+    'visualizer': "from SaR_gui import visualization_server",
+    'run analytics': "import loggers.RunAnalytics",
+    'plot logs': "import loggers.plot_logs",
+}
+# Modules worth knowing about when they are imported, since they are slow to import
+HEAVY_MODULES = ('matrx', 'flask', 'requests', 'numpy', 'pandas', 'matplotlib')
+# Number of slowest modules listed with --importtime
+TOP_MODULES = 15
+
+
+def _script(code):
+    # Reports the loaded heavy modules, the timing is taken around the whole process by the benchmark
+    return f"import os, sys\n{code}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n" \
+           f"sys.stdout.flush()\nos._exit(0)\n"
+
+
+def _run(code, extra_args=(), cwd=None):
+    env = dict(os.environ, PYTHONPATH=REPO_FOLDER + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *extra_args, '-c', _script(code)], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Entry point failed:\n{result.stderr}")
+    return elapsed, result
+
+
+def benchmark(entry_points, repeat=5):
+    '''
+    Returns the median startup time in seconds and the heavy modules imported, per entry point.
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as cwd:
+        for name in entry_points:
+            times, modules = [], ''
+            for _ in range(repeat):
+                elapsed, result = _run(ENTRY_POINTS[name], cwd=cwd)
+                times.append(elapsed)
+                modules = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+            results[name] = (statistics.median(times), modules)
+    return results
+
+
+def import_times(entry_point, top=TOP_MODULES):
+    '''
+    Returns the slowest `top` modules imported by an entry point, as (cumulative microseconds, module) pairs. The time
+    of a module includes the modules it imports, so the slowest ones show the chain of imports that makes startup slow.
+    '''
+    with tempfile.TemporaryDirectory() as cwd:
+        _, result = _run(ENTRY_POINTS[entry_point], extra_args=('-X', 'importtime'), cwd=cwd)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times.append((int(cumulative), module.strip()))
+    return sorted(times, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    # Usage: python -m loggers.StartupBenchmark [--repeat 5] [--importtime 'headless world'] [entry point ...]
+    parser = argparse.ArgumentParser(description="Measure the startup time of the entry points of the repository.")
+    parser.add_argument('entry_points', nargs='*', metavar='entry point',
+                        help=f"entry points to measure, any of {list(ENTRY_POINTS)}, by default all of them")
+    parser.add_argument('--repeat', type=int, default=5, help="number of fresh interpreters per entry point")
+    parser.add_argument('--importtime', default=None, choices=list(ENTRY_POINTS),
+                        help="list the slowest imports of this entry point")
+    args = parser.parse_args()
+    unknown = [name for name in args.entry_points if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"unknown entry points {unknown}, use any of {list(ENTRY_POINTS)}")
+
+    for name, (seconds, modules) in benchmark(args.entry_points or list(ENTRY_POINTS), args.repeat).items():
+        print(f"{name:<16} {seconds * 1000:8.0f} ms   {modules or '-'}")
+    if args.importtime is not None:
+        print(f"\nSlowest imports of '{args.importtime}':")
+        for cumulative, module in import_times(args.importtime):
+            print(f"{cumulative / 1000:8.0f} ms   {module}")
@@ -0,0 +1,208 @@
+import csv
+import functools
+import json
+import os
+import time
+
+import numpy as np
+
+
+class _NullSpan:
+    '''
+    Span handed out while profiling is disabled, entering and leaving it does nothing.
+    '''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    '''
+    Times the code inside a with-block and stores the result in the profiler on exit.
+    '''
+    __slots__ = ('_profiler', '_label', '_start')
+
+    def __init__(self, profiler, label):
+        self._profiler = profiler
+        self._label = label
+        self._start = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler._record(self._label, self._start, time.perf_counter_ns())
+        return False
+
+
+class TickProfiler:
+    '''
+    Records how long ticks, phases and helper functions of an agent take.
+    Samples are stored in a preallocated ring buffer, so a long session only keeps the most recent `capacity` samples.
+    While disabled every hook returns a shared no-op span, so the profiler can stay wired into the agent's hot path.
+    '''
+    def __init__(self, enabled=False, capacity=100000, save_path=None):
+        self.enabled = False
+        self.save_path = save_path
+        # The tick that is attached to every sample, updated by the agent at the start of a tick
+        self.tick = 0
+        self._capacity = capacity
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._durations = np.zeros(0, dtype=np.int64)
+        self._ticks = np.zeros(0, dtype=np.int32)
+        self._labels = np.zeros(0, dtype=np.int32)
+        # Labels are (category, name) pairs, stored once and referenced by index from the buffer
+        self._label_ids = {}
+        self._label_names = []
+        self._count = 0
+        self._origin = time.perf_counter_ns()
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        '''
+        Starts recording, the ring buffer is only allocated the first time the profiler is enabled.
+        '''
+        if len(self._starts) == 0:
+            self._starts = np.zeros(self._capacity, dtype=np.int64)
+            self._durations = np.zeros(self._capacity, dtype=np.int64)
+            self._ticks = np.zeros(self._capacity, dtype=np.int32)
+            self._labels = np.zeros(self._capacity, dtype=np.int32)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, category, name):
+        '''
+        Returns a context manager timing its with-block as a sample of the given category (tick, phase, helper, ...) and name.
+        '''
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, self._label(category, name))
+
+    def wrap(self, obj, method_name, category, name=None):
+        '''
+        Replaces a method of an object we do not own (e.g. the navigator) by a timed version of it.
+        Does nothing when profiling is disabled, so the original method keeps its full speed.
+        '''
+        if not self.enabled:
+            return
+        method = getattr(obj, method_name)
+        label = self._label(category, name or method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._record(label, start, time.perf_counter_ns())
+
+        setattr(obj, method_name, timed)
+
+    def _label(self, category, name):
+        key = (category, name)
+        label = self._label_ids.get(key)
+        if label is None:
+            label = len(self._label_names)
+            self._label_ids[key] = label
+            self._label_names.append(key)
+        return label
+
+    def _record(self, label, start, end):
+        i = self._count % self._capacity
+        self._starts[i] = start - self._origin
+        self._durations[i] = end - start
+        self._ticks[i] = self.tick
+        self._labels[i] = label
+        self._count += 1
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def samples(self):
+        '''
+        Returns the samples still in the ring buffer in chronological order, as a tuple of
+        (ticks, categories, names, start times in microseconds, durations in microseconds).
+        '''
+        n = len(self)
+        order = (np.arange(n) + self._count - n) % self._capacity
+        labels = self._labels[order]
+        categories = [self._label_names[label][0] for label in labels]
+        names = [self._label_names[label][1] for label in labels]
+        return self._ticks[order], categories, names, self._starts[order] / 1000, self._durations[order] / 1000
+
+    def summary(self):
+        '''
+        Returns the number of calls, total, mean and maximum duration in milliseconds per (category, name) pair.
+        '''
+        n = len(self)
+        labels = self._labels[:n]
+        durations = self._durations[:n] / 1e6
+        result = {}
+        for label, key in enumerate(self._label_names):
+            selected = durations[labels == label]
+            if len(selected) > 0:
+                result[key] = {'calls': len(selected), 'total_ms': selected.sum(), 'mean_ms': selected.mean(),
+                               'max_ms': selected.max()}
+        return result
+
+    def export_csv(self, path):
+        '''
+        Writes one row per sample to a semicolon separated file, like the action logs.
+        '''
+        ticks, categories, names, starts, durations = self.samples()
+        with open(path, mode='w', newline='') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csv_writer.writerow(['tick_nr', 'category', 'name', 'start_us', 'duration_us'])
+            for row in zip(ticks, categories, names, starts, durations):
+                csv_writer.writerow(row)
+
+    def export_chrome_trace(self, path):
+        '''
+        Writes the samples as complete events in the Chrome trace format, to be opened in chrome://tracing or Perfetto.
+        '''
+        ticks, categories, names, starts, durations = self.samples()
+        events = [{'name': name, 'cat': category, 'ph': 'X', 'ts': float(start), 'dur': float(duration),
+                   'pid': 0, 'tid': 0, 'args': {'tick': int(tick)}}
+                  for tick, category, name, start, duration in zip(ticks, categories, names, starts, durations)]
+        with open(path, mode='w') as json_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, json_file)
+
+    def export(self, folder=None):
+        '''
+        Saves both the csv and the Chrome trace file, by default next to the action logs of the run.
+        '''
+        folder = folder or self.save_path or 'logs'
+        os.makedirs(folder, exist_ok=True)
+        self.export_csv(os.path.join(folder, 'profile.csv'))
+        self.export_chrome_trace(os.path.join(folder, 'profile_trace.json'))
+
+
+def profiled(category, name=None):
+    '''
+    Decorator for agent methods, timing every call on the `_profiler` of the instance while it is enabled.
+    '''
+    def decorator(func):
+        label_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler = self._profiler
+            if not profiler.enabled:
+                return func(self, *args, **kwargs)
+            with profiler.span(category, label_name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
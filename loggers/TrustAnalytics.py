@@ -0,0 +1,142 @@
+import argparse
+import csv
+import glob
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from loggers.LogIngestion import CACHE_FOLDER, load_trust_logs
+
+# Name of the run folders created by the WorldBuilder, e.g. exp_normal_at_time_16h-19m-48s_date_19d-10m-2026y
+RUN_FOLDER_PATTERN = re.compile(r"exp_(?P<condition>.+)_at_time_(?P<time>.+_date_.+)$")
+RUN_FOLDER_TIME_FORMAT = "%Hh-%Mm-%Ss_date_%dd-%mm-%Yy"
+# A trust belief has converged once it stays within this distance of its final value
+DEFAULT_TOLERANCE = 0.05
+# Number of per tick timelines that are held in memory at the same time
+BATCH_SIZE = 256
+RUN_COLUMNS = ['run', 'condition', 'started', 'completeness', 'score', 'no_ticks', 'agent_actions', 'human_actions',
+               'name', 'baseline', 'final_competence', 'final_willingness', 'competence_converged_tick',
+               'willingness_converged_tick']
+
+
+def _read_single_row(path):
+    '''
+    Reads a small semicolon separated file with a header and one row of values into a dictionary.
+    '''
+    with open(path, newline='') as csv_file:
+        rows = [row for row in csv.reader(csv_file, delimiter=';', quotechar='"') if row]
+    return dict(zip(rows[0], rows[1])) if len(rows) > 1 else {}
+
+
+def _run_info(world_folder, root):
+    run_path = os.path.dirname(os.path.normpath(world_folder))
+    run_folder = os.path.basename(run_path)
+    match = RUN_FOLDER_PATTERN.match(run_folder)
+    condition, started = None, None
+    if match:
+        condition = match.group('condition')
+        try:
+            started = datetime.strptime(match.group('time'), RUN_FOLDER_TIME_FORMAT)
+        except ValueError:
+            pass
+    # Runs in the folders of sessions are named by their path from the root, so runs started at the same time differ
+    info = {'run': os.path.relpath(run_path, root), 'condition': condition, 'started': started}
+    output = _read_single_row(os.path.join(world_folder, 'output.csv'))
+    for column in ['completeness', 'score', 'no_ticks', 'agent_actions', 'human_actions']:
+        info[column] = float(output[column]) if output.get(column) not in (None, '') else np.nan
+    trust_file = os.path.join(world_folder, 'trust.csv')
+    trust = _read_single_row(trust_file) if os.path.exists(trust_file) else {}
+    info['name'] = trust.get('name')
+    info['baseline'] = trust.get('baseline', 'UNKNOWN')
+    return info
+
+
+def convergence_tick(ticks, values, tolerance=DEFAULT_TOLERANCE):
+    '''
+    Returns the first tick from which the values stay within `tolerance` of their final value, NaN for no values.
+    '''
+    if len(values) == 0:
+        return np.nan
+    outside = np.flatnonzero(np.abs(values - values[-1]) > tolerance)
+    # The final value is never outside, so the tick after the last one outside always exists
+    return ticks[0] if len(outside) == 0 else ticks[outside[-1] + 1]
+
+
+def summarize_runs(root="logs", tolerance=DEFAULT_TOLERANCE, processes=None):
+    '''
+    Returns one row per official run anywhere under `root`, such as the folders of the sessions, joining its output.csv, its final trust and its per tick trust
+    timeline, which is reduced to the final values and the convergence tick of competence and willingness.
+    Timelines are loaded through the cached log ingestion in batches, so only a batch is in memory at a time.
+    '''
+    world_folders = sorted(os.path.dirname(path)
+                           for path in glob.glob(os.path.join(root, '**', 'world_1', 'output.csv'), recursive=True))
+    rows = [_run_info(folder, root) for folder in world_folders]
+    timelines = [os.path.join(folder, 'trust_beliefs_per_tick.csv') for folder in world_folders]
+    with_timeline = [i for i, path in enumerate(timelines) if os.path.exists(path)]
+    for row in rows:
+        row.update({'final_competence': np.nan, 'final_willingness': np.nan, 'competence_converged_tick': np.nan,
+                    'willingness_converged_tick': np.nan})
+    for start in range(0, len(with_timeline), BATCH_SIZE):
+        batch = with_timeline[start:start + BATCH_SIZE]
+        tables = load_trust_logs([timelines[i] for i in batch], cache_dir=os.path.join(root, CACHE_FOLDER),
+                                 processes=processes)
+        for i in batch:
+            table = tables[timelines[i]]
+            if len(table['tick']) == 0:
+                continue
+            rows[i]['final_competence'] = table['competence'][-1]
+            rows[i]['final_willingness'] = table['willingness'][-1]
+            rows[i]['competence_converged_tick'] = convergence_tick(table['tick'], table['competence'], tolerance)
+            rows[i]['willingness_converged_tick'] = convergence_tick(table['tick'], table['willingness'], tolerance)
+    return pd.DataFrame(rows, columns=RUN_COLUMNS)
+
+
+def trust_trajectories(all_trust_beliefs="beliefs/allTrustBeliefs.csv"):
+    '''
+    Returns the trust of every human after each of their sessions from the allTrustBeliefs history, with the session
+    number and the change since their previous session.
+    '''
+    history = pd.read_csv(all_trust_beliefs, delimiter=';', usecols=[0, 1, 2], names=['name', 'competence', 'willingness'],
+                          header=0, dtype={'name': str})
+    history = history[history['name'].notna() & (history['name'] != '')].copy()
+    history[['competence', 'willingness']] = history[['competence', 'willingness']].apply(pd.to_numeric, errors='coerce')
+    by_human = history.groupby('name', sort=False)
+    history['session'] = by_human.cumcount() + 1
+    history['competence_change'] = by_human['competence'].diff()
+    history['willingness_change'] = by_human['willingness'].diff()
+    return history.reset_index(drop=True)
+
+
+def compare_baselines(runs):
+    '''
+    Compares the trust baselines per condition: the number of runs and the mean outcome and trust of their runs.
+    '''
+    return runs.groupby(['baseline', 'condition'], dropna=False).agg(
+        runs=('run', 'size'), completeness=('completeness', 'mean'), score=('score', 'mean'),
+        no_ticks=('no_ticks', 'mean'), final_competence=('final_competence', 'mean'),
+        final_willingness=('final_willingness', 'mean'),
+        competence_converged_tick=('competence_converged_tick', 'mean'),
+        willingness_converged_tick=('willingness_converged_tick', 'mean')).reset_index()
+
+
+if __name__ == "__main__":
+    # Usage: python -m loggers.TrustAnalytics [--logs logs] [--beliefs beliefs/allTrustBeliefs.csv] [--out trust_analytics]
+    parser = argparse.ArgumentParser(description="Analyze the trust of RescueBot in the humans over all sessions.")
+    parser.add_argument('--logs', default='logs', help="folder with the logs of the official runs")
+    parser.add_argument('--beliefs', default='beliefs/allTrustBeliefs.csv', help="history of the trust beliefs")
+    parser.add_argument('--out', default='trust_analytics', help="folder to save the results in")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="tolerance for convergence")
+    parser.add_argument('--processes', type=int, default=None, help="number of processes parsing new timelines")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    run_summary = summarize_runs(args.logs, args.tolerance, args.processes)
+    run_summary.to_csv(os.path.join(args.out, 'runs.csv'), sep=';', index=False)
+    trust_trajectories(args.beliefs).to_csv(os.path.join(args.out, 'trajectories.csv'), sep=';', index=False)
+    baselines = compare_baselines(run_summary)
+    baselines.to_csv(os.path.join(args.out, 'baselines.csv'), sep=';', index=False)
+    print(f"Analyzed {len(run_summary)} runs, results saved in {args.out}")
+    print(baselines.to_string(index=False))
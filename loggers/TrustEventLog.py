@@ -0,0 +1,136 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+from collections import namedtuple
+
+# Levels of trust events, the numbers match the ones of Python's logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+LEVEL_NAMES = {number: name for name, number in LEVELS.items()}
+
+TrustEvent = namedtuple('TrustEvent', ['tick', 'level', 'rule', 'belief', 'delta', 'value', 'message'])
+
+HEADER = ['tick', 'level', 'rule', 'belief', 'delta', 'value', 'message']
+
+
+class TrustEventLog:
+    '''
+    Leveled log of the trust belief updates of RescueBot, replacing the per-tick prints.
+    Events below the configured level are dropped with a single comparison. Kept events stay in memory so they can be
+    queried after the run, and are handed in batches to a background thread that appends them to a csv file.
+    '''
+    def __init__(self, level=WARNING, save_path=None, flush_every=256):
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        self.save_path = save_path
+        self._flush_every = flush_every
+        self._events = []
+        self._pending = []
+        self._queue = None
+        self._writer = None
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def log(self, level, tick, rule, belief='', delta=0.0, value=None, message=''):
+        '''
+        Records one event, e.g. the rule that changed a trust belief, by how much and the resulting value.
+        '''
+        if level < self.level:
+            return
+        event = TrustEvent(tick, level, rule, belief, delta, value, message)
+        self._events.append(event)
+        if self.save_path is not None:
+            self._pending.append(event)
+            if len(self._pending) >= self._flush_every:
+                self.flush()
+
+    def debug(self, tick, rule, belief='', delta=0.0, value=None, message=''):
+        self.log(DEBUG, tick, rule, belief, delta, value, message)
+
+    def info(self, tick, rule, belief='', delta=0.0, value=None, message=''):
+        self.log(INFO, tick, rule, belief, delta, value, message)
+
+    def warning(self, tick, rule, belief='', delta=0.0, value=None, message=''):
+        self.log(WARNING, tick, rule, belief, delta, value, message)
+
+    def error(self, tick, rule, belief='', delta=0.0, value=None, message=''):
+        self.log(ERROR, tick, rule, belief, delta, value, message)
+
+    def query(self, rule=None, belief=None, min_level=None, since_tick=None, until_tick=None):
+        '''
+        Returns the recorded events matching all of the given filters.
+        '''
+        return [event for event in self._events
+                if (rule is None or event.rule == rule)
+                and (belief is None or event.belief == belief)
+                and (min_level is None or event.level >= min_level)
+                and (since_tick is None or event.tick >= since_tick)
+                and (until_tick is None or event.tick <= until_tick)]
+
+    def __len__(self):
+        return len(self._events)
+
+    def flush(self):
+        '''
+        Hands the pending events to the writer thread, which is started on the first flush.
+        '''
+        if not self._pending:
+            return
+        if self._writer is None:
+            self._queue = queue.Queue()
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+        self._queue.put(self._pending)
+        self._pending = []
+
+    def close(self):
+        '''
+        Writes the remaining events and waits for the writer thread to finish.
+        '''
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _write_loop(self):
+        folder = os.path.dirname(self.save_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        write_header = not os.path.exists(self.save_path)
+        with open(self.save_path, mode='a', newline='') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            if write_header:
+                csv_writer.writerow(HEADER)
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                for event in batch:
+                    csv_writer.writerow([event.tick, LEVEL_NAMES.get(event.level, event.level), event.rule,
+                                         event.belief, event.delta, '' if event.value is None else event.value,
+                                         event.message])
+                csv_file.flush()
+
+
+def load_events(path):
+    '''
+    Reads a trust event file written by TrustEventLog back into a list of TrustEvents.
+    '''
+    events = []
+    with open(path, newline='') as csv_file:
+        reader = csv.reader(csv_file, delimiter=';', quotechar='"')
+        next(reader, None)
+        for row in reader:
+            if not row:
+                continue
+            tick, level, rule, belief, delta, value, message = row
+            events.append(TrustEvent(int(tick), LEVELS.get(level, level), rule, belief, float(delta),
+                                     float(value) if value else None, message))
+    return events
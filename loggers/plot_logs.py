@@ -1,64 +1,42 @@
-import matplotlib
 import pandas as pd
-import matplotlib.pyplot as plt
-matplotlib.use('TkAgg')
-
-import pandas as pd
-import matplotlib.pyplot as plt
+try:
+    from loggers.RunAnalytics import analyze_run
+except ImportError:
+    # When this script is run from within the loggers folder
+    import os, sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from loggers.RunAnalytics import analyze_run
+
+def _pyplot():
+    # Matplotlib and its TkAgg backend are only loaded when plotting, not when importing this module
+    import matplotlib
+    matplotlib.use('TkAgg')
+    import matplotlib.pyplot as plt
+    return plt
 
 def plot_1_run_results(csv_file: str, human_name: str):
-    # Read the CSV using semicolon as delimiter
-    df = pd.read_csv(csv_file, delimiter=';')
+    # Count the actions of both actors and the collaborative actions on dictionary encoded action columns,
+    # counting only when the action changes (i.e. the first occurrence). Works for csv and columnar action logs.
+    result = analyze_run(csv_file, human_name)
 
     # Get the final tick from the "tick_nr" column
-    final_tick = df['tick_nr'].max()
+    final_tick = result.ticks.max()
     print("Total number of ticks to end game:", final_tick)
 
-    # Sort the DataFrame by tick_nr
-    df_sorted = df.sort_values(by='tick_nr')
-
-    # Create flags for non-empty actions, counting only when the action changes (i.e. the first occurrence)
-    df_sorted['rescuebot_action_flag'] = (
-        (df_sorted['rescuebot_action'].fillna('').astype(str).str.strip() != "") &
-        (df_sorted['rescuebot_action'].fillna('').astype(str).str.strip() !=
-         df_sorted['rescuebot_action'].fillna('').astype(str).str.strip().shift())
-    ).astype(int)
-
-    df_sorted[f'{human_name}_action_flag'] = (
-        (df_sorted[f'{human_name}_action'].fillna('').astype(str).str.strip() != "") &
-        (df_sorted[f'{human_name}_action'].fillna('').astype(str).str.strip() !=
-         df_sorted[f'{human_name}_action'].fillna('').astype(str).str.strip().shift())
-    ).astype(int)
-
-    # Group by tick_nr and sum the action flags for both actors.
-    actions_per_tick = df_sorted.groupby('tick_nr', as_index=False).agg({
-        'rescuebot_action_flag': 'sum',
-        f'{human_name}_action_flag': 'sum'
-    })
-
-    # Compute cumulative sum for each actor so that the plot shows the total actions up to each tick.
-    actions_per_tick['rescuebot_cumsum'] = actions_per_tick['rescuebot_action_flag'].cumsum()
-    actions_per_tick[f'{human_name}_cumsum'] = actions_per_tick[f'{human_name}_action_flag'].cumsum()
+    # Cumulative sum for each actor so that the plot shows the total actions up to each tick.
+    actions_per_tick = pd.DataFrame({'tick_nr': result.ticks, 'rescuebot_cumsum': result.rescuebot_cumsum,
+                                     f'{human_name}_cumsum': result.human_cumsum})
 
     print("Starting to compute number of collaborative actions")
-    # Create flag for collaborative actions (actions that contain "Together") counting only once
-    df_sorted['collaborative_action_flag'] = (
-        (df_sorted[f'{human_name}_action'].fillna('').astype(str).str.contains("Together")) &
-        (df_sorted[f'{human_name}_action'].fillna('').astype(str).str.strip() !=
-         df_sorted[f'{human_name}_action'].fillna('').astype(str).str.strip().shift())
-    ).astype(int)
-
-    # Group by tick and sum the collaborative_action_flag
-    collab_per_tick = df_sorted.groupby('tick_nr', as_index=False)['collaborative_action_flag'].sum()
-
-    # Compute the cumulative sum of collaborative actions
-    collab_per_tick['collab_cumsum'] = collab_per_tick['collaborative_action_flag'].cumsum()
+    # Cumulative sum of collaborative actions (actions that contain "Together")
+    collab_per_tick = pd.DataFrame({'tick_nr': result.ticks, 'collab_cumsum': result.collab_cumsum})
 
     # Print the final total number of collaborative actions
     final_collab_actions = collab_per_tick['collab_cumsum'].iloc[-1] if not collab_per_tick.empty else 0
     print("Total number of collaborative actions:", final_collab_actions)
 
     # Plot the cumulative collaborative actions
+    plt = _pyplot()
     plt.figure(figsize=(10, 6))
     plt.plot(collab_per_tick['tick_nr'], collab_per_tick['collab_cumsum'],
              color='green', linestyle='-', linewidth=2, label='Collaborative Actions')
@@ -96,6 +74,7 @@ def plot_combined_results():
     """
     Plots and compares all 5 runs
     """
+    plt = _pyplot()
     # Five CSVs (placeholder paths)
     runs = [
         ("../trust_logs/wilco/wilco_1_no_baseline.csv", "No Baseline First Round"),
@@ -4,7 +4,7 @@ import pandas as pd
 from matplotlib import pyplot as plt
 
 def main():
-    csv_file = pd.read_csv('trust_logs/trust_beliefs_per_tick.csv') # Enter the name here
+    csv_file = 'trust_logs/trust_beliefs_per_tick.csv' # Enter the name here
     # Read the CSV file; note the delimiter is ';'
     try:
         data = pd.read_csv(csv_file, delimiter=";")
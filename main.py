@@ -1,43 +1,85 @@
-import os, requests
-import sys
-import csv
-import glob
+import os
 import pathlib
-from SaR_gui import visualization_server
-from worlds1.WorldBuilder import create_builder
-from pathlib import Path
-from loggers.OutputLogger import output_logger
+import threading
+from worlds1.RunConfig import load_config, apply_config, TASK_TYPES, CONDITIONS
 
-if __name__ == "__main__":
-    fld = os.getcwd()
-    print("\nEnter one of the task types 'tutorial' or 'official':")
-    choice1=input()
-    print("\nEnter a name or id for the human agent:")
-    choice2=input()
-    if choice1=='tutorial':
-        builder = create_builder(task_type='tutorial',condition='tutorial', name=choice2, folder=fld)
-    else:
-        print("\nEnter one of the human conditions 'normal', 'strong', or 'weak':")
-        choice3=input()
-        if choice3=='normal' or choice3=='strong' or choice3=='weak':
-            builder = create_builder(task_type=choice1, condition=choice3, name=choice2, folder=fld)
-        else:
-            print("\nWrong condition name entered")
-
-    # Start overarching MATRX scripts and threads, such as the api and/or visualizer if requested. Here we also link our own media resource folder with MATRX.
-    media_folder = pathlib.Path().resolve()
-    builder.startup(media_folder=media_folder)
-    print("Starting custom visualizer")
-    vis_thread = visualization_server.run_matrx_visualizer(verbose=False, media_folder=media_folder)
-    world = builder.get_world()
+def run_mission(pool, fld, config, task_type, condition, name):
+    builder, world = pool.get_world(task_type=task_type, condition=condition, name=name, map_name=config['map'])
     print("Started world...")
     builder.api_info['matrx_paused'] = False
     world.run(builder.api_info)
     print("DONE!")
-    print("Shutting down custom visualizer")
-    r = requests.get("http://localhost:" + str(visualization_server.port) + "/shutdown_visualizer")
-    vis_thread.join()
-    if choice1=="official":
+    print(builder.tick_scheduler.report())
+    if builder.tick_scheduler.save_path is not None:
+        # Save the duration, sleep and lateness of every tick next to the action logs
+        builder.tick_scheduler.export()
+    if builder.tick_profiler.enabled:
+        # Save the tick, phase and helper timings next to the action logs
+        builder.tick_profiler.export()
+    # Write the remaining trust events of RescueBot
+    builder.trust_events.close()
+    builder.decisions.close()
+    if task_type=="official":
+        from loggers.OutputLogger import output_logger
+        from agents1 import OfficialAgent
         # Generate one final output log file for the official task type
-        output_logger(fld)
-    builder.stop()
+        output_logger(fld, baseline=OfficialAgent.baseline, logs_folder=config['output_dir'])
+
+def prefetch_config(config, errors):
+    # Runs in the background, the errors are raised again by the main thread, so no mission runs with other settings
+    try:
+        apply_config(config)
+    except Exception as error:
+        errors.append(error)
+
+if __name__ == "__main__":
+    # The settings are checked before anything is started, see 'python main.py --help'
+    config = load_config()
+    # RescueBot reads and writes its trust beliefs in the work folder, by default the current folder
+    fld = os.path.abspath(config['work_dir'] or os.getcwd())
+    # MATRX and the worlds take most of a second to import, so they are imported in the background while the first
+    # task type is entered, joining the thread then waits for it to finish
+    prefetch_errors = []
+    prefetch = threading.Thread(target=prefetch_config, args=(config, prefetch_errors), daemon=True)
+    prefetch.start()
+    pool = None
+    while True:
+        if config['task_type'] is not None:
+            # Run the mission of the settings without asking anything
+            choice1, choice2, choice3 = config['task_type'], config['name'], config['condition']
+        else:
+            print("\nEnter one of the task types 'tutorial' or 'official', or nothing to quit:")
+            choice1=input()
+            if choice1=='':
+                break
+            if choice1 not in TASK_TYPES:
+                print("\nWrong task type entered")
+                continue
+            print("\nEnter a name or id for the human agent:")
+            choice2=input()
+            choice3='tutorial'
+            if choice1!='tutorial':
+                print("\nEnter one of the human conditions 'normal', 'strong', or 'weak':")
+                choice3=input()
+                if choice3 not in CONDITIONS:
+                    print("\nWrong condition name entered")
+                    continue
+        if pool is None:
+            prefetch.join()
+            if prefetch_errors:
+                raise prefetch_errors[0]
+            from worlds1.WorldPool import WorldPool
+            # Start overarching MATRX scripts and threads, such as the api and visualizer. Here we also link our own media resource folder with MATRX.
+            # They keep running for all missions, every next mission of a task type reuses a snapshot of the objects of the first one.
+            media_folder = pathlib.Path().resolve()
+            pool = WorldPool(folder=fld, media_folder=media_folder)
+            if not config['headless']:
+                print("Starting custom visualizer")
+                pool.start_servers()
+
+        run_mission(pool, fld, config, choice1, choice3, choice2)
+        if config['task_type'] is not None:
+            break
+    if pool is not None and not config['headless']:
+        print("Shutting down custom visualizer")
+        pool.stop_servers()
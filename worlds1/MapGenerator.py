@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from worlds1.MapLoader import MAPS_FOLDER, OBSTACLE_IMAGES
+
+'''
+This file generates maps in the format of the map files of the maps folder, for testing the agents and the
+visualization on larger worlds. The areas are laid out in a grid of 5x4 rooms, each with one door and a doormat in
+front of it, with the drop zone and the start locations of the agents at the right side of the world. All random
+choices are made with a seeded generator, so the same settings and seed always give the same map.
+Run `python -m worlds1.MapGenerator --help` for the settings, and build a world from the written map file with
+create_builder(..., map_name=<path>).
+'''
+
+ROOM_WIDTH = 5
+ROOM_HEIGHT = 4
+# Rooms are placed every ROOM_SPACING tiles, which leaves a corridor of one column and two rows around every room
+ROOM_SPACING = 6
+# Columns at the right side of the world kept free for the drop zone and the start locations of the agents
+DROP_ZONE_COLUMNS = 4
+# Area signs exist for this many areas, see the images folder
+NR_SIGNS = 14
+VICTIM_TYPES = ['girl', 'boy', 'man', 'woman', 'dog', 'cat', 'elderly man', 'elderly woman']
+# The obstacles of the official world
+DEFAULT_OBSTACLES = {'rock': 3, 'stone': 4, 'tree': 3}
+
+
+def _room_slots(width, height):
+    cols = (width - DROP_ZONE_COLUMNS) // ROOM_SPACING
+    rows = height // ROOM_SPACING
+    return [(1 + ROOM_SPACING * col, 1 + ROOM_SPACING * row) for row in range(rows) for col in range(cols)]
+
+
+def generate_map(width=25, height=24, nr_areas=12, nr_victims=26, nr_goal_victims=8, obstacles=None, nr_water=60,
+                 seed=1):
+    '''
+    Returns a map of a `width` x `height` world with `nr_areas` areas holding `nr_victims` victims, of which
+    `nr_goal_victims` have to be rescued. Half of the goal victims, rounded up, are critically injured and the others
+    mildly injured, the drop zone is as high as the number of goal victims. `obstacles` gives the number of obstacles of
+    every type (rock, stone or tree), which block the doors of the areas, and `nr_water` water tiles are spread over the
+    corridors.
+    '''
+    obstacles = DEFAULT_OBSTACLES if obstacles is None else obstacles
+    rng = np.random.default_rng(seed)
+    slots = _room_slots(width, height)
+    if nr_areas > len(slots):
+        raise ValueError(f"A {width}x{height} world fits at most {len(slots)} areas, not {nr_areas}")
+    if not 0 < nr_goal_victims <= min(nr_victims, height - 2):
+        raise ValueError(f"The number of goal victims should be between 1 and {min(nr_victims, height - 2)}")
+    unknown = set(obstacles) - set(OBSTACLE_IMAGES)
+    if unknown:
+        raise ValueError(f"Unknown obstacle types {sorted(unknown)}, use {list(OBSTACLE_IMAGES)}")
+    if sum(obstacles.values()) > nr_areas:
+        raise ValueError(f"{sum(obstacles.values())} obstacles do not fit on the doors of {nr_areas} areas")
+
+    # Pick the areas from the possible room locations, numbered row by row
+    chosen = sorted(rng.choice(len(slots), size=nr_areas, replace=False))
+    rooms, room_tiles, blocked, roofs = [], [], set(), []
+    for nr, slot in enumerate(chosen):
+        x, y = slots[slot]
+        # Doors face down, or up for rooms that are not in the top row
+        door_up = y > 1 and rng.random() < 0.5
+        door = (x + 2, y) if door_up else (x + 2, y + ROOM_HEIGHT - 1)
+        doormat = (x + 2, y - 1) if door_up else (x + 2, y + ROOM_HEIGHT)
+        room = {'name': f"area {nr + 1}", 'top_left': [x, y], 'width': ROOM_WIDTH, 'height': ROOM_HEIGHT,
+                'doors': [list(door)], 'doormat': list(doormat)}
+        if nr < NR_SIGNS:
+            room['sign'] = [x + 2, y + ROOM_HEIGHT - 1 if door_up else y]
+        rooms.append(room)
+        walls = [(wall_x, wall_y) for wall_y in range(y, y + ROOM_HEIGHT) for wall_x in range(x, x + ROOM_WIDTH)
+                 if wall_x in (x, x + ROOM_WIDTH - 1) or wall_y in (y, y + ROOM_HEIGHT - 1)]
+        roofs.extend(wall for wall in walls if wall != door)
+        blocked.update((tile_x, tile_y) for tile_y in range(y, y + ROOM_HEIGHT) for tile_x in range(x, x + ROOM_WIDTH))
+        blocked.add(doormat)
+        room_tiles.extend((room['name'], (tile_x, tile_y)) for tile_y in range(y + 1, y + ROOM_HEIGHT - 1)
+                          for tile_x in range(x + 1, x + ROOM_WIDTH - 1))
+    if nr_victims > len(room_tiles):
+        raise ValueError(f"{nr_victims} victims do not fit in the {len(room_tiles)} tiles of {nr_areas} areas")
+
+    # Goal victims are dropped critically injured first, every injured victim also has to be somewhere in an area
+    nr_critical = (nr_goal_victims + 1) // 2
+    goal_victims = [f"critically injured {VICTIM_TYPES[i % len(VICTIM_TYPES)]}" for i in rng.permutation(nr_critical)] \
+        + [f"mildly injured {VICTIM_TYPES[i % len(VICTIM_TYPES)]}" for i in rng.permutation(nr_goal_victims - nr_critical)]
+    others = [f"healthy {VICTIM_TYPES[i]}" for i in rng.integers(len(VICTIM_TYPES), size=nr_victims - nr_goal_victims)]
+    victims = []
+    for victim, tile in zip(goal_victims + others, rng.permutation(len(room_tiles))[:nr_victims]):
+        area, loc = room_tiles[tile]
+        victims.append([victim, area, list(loc)])
+    victims = [victims[i] for i in rng.permutation(len(victims))]
+
+    doors = rng.permutation(nr_areas)
+    obstacle_types = [obstacle_type for obstacle_type, count in sorted(obstacles.items()) for _ in range(count)]
+    placed_obstacles = [[obstacle_type, rooms[door]['doors'][0]] for obstacle_type, door in zip(obstacle_types, doors)]
+
+    # The drop zone is centered at the right side, with the agents starting next to its middle
+    drop_x, drop_y = width - 2, max(1, (height - nr_goal_victims) // 2)
+    agents = {'rescuebot': [drop_x - 1, drop_y + (nr_goal_victims - 1) // 2],
+              'human': [drop_x - 1, drop_y + (nr_goal_victims - 1) // 2 + 1]}
+    corridors = [(x, y) for y in range(1, height - 1) for x in range(1, width - DROP_ZONE_COLUMNS)
+                 if (x, y) not in blocked]
+    water = [list(corridors[i]) for i in sorted(rng.choice(len(corridors), size=min(nr_water, len(corridors)),
+                                                           replace=False))]
+
+    return {'shape': [width, height], 'background_colour': "#9a9083", 'bounds_colour': "#1F262A", 'rooms': rooms,
+            'drop_zone': {'top_left': [drop_x, drop_y], 'height': nr_goal_victims}, 'agents': agents,
+            'obstacles': placed_obstacles, 'victims': victims, 'goal_victims': goal_victims,
+            'keyboard_sign': {'location': [width // 2, 0], 'size': 20},
+            'decorations': [{'name': 'roof', 'img_name': "/images/roof-final5.svg", 'locations': [list(roof) for roof in roofs],
+                             'background': True},
+                            {'name': 'water', 'img_name': "/images/pool20.svg", 'locations': water}]}
+
+
+def save_map(world_map, path):
+    '''
+    Writes a map as a map file, with one room, obstacle, victim or decoration per line.
+    '''
+    lines = []
+    for key, value in world_map.items():
+        if isinstance(value, list) and value and key != 'shape':
+            items = ',\n'.join('        ' + json.dumps(item) for item in value)
+            lines.append(f'    "{key}": [\n{items}\n    ]')
+        else:
+            lines.append(f'    "{key}": {json.dumps(value)}')
+    with open(path, 'w') as json_file:
+        json_file.write('{\n' + ',\n'.join(lines) + '\n}\n')
+
+
+if __name__ == "__main__":
+    # Usage: python -m worlds1.MapGenerator --width 61 --height 48 --areas 60 --victims 200 [--out path]
+    parser = argparse.ArgumentParser(description="Generate a map for a larger search and rescue world.")
+    parser.add_argument('--width', type=int, default=25)
+    parser.add_argument('--height', type=int, default=24)
+    parser.add_argument('--areas', type=int, default=12, help="number of areas")
+    parser.add_argument('--victims', type=int, default=26, help="number of victims, including the goal victims")
+    parser.add_argument('--goal-victims', type=int, default=8, help="number of victims to rescue")
+    parser.add_argument('--rocks', type=int, default=DEFAULT_OBSTACLES['rock'])
+    parser.add_argument('--stones', type=int, default=DEFAULT_OBSTACLES['stone'])
+    parser.add_argument('--trees', type=int, default=DEFAULT_OBSTACLES['tree'])
+    parser.add_argument('--water', type=int, default=60, help="number of water tiles")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default=None, help="map file to write, by default a generated_*.json in the maps folder")
+    args = parser.parse_args()
+
+    generated = generate_map(args.width, args.height, args.areas, args.victims, args.goal_victims,
+                             {'rock': args.rocks, 'stone': args.stones, 'tree': args.trees}, args.water, args.seed)
+    out = args.out or os.path.join(MAPS_FOLDER, f"generated_{args.width}x{args.height}_{args.areas}_{args.seed}.json")
+    save_map(generated, out)
+    print(f"Saved the map in {out}, build it with create_builder(..., map_name={out!r})")
@@ -0,0 +1,165 @@
+import json
+import os
+import pickle
+
+'''
+This file loads the worlds declared in the map files of the maps folder. A map file (JSON) lists the rooms, the drop
+zone, the start locations of the agents and the obstacles, victims and decorations of a world. It is compiled once into
+the form create_builder adds to the world builder: locations as tuples, the decorations without duplicates and the area
+tiles of every room and the room of every area tile and door precomputed. The compiled map is cached next to the map
+files and compiled again when the map file changes.
+Decorations marked as background, such as roofs and streets, are not objects of the world but are drawn into its
+background image, so they are not part of the state of the agents.
+'''
+
+MAPS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'maps')
+# Folder, inside the maps folder, where the compiled maps are cached
+CACHE_FOLDER = ".compiled"
+# Version of the compiled format, cached maps of another version are compiled again
+CACHE_VERSION = 2
+# Images of the obstacle types a map can use
+OBSTACLE_IMAGES = {'rock': "/images/stone.svg", 'stone': "/images/stone-small.svg", 'tree': "/images/tree-fallen2.svg"}
+# Size of the area signs, unless a room gives its own sign_size
+SIGN_SIZE = 0.55
+
+
+def map_path(name):
+    '''
+    Returns the path of a map, given the name of a map in the maps folder or the path of a map file.
+    '''
+    if name.endswith('.json'):
+        return name
+    return os.path.join(MAPS_FOLDER, name + '.json')
+
+
+def _area_tiles(room):
+    # The area tiles fill the room within its walls
+    x, y = room['top_left']
+    return tuple((tile_x, tile_y) for tile_y in range(y + 1, y + room['height'] - 1)
+                 for tile_x in range(x + 1, x + room['width'] - 1))
+
+
+def compile_map(path):
+    '''
+    Compiles a map file into the dictionary create_builder builds a world from.
+    '''
+    with open(path) as json_file:
+        world_map = json.load(json_file)
+    width, height = world_map['shape']
+
+    def location(loc):
+        loc = tuple(loc)
+        if not (0 <= loc[0] < width and 0 <= loc[1] < height):
+            raise ValueError(f"Location {loc} is outside of the {width}x{height} world of map {path}")
+        return loc
+
+    rooms, room_of, door_of = [], {}, {}
+    for nr, room in enumerate(world_map['rooms']):
+        compiled_room = {'name': room['name'], 'top_left': location(room['top_left']), 'width': room['width'],
+                         'height': room['height'], 'doors': tuple(location(door) for door in room['doors']),
+                         'doormat': location(room['doormat']), 'area_tiles': _area_tiles(room),
+                         'sign': location(room['sign']) if 'sign' in room else None,
+                         'sign_name': f"area {nr + 1:02} sign", 'sign_img': f"/images/sign{nr + 1:02}.svg",
+                         'sign_size': room.get('sign_size', SIGN_SIZE)}
+        rooms.append(compiled_room)
+        room_of.update((tile, room['name']) for tile in compiled_room['area_tiles'])
+        door_of.update((door, room['name']) for door in compiled_room['doors'])
+
+    obstacles = []
+    for obstacle_type, loc in world_map.get('obstacles', []):
+        if obstacle_type not in OBSTACLE_IMAGES:
+            raise ValueError(f"Unknown obstacle type '{obstacle_type}' in map {path}, use one of {list(OBSTACLE_IMAGES)}")
+        obstacles.append((obstacle_type, location(loc), OBSTACLE_IMAGES[obstacle_type]))
+    victims = tuple((f"{victim} in {area}", location(loc), f"/images/{victim}.svg")
+                    for victim, area, loc in world_map.get('victims', []))
+
+    # The goal victims fill the drop zone from the top, in the order they have to be dropped
+    drop_zone = dict(world_map['drop_zone'])
+    drop_zone['top_left'] = location(drop_zone['top_left'])
+    drop_zone.setdefault('width', 1)
+    goal_victims = world_map.get('goal_victims', [])
+    if len(goal_victims) > drop_zone['height']:
+        raise ValueError(f"Map {path} has {len(goal_victims)} goal victims for a drop zone of height {drop_zone['height']}")
+    x, y = drop_zone['top_left']
+    goal_victims = tuple(((x, y + rank), f"/images/{victim}.svg") for rank, victim in enumerate(goal_victims))
+
+    # Decorations with the same name and image at the same location are only added once
+    decorations, background, seen = [], [], set()
+    for decoration in world_map.get('decorations', []):
+        for loc in decoration['locations']:
+            key = (decoration['name'], decoration['img_name'], tuple(loc))
+            if key not in seen:
+                seen.add(key)
+                if decoration.get('background', False):
+                    background.append((decoration['name'], location(loc), decoration['img_name'],
+                                       decoration.get('size')))
+                else:
+                    decorations.append((decoration['name'], location(loc), decoration['img_name'],
+                                        decoration.get('size'), decoration.get('traversable', True)))
+
+    # The walls of a room are hidden when the background covers all of them, such as the roofs of the official world
+    covered = {loc for name, loc, img_name, size in background}
+    for room in rooms:
+        x, y = room['top_left']
+        walls = {(wall_x, wall_y) for wall_y in range(y, y + room['height']) for wall_x in range(x, x + room['width'])
+                 if wall_x in (x, x + room['width'] - 1) or wall_y in (y, y + room['height'] - 1)}
+        room['walls_covered'] = (walls - set(room['doors'])) <= covered
+
+    keyboard_sign = world_map.get('keyboard_sign')
+    return {'name': os.path.splitext(os.path.basename(path))[0], 'shape': (width, height),
+            'background_colour': world_map.get('background_colour', "#9a9083"),
+            'bounds_colour': world_map.get('bounds_colour', "#1F262A"), 'rooms': tuple(rooms), 'room_of': room_of,
+            'door_of': door_of, 'drop_zone': drop_zone,
+            'agents': {agent: location(loc) for agent, loc in world_map['agents'].items()},
+            'obstacles': tuple(obstacles), 'victims': victims, 'goal_victims': goal_victims,
+            'keyboard_sign': None if keyboard_sign is None else (location(keyboard_sign['location']), keyboard_sign['size']),
+            'decorations': tuple(decorations), 'background': tuple(background)}
+
+
+def _cache_key(path):
+    stat = os.stat(path)
+    return (CACHE_VERSION, os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _cache_path(path):
+    return os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_FOLDER,
+                        os.path.splitext(os.path.basename(path))[0] + '.pickle')
+
+
+def load_map(name):
+    '''
+    Returns the compiled map with the given name or path, from the cache when the map file did not change since it was
+    compiled.
+    '''
+    path = map_path(name)
+    key = _cache_key(path)
+    cache_path = _cache_path(path)
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                cached_key, world_map = pickle.load(cache_file)
+            if cached_key == key:
+                return world_map
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+    world_map = compile_map(path)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Write to a temporary file first, so other processes never read a half written cache
+        temp_path = cache_path + f'.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as cache_file:
+            pickle.dump((key, world_map), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        # A read-only maps folder only means the map is compiled every time
+        pass
+    return world_map
+
+
+if __name__ == "__main__":
+    # Compiles and caches all maps of the maps folder
+    for file_name in sorted(os.listdir(MAPS_FOLDER)):
+        if file_name.endswith('.json'):
+            compiled = load_map(os.path.join(MAPS_FOLDER, file_name))
+            print(f"{compiled['name']}: {len(compiled['rooms'])} rooms, {len(compiled['victims'])} victims, "
+                  f"{len(compiled['decorations'])} decorations, {len(compiled['background'])} in the background")
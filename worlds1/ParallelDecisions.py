@@ -0,0 +1,105 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from matrx.api import api
+
+'''
+This file lets the agents of a MATRX world decide on their actions at the same time. MATRX goes over the agents one
+after the other every tick: it gets the state of an agent, lets its brain decide and processes the decision, before it
+gets to the next agent. The actions are only performed after all agents decided, so the decisions do not depend on each
+other, but the time of a tick grows with every agent added.
+When installed on a world, the state of every agent is taken at the start of the agent loop of a tick, all at once, so
+every agent decides on the same snapshot of the world. The brains that are not busy then decide in a pool of threads,
+while MATRX goes over the agents in its own order as before, and waits for the decision of each agent when it gets to
+it. Processing the decisions, the messages and the actions thus stays in the order of the registered agents, and the
+results do not depend on which decision finishes first, as long as the brains only use their own random generator.
+Threads are used since the brains are objects of the world that keep their state between ticks, they cannot move to
+other processes. Decisions that wait for files or numpy run at the same time, pure Python decisions take turns.
+'''
+
+
+class ParallelDecisions:
+    '''
+    Runs the decisions of the agents of a world in `nr_workers` threads, or does nothing when `nr_workers` is 0.
+    '''
+    def __init__(self, nr_workers=0):
+        self.nr_workers = nr_workers
+        self._pool = None
+        self._world = None
+        self._in_step = False
+        self._tick = None
+        self._states = {}
+        self._decisions = {}
+        # The get_action of the brain of every agent, which MATRX would call itself
+        self._get_actions = {}
+
+    def install(self, world):
+        '''
+        Takes over how the agents of a world get their state and decide, before it runs.
+        '''
+        if self.nr_workers <= 0:
+            return
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.nr_workers, thread_name_prefix="decisions")
+        self._world = world
+        self._tick = None
+        # MATRX calls these private methods on the world itself, attributes of the instance take their place
+        get_agent_state = world._GridWorld__get_agent_state
+        step = world._GridWorld__step
+        world._GridWorld__get_agent_state = functools.partial(self._get_agent_state, get_agent_state)
+        world._GridWorld__step = functools.partial(self._step, step)
+        self._get_actions = {}
+        for agent_id, agent_body in world.registered_agents.items():
+            self._get_actions[agent_id] = agent_body.get_action_func
+            agent_body.get_action_func = functools.partial(self._get_action, agent_id)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _step(self, step):
+        # The states are only taken for the agent loop of a tick, not for the first states MATRX fetches for the api
+        self._in_step = True
+        try:
+            return step()
+        finally:
+            self._in_step = False
+            # Decisions that were not used, because the world ended the tick early, are dropped
+            self._decisions.clear()
+            self._states.clear()
+
+    def _get_agent_state(self, get_agent_state, agent_body):
+        if not self._in_step:
+            return get_agent_state(agent_body)
+        tick = self._world.current_nr_ticks
+        if tick != self._tick:
+            self._tick = tick
+            self._start_decisions(get_agent_state, tick)
+        return self._states.pop(agent_body.obj_id)
+
+    def _start_decisions(self, get_agent_state, tick):
+        # The states of all agents are taken before any of them decides, in the order MATRX goes over the agents
+        for agent_id, agent_body in self._world.registered_agents.items():
+            self._states[agent_id] = get_agent_state(agent_body)
+        for agent_id, agent_body in self._world.registered_agents.items():
+            # Busy agents only filter their state this tick, which MATRX does itself
+            if agent_body._check_agent_busy(curr_tick=tick):
+                continue
+            kwargs = {'state': self._states[agent_id], 'agent_properties': agent_body.properties,
+                      'agent_id': agent_id}
+            if agent_body.is_human_agent:
+                # The keys pressed until now are for this decision, as MATRX would have handed them over in the loop
+                kwargs['user_input'] = api._pop_userinput(agent_id) if agent_id in api._userinput else None
+            self._decisions[agent_id] = self._pool.submit(self._get_actions[agent_id], **kwargs)
+
+    def _get_action(self, body_id, **kwargs):
+        decision = self._decisions.pop(body_id, None)
+        if decision is None:
+            # Not decided at the start of the tick, decide now as MATRX would
+            return self._get_actions[body_id](**kwargs)
+        if kwargs.get('user_input'):
+            # Keys pressed after the decision started are kept for the next decision of the human
+            api._userinput[body_id] = list(kwargs['user_input']) + api._userinput.get(body_id, [])
+        # Raises the exception of the decision, if any, as MATRX would
+        return decision.result()
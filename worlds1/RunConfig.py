@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import random
+
+'''
+This file holds the settings of a run of main.py, given as command line options and/or a JSON config file, so sessions
+can be started by scripts without answering the prompts. All settings are checked before anything is imported or
+started, after which apply_config sets them on the modules that use them (WorldBuilder, OfficialAgent, the MATRX api
+and the visualizer). Options given on the command line override those of the config file.
+Run `python main.py --help` for the settings. Without a task type main.py asks for the task type, name and condition.
+'''
+
+TASK_TYPES = ['tutorial', 'official']
+CONDITIONS = ['normal', 'strong', 'weak']
+# Trust baselines of RescueBot, 'NONE' keeps its own trust beliefs
+BASELINES = ['NONE', 'NEVER-TRUST', 'ALWAYS-TRUST', 'RANDOM-TRUST']
+# Modes of worlds1/TickScheduler.py
+TICK_SCHEDULERS = ['fixed', 'paced', 'uncapped']
+# Settings of the config file and their defaults, the same as the command line options with dashes replaced
+DEFAULTS = {'task_type': None, 'condition': None, 'name': None, 'map': None, 'tick_duration': 0.1,
+            'tick_scheduler': 'fixed', 'parallel_decisions': 0, 'seed': 1, 'max_ticks': None, 'baseline': 'NONE', 'headless': False, 'output_dir': "logs", 'work_dir': None, 'api_port': 3001,
+            'visualizer_port': 3000}
+
+
+def build_parser():
+    '''
+    Returns the parser of the command line options of main.py.
+    '''
+    parser = argparse.ArgumentParser(description="Run the human-agent teamwork task. Without --task-type, the task "
+                                                 "type, name and condition are asked for every mission.")
+    parser.add_argument('--config', default=None, help="JSON file with any of the settings below, with underscores, "
+                                                       "for example {\"task_type\": \"official\", \"tick_duration\": 0}")
+    parser.add_argument('--task-type', choices=TASK_TYPES, help="run one mission of this task type and quit")
+    parser.add_argument('--condition', choices=CONDITIONS, help="condition of the human, for the official task type")
+    parser.add_argument('--name', help="name or id of the human agent")
+    parser.add_argument('--map', help="name or path of a map file, by default the map of the task type")
+    parser.add_argument('--tick-duration', type=float, help="seconds per tick, 0 runs as fast as possible "
+                                                            "(default 0.1, keep it during evaluations)")
+    parser.add_argument('--tick-scheduler', choices=TICK_SCHEDULERS,
+                        help="'fixed' sleeps the rest of every tick (default), 'paced' keeps a steady rate of ticks "
+                             "and makes up for slow ones, 'uncapped' never sleeps")
+    parser.add_argument('--parallel-decisions', type=int, help="number of threads the agents decide in at the same "
+                                                               "time (default 0, one after the other)")
+    parser.add_argument('--seed', type=int, help="seed of the random generators (default 1)")
+    parser.add_argument('--max-ticks', type=int, help="end the task after this many ticks (default: until all "
+                                                      "victims are rescued)")
+    parser.add_argument('--baseline', choices=BASELINES, help="trust baseline of RescueBot (default NONE)")
+    parser.add_argument('--headless', action='store_const', const=True,
+                        help="run without the MATRX api and the visualizer, needs --task-type")
+    parser.add_argument('--output-dir', help="folder to store the logs of the official task type in (default logs)")
+    parser.add_argument('--work-dir', help="folder with the 'beliefs' and 'trust_logs' of RescueBot (default: the "
+                                           "current folder)")
+    parser.add_argument('--api-port', type=int, help="port of the MATRX api (default 3001)")
+    parser.add_argument('--visualizer-port', type=int, help="port of the visualizer (default 3000)")
+    return parser
+
+
+def _is_int(value):
+    # JSON true and false are ints to Python, but not valid numbers of ticks, threads or ports
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _check(config):
+    # Returns the problems of a config, all of them at once so a script can fix them in one go
+    problems = []
+    if config['task_type'] not in TASK_TYPES + [None]:
+        problems.append(f"task_type should be one of {TASK_TYPES}, not {config['task_type']!r}")
+    if config['task_type'] == 'official' and config['condition'] not in CONDITIONS:
+        problems.append(f"the official task type needs a condition, one of {CONDITIONS}")
+    if config['task_type'] is not None and not config['name']:
+        problems.append("a task type needs the name of the human agent")
+    if config['headless'] and config['task_type'] is None:
+        problems.append("headless runs need a task type, there is nobody to ask for it")
+    if config['baseline'] not in BASELINES:
+        problems.append(f"baseline should be one of {BASELINES}, not {config['baseline']!r}")
+    if isinstance(config['tick_duration'], bool) or not isinstance(config['tick_duration'], (int, float)) \
+            or config['tick_duration'] < 0:
+        problems.append(f"tick_duration should be a number of seconds of at least 0, not {config['tick_duration']!r}")
+    if config['tick_scheduler'] not in TICK_SCHEDULERS:
+        problems.append(f"tick_scheduler should be one of {TICK_SCHEDULERS}, not {config['tick_scheduler']!r}")
+    if not _is_int(config['parallel_decisions']) or config['parallel_decisions'] < 0:
+        problems.append(f"parallel_decisions should be a number of threads of at least 0, "
+                        f"not {config['parallel_decisions']!r}")
+    if not _is_int(config['seed']):
+        problems.append(f"seed should be an integer, not {config['seed']!r}")
+    if config['max_ticks'] is not None and (not _is_int(config['max_ticks']) or config['max_ticks'] < 1):
+        problems.append(f"max_ticks should be a positive integer, not {config['max_ticks']!r}")
+    for port in ('api_port', 'visualizer_port'):
+        if not _is_int(config[port]) or not 0 < config[port] < 65536:
+            problems.append(f"{port} should be a port number, not {config[port]!r}")
+    if config['api_port'] == config['visualizer_port']:
+        problems.append("the MATRX api and the visualizer need different ports")
+    if config['map'] is not None:
+        # Imported here, so checking a config does not load the world builder
+        from worlds1.MapLoader import map_path
+        if not os.path.exists(map_path(config['map'])):
+            problems.append(f"map {config['map']!r} does not exist")
+    if os.path.exists(config['output_dir']) and not os.path.isdir(config['output_dir']):
+        problems.append(f"output_dir {config['output_dir']!r} is not a folder")
+    if config['work_dir'] is not None and not os.path.isdir(os.path.join(config['work_dir'], 'beliefs')):
+        problems.append(f"work_dir {config['work_dir']!r} should be a folder with a 'beliefs' folder")
+    return problems
+
+
+def make_config(settings):
+    '''
+    Returns the settings of a run as a dictionary, the given `settings` with the defaults for the missing ones. Raises
+    a ValueError with all problems when a setting is unknown or invalid.
+    '''
+    unknown = sorted(set(settings) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"unknown settings {unknown}, use any of {sorted(DEFAULTS)}")
+    config = dict(DEFAULTS)
+    config.update(settings)
+    # The tutorial has a single condition of its own
+    if config['task_type'] == 'tutorial':
+        config['condition'] = 'tutorial'
+    problems = _check(config)
+    if problems:
+        raise ValueError("invalid settings:\n  " + "\n  ".join(problems))
+    return config
+
+
+def load_config(argv=None):
+    '''
+    Returns the settings of a run as a dictionary, from the config file and the command line options `argv` (by
+    default sys.argv). Exits with the list of problems when a setting is unknown or invalid.
+    '''
+    parser = build_parser()
+    args = vars(parser.parse_args(argv))
+    settings = {}
+    config_file = args.pop('config')
+    if config_file is not None:
+        try:
+            with open(config_file) as json_file:
+                from_file = json.load(json_file)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot read config file {config_file}: {error}")
+        if not isinstance(from_file, dict):
+            parser.error(f"config file {config_file} should hold a JSON object")
+        settings.update(from_file)
+    settings.update((key, value) for key, value in args.items() if value is not None)
+    try:
+        return make_config(settings)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+def apply_config(config):
+    '''
+    Sets the settings of a run on the modules that use them, before the world is created and the servers are started.
+    '''
+    # Imported here, so the settings are checked before MATRX is loaded
+    from matrx.api import api
+    from agents1 import OfficialAgent
+    from worlds1 import WorldBuilder
+
+    WorldBuilder.tick_duration = config['tick_duration']
+    WorldBuilder.tick_scheduler = config['tick_scheduler']
+    WorldBuilder.parallel_decisions = config['parallel_decisions']
+    WorldBuilder.random_seed = config['seed']
+    WorldBuilder.max_nr_ticks = config['max_ticks'] if config['max_ticks'] is not None else float('inf')
+    WorldBuilder.logs_folder = config['output_dir']
+    OfficialAgent.baseline = None if config['baseline'] == 'NONE' else config['baseline']
+    # The random trust of the RANDOM-TRUST baseline is drawn when the agent is imported, draw it again from the seed
+    rng = random.Random(config['seed'])
+    OfficialAgent.random_competence = rng.uniform(-1, 1)
+    OfficialAgent.random_willingness = rng.uniform(-1, 1)
+    api._port = config['api_port']
+    if not config['headless']:
+        from SaR_gui import visualization_server
+        visualization_server.port = config['visualizer_port']
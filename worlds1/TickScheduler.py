@@ -0,0 +1,156 @@
+import csv
+import os
+import time
+
+import numpy as np
+
+'''
+This file paces the ticks of a MATRX world. MATRX sleeps for what is left of the tick duration after every tick, so
+ticks that take longer than the tick duration slow the world down for good, and the time spent outside of a tick and
+oversleeping are never made up for. The TickScheduler takes over the sleep of a world (GridWorld.__sleep) in one of
+these modes:
+- 'fixed': MATRX's own sleep, only measured.
+- 'paced': every tick has a deadline one tick duration after the previous one, the world sleeps until the deadline and
+  skips the sleep while it is behind, so the rate stays steady on average. When it falls behind by more than
+  MAX_LAG_TICKS ticks, for example while MATRX was paused, it starts over from the current time instead of rushing.
+- 'uncapped': never sleeps, for headless runs that should go as fast as possible.
+In every mode the time the ticks really take is recorded, with the overruns: ticks that took longer than the tick
+duration by themselves.
+'''
+
+MODES = ('fixed', 'paced', 'uncapped')
+# Ticks the paced mode may fall behind before it starts over from the current time
+MAX_LAG_TICKS = 5
+
+
+class TickScheduler:
+    '''
+    Sleeps between the ticks of a world according to its mode, and records per tick how long the tick took, how long
+    it slept and how late it was. Samples are kept in a ring buffer of the most recent `capacity` ticks.
+    '''
+    def __init__(self, mode='fixed', capacity=100000, save_path=None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown tick scheduler mode '{mode}', use one of {MODES}")
+        self.mode = mode
+        self.save_path = save_path
+        self._capacity = capacity
+        self._ticks = np.zeros(capacity, dtype=np.int32)
+        # Work, sleep and lateness of every tick, in seconds
+        self._work = np.zeros(capacity, dtype=np.float64)
+        self._slept = np.zeros(capacity, dtype=np.float64)
+        self._late = np.zeros(capacity, dtype=np.float64)
+        self._periods = np.zeros(capacity, dtype=np.float64)
+        self._world = None
+        self._matrx_sleep = None
+        self._reset()
+
+    def _reset(self):
+        self._count = 0
+        self._deadline = None
+        self._period = None
+        self.restarts = 0
+        self._first_start = None
+        self._last_end = None
+
+    def install(self, world):
+        '''
+        Takes over the sleep between the ticks of a world, before it runs.
+        '''
+        self._reset()
+        self._world = world
+        # MATRX calls self.__sleep() at the end of every tick, an attribute of the instance takes its place
+        self._matrx_sleep = world._GridWorld__sleep
+        world._GridWorld__sleep = self._sleep
+
+    def _sleep(self):
+        world = self._world
+        now = time.perf_counter()
+        # The tick duration can be changed through the api while the world runs
+        period = world.tick_duration
+        # MATRX sets the sleep duration to what is left of the tick duration after the tick
+        work = period - world.sleep_duration
+        start = now - work
+        if self._first_start is None:
+            self._first_start = start
+        late = 0.0
+        if self.mode == 'fixed':
+            self._matrx_sleep()
+        elif self.mode == 'paced' and period > 0:
+            if self._deadline is None or period != self._period or now - self._deadline > MAX_LAG_TICKS * period:
+                if self._deadline is not None:
+                    self.restarts += 1
+                self._deadline = start + period
+                self._period = period
+            else:
+                self._deadline += period
+            late = max(0.0, now - self._deadline)
+            if now < self._deadline:
+                time.sleep(self._deadline - now)
+        self._last_end = time.perf_counter()
+        self._record(world.current_nr_ticks, work, self._last_end - now, late, period)
+
+    def _record(self, tick, work, slept, late, period):
+        i = self._count % self._capacity
+        self._ticks[i] = tick
+        self._work[i] = work
+        self._slept[i] = slept
+        self._late[i] = late
+        self._periods[i] = period
+        self._count += 1
+
+    def __len__(self):
+        return min(self._count, self._capacity)
+
+    def _samples(self):
+        n = len(self)
+        order = (np.arange(n) + self._count - n) % self._capacity
+        return self._ticks[order], self._work[order], self._slept[order], self._late[order], self._periods[order]
+
+    def summary(self):
+        '''
+        Returns the statistics of the recorded ticks: the achieved and target rate in ticks per second, the mean, median,
+        95th percentile and maximum time of a tick in milliseconds, and the number and share of overruns.
+        '''
+        ticks, work, slept, late, periods = self._samples()
+        if len(ticks) == 0:
+            return {'ticks': 0}
+        elapsed = self._last_end - self._first_start
+        overruns = (periods > 0) & (work > periods)
+        return {'mode': self.mode, 'ticks': self._count,
+                'rate': self._count / elapsed if elapsed > 0 else float('inf'),
+                'target_rate': 1 / periods[-1] if periods[-1] > 0 else float('inf'),
+                'mean_ms': work.mean() * 1000, 'median_ms': np.median(work) * 1000,
+                'p95_ms': np.percentile(work, 95) * 1000, 'max_ms': work.max() * 1000,
+                'overruns': int(overruns.sum()), 'overrun_share': overruns.mean(),
+                'max_late_ms': late.max() * 1000, 'restarts': self.restarts}
+
+    def report(self):
+        '''
+        Returns the summary as one line of text.
+        '''
+        stats = self.summary()
+        if stats['ticks'] == 0:
+            return "No ticks recorded"
+        return (f"{stats['ticks']} ticks ({stats['mode']}) at {stats['rate']:.2f} ticks/s, target "
+                f"{stats['target_rate']:.2f}; tick mean {stats['mean_ms']:.1f} ms, median {stats['median_ms']:.1f} ms, "
+                f"p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms; {stats['overruns']} overruns "
+                f"({stats['overrun_share']:.1%}), at most {stats['max_late_ms']:.1f} ms late, {stats['restarts']} restarts")
+
+    def export_csv(self, path):
+        '''
+        Writes one row per recorded tick to a semicolon separated file, like the action logs.
+        '''
+        with open(path, mode='w', newline='') as csv_file:
+            csv_writer = csv.writer(csv_file, delimiter=';', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+            csv_writer.writerow(['tick_nr', 'tick_duration_ms', 'work_ms', 'sleep_ms', 'late_ms'])
+            for tick, work, slept, late, period in zip(*self._samples()):
+                csv_writer.writerow([tick, round(period * 1000, 3), round(work * 1000, 3), round(slept * 1000, 3),
+                                     round(late * 1000, 3)])
+
+    def export(self, folder=None):
+        '''
+        Saves the ticks as tick_schedule.csv, by default next to the action logs of the run.
+        '''
+        folder = folder or self.save_path or 'logs'
+        os.makedirs(folder, exist_ok=True)
+        self.export_csv(os.path.join(folder, 'tick_schedule.csv'))
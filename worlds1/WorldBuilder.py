@@ -19,6 +19,12 @@ from agents1.TutorialAgent import TutorialAgent
 from actions1.CustomActions import RemoveObjectTogether
 from brains1.HumanBrain import HumanBrain
 from loggers.ActionLogger import ActionLogger
+from loggers.ColumnarActionLogger import ColumnarActionLogger
+from loggers.TickProfiler import TickProfiler
+from loggers.TrustEventLog import TrustEventLog
+from worlds1.TickScheduler import TickScheduler
+from worlds1.ParallelDecisions import ParallelDecisions
+from worlds1.MapLoader import load_map
 from datetime import datetime
 
 random_seed = 1
@@ -26,6 +32,25 @@ verbose = False
 # Tick duration determines the speed of the world. A tick duration of 0.1 means 10 ticks are executed in a second. 
 # You can speed up or slow down the world by changing this value without changing behavior. Leave this value at 0.1 during evaluations.
 tick_duration = 0.1
+# How the world sleeps between ticks: 'fixed' sleeps what is left of the tick duration after every tick as MATRX does, 'paced' keeps a steady rate by
+# sleeping until a deadline per tick and making up for slow ticks, 'uncapped' never sleeps. See worlds1/TickScheduler.py, the ticks are measured in every mode.
+tick_scheduler = 'fixed'
+# Number of threads in which the agents decide on their actions at the same time, on the same snapshot of the world (see worlds1/ParallelDecisions.py).
+# 0 lets the agents decide one after the other as MATRX does. Their actions are performed in the same order in both cases.
+parallel_decisions = 0
+# Set to True to record how long each tick, phase and helper of RescueBot takes. The timings are saved next to the action logs.
+profile_ticks = False
+# Lowest level of the trust events of RescueBot that are kept and saved next to the action logs ('DEBUG', 'INFO', 'WARNING' or 'ERROR').
+# Use 'INFO' to record every trust belief update, or 'DEBUG' to also record all received messages and the beliefs of every tick.
+trust_event_level = 'WARNING'
+# Format of the action logs, 'csv' or 'columnar'. Columnar logs are smaller and faster to load, use 'python -m loggers.ColumnarActionLogger <file>' to export them to csv.
+action_log_format = 'csv'
+# Number of ticks after which the running summary of the actions is saved as summary.csv next to the action logs.
+summary_checkpoint_ticks = 100
+# Number of ticks after which the task ends, also when not all victims are rescued. Set a number for unattended runs, such as headless batches.
+max_nr_ticks = np.inf
+# Folder where the logs of the official task type are stored, one folder per experiment.
+logs_folder = "logs"
 # Define the keyboarc controls for the human agent
 key_action_map = {
         'ArrowUp': MoveNorth.__name__,
@@ -40,6 +65,9 @@ key_action_map = {
         'e': RemoveObject.__name__,
     }
 
+# Set to True to draw the roofs, streets and other decorations marked as background in the map into one background image of the world,
+# instead of adding an object for each of them. Set to False to add them as objects, as in the original worlds.
+background_decorations = True
 # Some settings
 nr_rooms = 9
 wall_color = "#8a8a8a"
@@ -54,18 +82,14 @@ other_sense_range = np.inf  # the range with which agents detect other objects (
 fov_occlusion = True
 
 # Add the drop zones to the world
-def add_drop_off_zones(builder, task_type):
-    if task_type == "official":
-        nr_drop_zones = 1
-        for nr_zone in range(nr_drop_zones):
-            builder.add_area((23,8), width=1, height=8, name=f"Drop off {nr_zone}", visualize_opacity=0.5, visualize_colour=drop_off_color, drop_zone_nr=nr_zone, is_drop_zone=True, is_goal_block=False, is_collectable=False) 
-    if task_type == "tutorial":
-        nr_drop_zones = 1
-        for nr_zone in range(nr_drop_zones):
-            builder.add_area((17,7), width=1, height=4, name=f"Drop off {nr_zone}",visualize_opacity=0.5, visualize_colour=drop_off_color, drop_zone_nr=nr_zone, is_drop_zone=True, is_goal_block=False, is_collectable=False) 
+def add_drop_off_zones(builder, world_map):
+    nr_drop_zones = 1
+    drop_zone = world_map['drop_zone']
+    for nr_zone in range(nr_drop_zones):
+        builder.add_area(drop_zone['top_left'], width=drop_zone['width'], height=drop_zone['height'], name=f"Drop off {nr_zone}", visualize_opacity=0.5, visualize_colour=drop_off_color, drop_zone_nr=nr_zone, is_drop_zone=True, is_goal_block=False, is_collectable=False)
 
 # Add the agents to the world
-def add_agents(builder, condition, task_type, name, folder):
+def add_agents(builder, condition, task_type, name, folder, world_map, profiler=None, trust_events=None):
     # Define the agent's sense capabilites
     sense_capability_agent = SenseCapability({AgentBody: agent_sense_range, CollectableBlock: object_sense_range, None: other_sense_range, ObstacleObject: 1})
     # Define the human's sense capabilities based on the selected condition
@@ -80,12 +104,10 @@ def add_agents(builder, condition, task_type, name, folder):
         nr_agents = agents_per_team - human_agents_per_team
         for agent_nr in range(nr_agents):
             if task_type=="official":
-                brain = BaselineAgent(slowdown=8, condition=condition, name=name, folder=folder) # Slowdown makes the agent a bit slower, do not change value during evaluations
-                loc = (22,11)
+                brain = BaselineAgent(slowdown=8, condition=condition, name=name, folder=folder, profiler=profiler, trust_events=trust_events, own_random=parallel_decisions > 0) # Slowdown makes the agent a bit slower, do not change value during evaluations
             if task_type=="tutorial":
                 brain = TutorialAgent(slowdown=8, condition=condition, name=name, folder=folder)
-                loc = (16,8)
-            builder.add_agent(loc, brain, team=team_name, name="RescueBot",customizable_properties = ['score'], score=0, sense_capability=sense_capability_agent, is_traversable=True, img_name="/images/robot-final4.svg")
+            builder.add_agent(world_map['agents']['rescuebot'], brain, team=team_name, name="RescueBot",customizable_properties = ['score'], score=0, sense_capability=sense_capability_agent, is_traversable=True, img_name="/images/robot-final4.svg")
 
         # Add human agents based on condition, do not change human brain values
         for human_agent_nr in range(human_agents_per_team):
@@ -93,214 +115,77 @@ def add_agents(builder, condition, task_type, name, folder):
                 brain = HumanBrain(max_carry_objects=np.inf, grab_range=1, drop_range=0, remove_range=1, fov_occlusion=fov_occlusion, strength=condition, name=name)
             else:
                 brain = HumanBrain(max_carry_objects=1, grab_range=1, drop_range=0, remove_range=1, fov_occlusion=fov_occlusion, strength=condition, name=name)
-            if task_type=="official":
-                loc = (22,12)
-            else:
-                loc = (16,9)
-            builder.add_human_agent(loc, brain, team=team_name, name=name, key_action_map=key_action_map, sense_capability=sense_capability_human, is_traversable=True, img_name="/images/rescue-man-final3.svg", visualize_when_busy=True)
-
-# Create the world
-def create_builder(task_type, condition, name, folder):
+            builder.add_human_agent(world_map['agents']['human'], brain, team=team_name, name=name, key_action_map=key_action_map, sense_capability=sense_capability_human, is_traversable=True, img_name="/images/rescue-man-final3.svg", visualize_when_busy=True)
+
+# Add the rooms and objects of a compiled map (see worlds1/MapLoader.py) to the world, with the background decorations as objects unless in_background is set and they are drawn in the background image of the world
+def add_map(builder, world_map, in_background=False):
+    width, height = world_map['shape']
+    builder.add_room(top_left_location=(0, 0), width=width, height=height, name="world_bounds", wall_visualize_colour=world_map['bounds_colour'])
+    for room in world_map['rooms']:
+        # Walls covered by roofs in the background image are not drawn, so they do not hide the roofs
+        wall_opacity = 0.0 if in_background and room['walls_covered'] else None
+        builder.add_room(top_left_location=room['top_left'], width=room['width'], height=room['height'], name=room['name'], door_locations=list(room['doors']), doors_open=True, wall_visualize_colour=wall_color, wall_visualize_opacity=wall_opacity, with_area_tiles=True, area_visualize_colour='#0008ff', area_visualize_opacity=0.0, door_open_colour='#9a9083', area_custom_properties={'doormat': room['doormat']})
+
+    for obstacle_type, loc, img_name in world_map['obstacles']:
+        builder.add_object(loc, obstacle_type, ObstacleObject, visualize_shape='img', img_name=img_name)
+    for victim_name, loc, img_name in world_map['victims']:
+        builder.add_object(loc, victim_name, callable_class=CollectableBlock, visualize_shape='img', img_name=img_name)
+    for loc, img_name in world_map['goal_victims']:
+        builder.add_object(loc, name="Collect Block", callable_class=GhostBlock, visualize_shape='img', img_name=img_name, drop_zone_nr=0)
+
+    for room in world_map['rooms']:
+        if room['sign'] is not None:
+            builder.add_object(location=room['sign'], is_traversable=True, is_movable=False, name=room['sign_name'], img_name=room['sign_img'], visualize_depth=110, visualize_size=room['sign_size'])
+    if world_map['keyboard_sign'] is not None:
+        loc, size = world_map['keyboard_sign']
+        builder.add_object(location=loc, is_traversable=True, name="keyboard sign", img_name="/images/keyboard-final.svg", visualize_depth=110, visualize_size=size)
+
+    if not in_background:
+        for decoration_name, loc, img_name, size in world_map['background']:
+            builder.add_object(loc, decoration_name, EnvObject, is_traversable=True, is_movable=False, visualize_shape='img', img_name=img_name, visualize_size=size)
+    for decoration_name, loc, img_name, size, traversable in world_map['decorations']:
+        builder.add_object(loc, decoration_name, EnvObject, is_traversable=traversable, is_movable=False, visualize_shape='img', img_name=img_name, visualize_size=size)
+
+# Create the world, from the map of the task type unless another map (name or path of a map file) is given
+def create_builder(task_type, condition, name, folder, map_name=None):
     # Set numpy's random generator
     np.random.seed(random_seed)
     # Create the collection goal
-    goal = CollectionGoal(max_nr_ticks=np.inf)
+    goal = CollectionGoal(max_nr_ticks=max_nr_ticks)
+    # Load the compiled map of the world
+    world_map = load_map(map_name or task_type)
+    # Draw the background decorations into one image, the images of the map are relative to the root of the repository
+    bg_img = None
+    if background_decorations and world_map['background']:
+        from SaR_gui.assets import build_background
+        bg_img = build_background(world_map['background'], world_map['shape'], os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     # Create the world builder
-    if task_type=="official":
-        builder = WorldBuilder(shape=[25,24], tick_duration=tick_duration, run_matrx_api=True, run_matrx_visualizer=False, verbose=verbose, simulation_goal=goal, visualization_bg_clr='#9a9083')
-    else:
-        builder = WorldBuilder(shape=[19,19], tick_duration=tick_duration, run_matrx_api=True,random_seed=random_seed, run_matrx_visualizer=False, verbose=verbose, simulation_goal=goal, visualization_bg_clr='#9a9083')
-
-    # Add all areas and objects to the tutorial world
-    if task_type == "tutorial":
-        builder.add_room(top_left_location=(0, 0), width=19, height=19, name="world_bounds", wall_visualize_colour="#1F262A")
-        builder.add_room(top_left_location=(1,1), width=5, height=4, name='area 1', door_locations=[(3,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0, door_open_colour='#9a9083', area_custom_properties={'doormat':(3,5)})
-        builder.add_room(top_left_location=(7,1), width=5, height=4, name='area 2', door_locations=[(9,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,5)})
-        builder.add_room(top_left_location=(13,1), width=5, height=4, name='area 3', door_locations=[(15,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,5)})
-        builder.add_room(top_left_location=(1,7), width=5, height=4, name='area 4', door_locations=[(3,7)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(3,6)})
-        builder.add_room(top_left_location=(7,7), width=5, height=4, name='area 5', door_locations=[(9,7)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,6)})
-        builder.add_room(top_left_location=(1,13), width=5, height=4, name='area 6', door_locations=[(3,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(3,17)})
-        builder.add_room(top_left_location=(7,13), width=5, height=4, name='area 7', door_locations=[(9,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,17)})
-        builder.add_room(top_left_location=(13,13), width=5, height=4, name='area 8', door_locations=[(15,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,17)})
-
-        builder.add_object((3,4), 'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-        builder.add_object((3,7),'tree',ObstacleObject,visualize_shape='img',img_name="/images/tree-fallen2.svg")
-        builder.add_object((3,16),'tree',ObstacleObject,visualize_shape='img',img_name="/images/tree-fallen2.svg")
-        builder.add_object((9,16),'rock',ObstacleObject,visualize_shape='img',img_name="/images/stone.svg")
-        builder.add_object((15,16),'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-        builder.add_object((9,7),'rock',ObstacleObject,visualize_shape='img',img_name="/images/stone.svg")
-
-        builder.add_object((16,3),'critically injured elderly woman in area 3', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured elderly woman.svg")
-        builder.add_object((14,14),'healthy man in area 8', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy man.svg")
-        builder.add_object((2,9),'mildly injured elderly man in area 4', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured elderly man.svg")
-        builder.add_object((2,14),'healthy girl in area 6', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy girl.svg")
-        builder.add_object((8,9),'critically injured girl in area 5', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured girl.svg")
-        builder.add_object((16,15),'mildly injured boy in area 8', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured boy.svg")
-        builder.add_object((10,3),'healthy boy in area 2', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy boy.svg")
-        builder.add_object((10,8),'healthy elderly man in area 5', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly man.svg")
-        builder.add_object((10,15),'healthy dog in area 7', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy dog.svg")
-
-        builder.add_object((17,7),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured girl.svg",drop_zone_nr=0)
-        builder.add_object((17,8),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured elderly woman.svg",drop_zone_nr=0)
-        builder.add_object((17,9),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured boy.svg",drop_zone_nr=0)
-        builder.add_object((17,10),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured elderly man.svg",drop_zone_nr=0)
-
-        builder.add_object(location=[3,1], is_traversable=True, is_movable=False, name="area 01 sign", img_name="/images/sign01.svg", visualize_depth=110, visualize_size=0.5)
-        builder.add_object(location=[9,1], is_traversable=True, is_movable=False, name="area 02 sign", img_name="/images/sign02.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,1], is_traversable=True, is_movable=False, name="area 03 sign", img_name="/images/sign03.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[3,10], is_traversable=True, is_movable=False, name="area 04 sign", img_name="/images/sign04.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[9,10], is_traversable=True, is_movable=False, name="area 05 sign", img_name="/images/sign05.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[3,13], is_traversable=True, is_movable=False, name="area 06 sign", img_name="/images/sign06.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[9,13], is_traversable=True, is_movable=False, name="area 07 sign", img_name="/images/sign07.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,13], is_traversable=True, is_movable=False, name="area 08 sign", img_name="/images/sign08.svg", visualize_depth=110, visualize_size=0.55)
-
-        builder.add_object(location=[9,0], is_traversable=True, name="keyboard sign", img_name="/images/keyboard-final.svg", visualize_depth=110, visualize_size=15)
-
-        for loc in [(1,1),(2,1),(3,1),(4,1),(5,1),(1,2),(1,3),(1,4),(2,4),(4,4),(5,4),(5,3),(5,2),(7,1),(8,1),
-                    (13,1),(14,1),(15,1),(16,1),(17,1),(13,1),(14,1),(15,1),(16,1),(17,1),(13,2),(13,3),(13,4),
-                    (1,7),(1,8),(1,9),(1,10),(2,10),(3,10),(4,10),(5,10),(5,9),(5,8),(5,7),(4,7),(2,7),(8,4),
-                    (7,7),(7,8),(7,9),(7,10),(8,10),(9,10),(10,10),(11,10),(11,9),(11,8),(11,7),(10,7),(8,7),
-                    (1,13),(2,13),(3,13),(4,13),(5,13),(1,14),(1,15),(1,16),(2,16),(4,16),(5,16),(5,15),(5,14),
-                    (7,13),(8,13),(9,13),(10,13),(11,13),(7,14),(7,15),(7,16),(8,16),(10,16),(11,16),(11,15),
-                    (11,14),(17,16),(16,16),(5,13),(14,4),(16,4),(17,4),(17,3),(17,2),(9,1),(10,1),(11,1),(7,2),
-                    (13,13),(14,13),(15,13),(16,13),(17,13),(13,14),(13,15),(13,16),(14,16),(17,14),(17,15),
-                    (7,3),(7,4),(11,2),(11,3),(11,4),(10,4)]:
-            builder.add_object(loc,'roof', EnvObject,is_traversable=True, is_movable=False, visualize_shape='img',img_name="/images/roof-final5.svg")
+    builder = WorldBuilder(shape=list(world_map['shape']), tick_duration=tick_duration, run_matrx_api=True, random_seed=random_seed, run_matrx_visualizer=False, verbose=verbose, simulation_goal=goal, visualization_bg_clr=world_map['background_colour'], visualization_bg_img=bg_img)
+    # Keep the room and door metadata of the map for whoever uses the builder
+    builder.world_map = world_map
 
     # Create folders where the logs are stored during the official condition
+    profiler = TickProfiler(enabled=profile_ticks)
+    trust_events = TrustEventLog(level=trust_event_level)
+    scheduler = TickScheduler(mode=tick_scheduler)
     if task_type=="official":
         current_exp_folder = datetime.now().strftime("exp_"+condition+"_at_time_%Hh-%Mm-%Ss_date_%dd-%mm-%Yy")
-        logger_save_folder = os.path.join("logs", current_exp_folder)
-        builder.add_logger(ActionLogger, log_strategy=1, save_path=logger_save_folder, file_name_prefix="actions_")
-        
-    # Add all area and objects to the official world
-    if task_type == "official":
-        builder.add_room(top_left_location=(0, 0), width=25, height=24, name="world_bounds", wall_visualize_colour="#1F262A")
-        builder.add_room(top_left_location=(1,1), width=5, height=4, name='area 1', door_locations=[(3,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0, door_open_colour='#9a9083', area_custom_properties={'doormat':(3,5)})
-        builder.add_room(top_left_location=(7,1), width=5, height=4, name='area 2', door_locations=[(9,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,5)})
-        builder.add_room(top_left_location=(13,1), width=5, height=4, name='area 3', door_locations=[(15,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,5)})
-        builder.add_room(top_left_location=(19,1), width=5, height=4, name='area 4', door_locations=[(21,4)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(21,5)})
-        builder.add_room(top_left_location=(1,7), width=5, height=4, name='area 5', door_locations=[(3,7)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(3,6)})
-        builder.add_room(top_left_location=(7,7), width=5, height=4, name='area 6', door_locations=[(9,7)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,6)})
-        builder.add_room(top_left_location=(13,7), width=5, height=4, name='area 7', door_locations=[(15,7)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,6)})
-        builder.add_room(top_left_location=(1,13), width=5, height=4, name='area 8', door_locations=[(3,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(3,17)})
-        builder.add_room(top_left_location=(7,13), width=5, height=4, name='area 9', door_locations=[(9,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,17)})
-        builder.add_room(top_left_location=(13,13), width=5, height=4, name='area 10', door_locations=[(15,16)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,17)})
-        builder.add_room(top_left_location=(1,19), width=5, height=4, name='area 11', door_locations=[(3,19)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(3,18)})
-        builder.add_room(top_left_location=(7,19), width=5, height=4, name='area 12', door_locations=[(9,19)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(9,18)})
-        builder.add_room(top_left_location=(13,19), width=5, height=4, name='area 13', door_locations=[(15,19)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(15,18)})
-        builder.add_room(top_left_location=(19,19), width=5, height=4, name='area 14', door_locations=[(21,19)],doors_open=True, wall_visualize_colour=wall_color, with_area_tiles=True, area_visualize_colour='#0008ff',area_visualize_opacity=0.0,door_open_colour='#9a9083', area_custom_properties={'doormat':(21,18)})
-
-        builder.add_object((3,4), 'rock',ObstacleObject,visualize_shape='img',img_name="/images/stone.svg")
-        builder.add_object((9,4),'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-        builder.add_object((9,16),'tree',ObstacleObject,visualize_shape='img',img_name="/images/tree-fallen2.svg")
-        builder.add_object((15, 7),'tree',ObstacleObject,visualize_shape='img',img_name="/images/tree-fallen2.svg")
-        builder.add_object((15,19),'tree',ObstacleObject,visualize_shape='img',img_name="/images/tree-fallen2.svg")
-        builder.add_object((3,16),'rock',ObstacleObject,visualize_shape='img',img_name="/images/stone.svg")
-        builder.add_object((15,4),'rock',ObstacleObject,visualize_shape='img',img_name="/images/stone.svg")
-        builder.add_object((21,19),'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-        builder.add_object((9,19),'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-        builder.add_object((9,7),'stone',ObstacleObject,visualize_shape='img',img_name="/images/stone-small.svg")
-
-        builder.add_object((1,12),'plant',EnvObject,is_traversable=True,is_movable=False,visualize_shape='img',img_name="/images/tree.svg", visualize_size=3)
-        builder.add_object((21,7),'heli',EnvObject,is_traversable=False,is_movable=False,visualize_shape='img',img_name="/images/helicopter.svg", visualize_size=3) 
-        builder.add_object((21,16),'ambulance',EnvObject,is_traversable=False,is_movable=False,visualize_shape='img',img_name="/images/ambulance.svg", visualize_size=2.3) 
-    
-        builder.add_object((23,8),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured girl.svg",drop_zone_nr=0)
-        builder.add_object((23,9),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured elderly woman.svg",drop_zone_nr=0)
-        builder.add_object((23,10),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured man.svg",drop_zone_nr=0)
-        builder.add_object((23,11),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/critically injured dog.svg",drop_zone_nr=0)
-        builder.add_object((23,12),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured boy.svg",drop_zone_nr=0)
-        builder.add_object((23,13),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured elderly man.svg",drop_zone_nr=0)
-        builder.add_object((23,14),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured woman.svg",drop_zone_nr=0)
-        builder.add_object((23,15),name="Collect Block", callable_class=GhostBlock,visualize_shape='img',img_name="/images/mildly injured cat.svg",drop_zone_nr=0)
-
-        builder.add_object((10,15),'critically injured elderly woman in area 9', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured elderly woman.svg")
-        builder.add_object((8,20),'healthy elderly woman in area 12', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly woman.svg")
-        builder.add_object((14,14),'healthy man in area 10', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy man.svg")
-        builder.add_object((4,15),'critically injured man in area 8', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured man.svg")
-        builder.add_object((2,14),'healthy girl in area 8', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy girl.svg")
-        builder.add_object((10,3),'critically injured girl in area 2', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured girl.svg")
-        builder.add_object((2,2),'mildly injured boy in area 1', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured boy.svg")
-        builder.add_object((16,3),'healthy boy in area 3', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy boy.svg")
-        builder.add_object((14,20),'mildly injured elderly man in area 13', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured elderly man.svg")
-        builder.add_object((10,8),'healthy elderly man in area 6', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly man.svg")
-        builder.add_object((14,8),'mildly injured woman in area 7', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured woman.svg")
-        builder.add_object((16,21),'healthy woman in area 13', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy woman.svg")
-        builder.add_object((8,9),'critically injured dog in area 6', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/critically injured dog.svg")
-        builder.add_object((4,21),'mildly injured cat in area 11', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/mildly injured cat.svg")
-        builder.add_object((10,21),'healthy girl in area 12', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy girl.svg")
-        builder.add_object((16,9),'healthy girl in area 7', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy girl.svg")
-        builder.add_object((22,3),'healthy boy in area 4', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy boy.svg")
-        builder.add_object((2,20),'healthy elderly woman in area 11', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly woman.svg")
-        builder.add_object((20,2),'healthy man in area 4', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy man.svg")
-        builder.add_object((20,20),'healthy man in area 14', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy man.svg")
-        builder.add_object((22,21),'healthy boy in area 14', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy boy.svg")
-        builder.add_object((8,14),'healthy boy in area 9', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy boy.svg")
-        builder.add_object((4,3),'healthy elderly man in area 1', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly man.svg")
-        builder.add_object((14,2),'healthy elderly man in area 3', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy elderly man.svg")
-        builder.add_object((16,15),'healthy woman in area 10', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy woman.svg")
-        builder.add_object((8,2),'healthy woman in area 2', callable_class=CollectableBlock, visualize_shape='img',img_name="/images/healthy woman.svg")
-
-        builder.add_object(location=[3,1], is_traversable=True, is_movable=False, name="area 01 sign", img_name="/images/sign01.svg", visualize_depth=110, visualize_size=0.5)
-        builder.add_object(location=[9,1], is_traversable=True, is_movable=False, name="area 02 sign", img_name="/images/sign02.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,1], is_traversable=True, is_movable=False, name="area 03 sign", img_name="/images/sign03.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[21,1], is_traversable=True, is_movable=False, name="area 04 sign", img_name="/images/sign04.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[3,10], is_traversable=True, is_movable=False, name="area 05 sign", img_name="/images/sign05.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[9,10], is_traversable=True, is_movable=False, name="area 06 sign", img_name="/images/sign06.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,10], is_traversable=True, is_movable=False, name="area 07 sign", img_name="/images/sign07.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[3,13], is_traversable=True, is_movable=False, name="area 08 sign", img_name="/images/sign08.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[9,13], is_traversable=True, is_movable=False, name="area 09 sign", img_name="/images/sign09.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,13], is_traversable=True, is_movable=False, name="area 10 sign", img_name="/images/sign10.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[3,22], is_traversable=True, is_movable=False, name="area 11 sign", img_name="/images/sign11.svg", visualize_depth=110, visualize_size=0.45)
-        builder.add_object(location=[9,22], is_traversable=True, is_movable=False, name="area 12 sign", img_name="/images/sign12.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[15,22], is_traversable=True, is_movable=False, name="area 13 sign", img_name="/images/sign13.svg", visualize_depth=110, visualize_size=0.55)
-        builder.add_object(location=[21,22], is_traversable=True, is_movable=False, name="area 14 sign", img_name="/images/sign14.svg", visualize_depth=110, visualize_size=0.55)
-
-        builder.add_object(location=[12,0], is_traversable=True, name="keyboard sign", img_name="/images/keyboard-final.svg", visualize_depth=110, visualize_size=20)
-
-        for loc in [(1,1),(2,1),(3,1),(4,1),(5,1),(1,2),(1,3),(1,4),(2,4),(4,4),(5,4),(5,3),(5,2),(7,1),(8,1),(9,1),
-                    (10,1),(11,1),(7,2),(7,3),(7,4),(8,4),(11,2),(11,3),(11,4),(10,4),(16,4),(17,4),(17,3),(17,2),
-                    (13,1),(14,1),(15,1),(16,1),(17,1),(13,1),(14,1),(15,1),(16,1),(17,1),(13,2),(13,3),(13,4),(14,4),
-                    (19,1),(20,1),(21,1),(22,1),(23,1),(19,2),(19,3),(19,4),(20,4),(22,4),(23,4),(23,3),(23,2),(23,1),
-                    (1,7),(1,8),(1,9),(1,10),(2,10),(3,10),(4,10),(5,10),(5,9),(5,8),(5,7),(4,7),(2,7),(16,16),(10,19),
-                    (13,7),(13,8),(13,9),(13,10),(14,10),(15,10),(16,10),(17,10),(17,9),(17,8),(17,7),(16,7),(14,7),
-                    (1,13),(2,13),(3,13),(4,13),(5,13),(1,14),(1,15),(1,16),(2,16),(4,16),(5,16),(5,15),(5,14),(5,13),
-                    (7,13),(8,13),(9,13),(10,13),(11,13),(7,14),(7,15),(7,16),(8,16),(10,16),(11,16),(11,15),(11,14),
-                    (13,13),(14,13),(15,13),(16,13),(17,13),(13,14),(13,15),(13,16),(14,16),(17,14),(17,15),(17,16),
-                    (1,19),(2,19),(4,19),(5,19),(1,20),(1,21),(1,22),(2,22),(3,22),(4,22),(5,22),(5,21),(5,20),(5,19),
-                    (7,19),(8,19),(4,19),(5,19),(7,20),(7,21),(7,22),(8,22),(9,22),(10,22),(11,22),(11,21),(11,20),(11,19),
-                    (13,19),(14,19),(16,19),(17,19),(13,20),(13,21),(13,22),(14,22),(15,22),(16,22),(17,22),(17,21),(17,20),
-                    (19,19),(20,19),(22,19),(23,19),(19,20),(19,21),(19,22),(20,22),(21,22),(22,22),(23,22),(23,21),(23,20),
-                    (7,7),(7,8),(7,9),(7,10),(8,10),(9,10),(10,10),(11,10),(11,9),(11,8),(11,7),(10,7),(8,7)]:
-            builder.add_object(loc,'roof', EnvObject,is_traversable=True, is_movable=False, visualize_shape='img',img_name="/images/roof-final5.svg")
-
-        for loc in [(6,1),(6,2),(6,3),(6,4),(6,5),(6,12),(6,13),(6,14),(6,15),(6,16),(6,17),(11,12),(11,11),(18,12),(18,21),
-                    (3,12),(3,11),(12,6),(12,7),(12,8),(12,9),(12,10),(12,11),(18,11),(18,10),(18,9),(19,9),(19,8),(18,22),
-                    (18,13),(18,14),(18,15),(18,16),(18,17),(9,17),(9,18),(20,17),(20,18),(12,1),(12,2),(6,22),(18,20),
-                    (19,7),(19,6),(19,5),(10,6),(10,5),(14,17),(14,18),(12,19),(12,20),(12,21),(12,18),(12,22)]:
-            builder.add_object(loc,'water',EnvObject,is_traversable=True, is_movable=False, visualize_shape='img',img_name="/images/pool20.svg")
-
-        for loc in [(1,11),(2,11),(3,11),(3,12),(4,12),(5,12),(6,12),(7,12),(8,12),(9,12),(10,12),(11,12),(12,11),(13,11),(20,17),
-                    (14,11),(15,11),(16,11),(17,11),(18,11),(6,17),(7,17),(8,17),(9,17),(9,18),(5,17),(4,17),(3,17),(2,17),(1,17),
-                    (18,9),(19,9),(19,5),(20,5),(21,5),(22,5),(23,5),(11,6),(12,6),(10,6),(10,5),(9,5),(8,5),(7,5),(6,5),(19,17),
-                    (11,11),(18,17),(17,17),(16,17),(15,17),(14,17),(14,18),(13,18),(12,18),(10,18),(11,18)]:
-            builder.add_object(loc,'water', EnvObject,is_traversable=True, is_movable=False, visualize_shape='img', img_name="/images/lake2.svg")
-
-        for loc in [(11,5),(13,5),(14,5),(13,6),(14,6),(12,5),(15,5),(15,6),(16,5),(16,6),(17,5),(17,6),(18,5),
-                    (8,6),(7,6),(6,6),(5,6),(4,6),(3,6),(2,6),(1,6),(20,9),(21,9),(21,14),(20,14),(19,14),(9,6),
-                    (1,5),(2,5),(3,5),(4,5),(5,5),(22,11),(22,12),(19,18),(18,18),(17,18),(16,18),(15,18),(13,17),
-                    (11,17),(10,17),(8,18),(7,18),(6,18),(5,18),(4,18),(3,18),(2,18),(1,18),(12,17),(18,6)]:
-            builder.add_object(loc,'street',EnvObject,is_traversable=True,is_movable=False,visualize_shape='img',img_name="/images/paving-final20.svg", visualize_size=1) 
-
-        for loc in [(12,3),(12,4),(18,1),(18,2),(18,3),(18,4),(6,19),(6,20),(6,21),(18,19)]:
-            builder.add_object(loc,'plant',EnvObject,is_traversable=True,is_movable=False,visualize_shape='img',img_name="/images/tree.svg", visualize_size=1.25) 
-            
-        for loc in [(21,10),(21,11),(21,12),(21,13),(19,15),(19,16)]:
-            builder.add_object(loc,'street',EnvObject,is_traversable=True,is_movable=False,visualize_shape='img',img_name="/images/paving-final15.svg", visualize_size=1) 
-    
-    add_drop_off_zones(builder, task_type)
-    add_agents(builder, condition, task_type, name, folder)
+        logger_save_folder = os.path.join(logs_folder, current_exp_folder)
+        if action_log_format == 'columnar':
+            builder.add_logger(ColumnarActionLogger, log_strategy=1, save_path=logger_save_folder, file_name_prefix="actions_", checkpoint_every=summary_checkpoint_ticks)
+        else:
+            builder.add_logger(ActionLogger, log_strategy=1, save_path=logger_save_folder, file_name_prefix="actions_", checkpoint_every=summary_checkpoint_ticks)
+        profiler.save_path = os.path.join(logger_save_folder, "world_1")
+        scheduler.save_path = os.path.join(logger_save_folder, "world_1")
+        trust_events.save_path = os.path.join(logger_save_folder, "world_1", "trust_events.csv")
+    builder.tick_profiler = profiler
+    builder.trust_events = trust_events
+    builder.tick_scheduler = scheduler
+    builder.decisions = ParallelDecisions(nr_workers=parallel_decisions)
+
+    add_map(builder, world_map, in_background=bg_img is not None)
+    add_drop_off_zones(builder, world_map)
+    add_agents(builder, condition, task_type, name, folder, world_map, profiler, trust_events)
 
     return builder
 
@@ -450,9 +335,10 @@ class CollectionGoal(WorldGoal):
                 elif len(vics) == 0:
                     if self.__drop_off[zone_nr][rank][2] != None:
                         self.__drop_off[zone_nr][rank][2] = None
-                        if rank in [0,1,2,3]:
+                        # Deduct what the victim added, also for maps with another number of goal victims
+                        if 'critical' in shape:
                             self.__score-=6
-                        if rank in [4,5,6,7]:
+                        if 'mild' in shape:
                             self.__score-=3
 
         # Now check if all victims are collected
@@ -0,0 +1,109 @@
+import hashlib
+import pickle
+
+import requests
+from matrx.api import api
+from matrx.grid_world import GridWorld
+
+from worlds1.WorldBuilder import create_builder
+
+'''
+This file reuses worlds and servers between consecutive missions, such as back-to-back participant sessions or batch
+experiments. The MATRX api and the visualizer are started once and stay up, every new world replaces the previous one
+in them. The objects of a freshly built world are snapshotted once per map, after which every next world of that map
+restores a copy of them instead of placing and checking every object again, and only creates new agents, with their
+own condition and human name, and new loggers.
+The visualizer (Flask app) is only imported when it is started, so headless batch runs do not load it.
+'''
+
+
+class WorldPool:
+    '''
+    Creates the worlds of consecutive missions, from a snapshot of the objects of the first world of the same map.
+    '''
+    def __init__(self, folder, media_folder=None):
+        self.folder = folder
+        self.media_folder = media_folder if media_folder is not None else folder
+        # Pickled objects of a fresh world and their unique ID counters, per hash of the object settings of the builder
+        self._snapshots = {}
+        self._nr_worlds = 0
+        self._api_thread = None
+        self._vis_thread = None
+
+    def start_servers(self, verbose=False, visualizer=True):
+        '''
+        Starts the MATRX api and, unless `visualizer` is False, the visualizer, which keep running for all worlds of the
+        pool until stop_servers.
+        '''
+        if self._api_thread is None:
+            self._api_thread = api._run_api(verbose)
+        if visualizer and self._vis_thread is None:
+            from SaR_gui import visualization_server
+            self._vis_thread = visualization_server.run_matrx_visualizer(verbose=verbose, media_folder=self.media_folder)
+
+    def stop_servers(self):
+        '''
+        Stops the MATRX api and the visualizer started by start_servers.
+        '''
+        if self._vis_thread is not None:
+            from SaR_gui import visualization_server
+            visualization_server.stop_matrx_visualizer()
+            self._vis_thread.join()
+            self._vis_thread = None
+        if self._api_thread is not None:
+            requests.get("http://localhost:" + str(api._port) + "/shutdown_API")
+            self._api_thread.join()
+            self._api_thread = None
+
+    def get_world(self, task_type, condition, name, map_name=None):
+        '''
+        Returns the builder and a new world for a mission, see create_builder for the arguments. Run the world with
+        world.run(builder.api_info), the api and visualizer switch to it when it starts. When start_servers was not
+        called, the world runs without the api.
+        '''
+        builder = create_builder(task_type=task_type, condition=condition, name=name, folder=self.folder,
+                                 map_name=map_name)
+        # The builder adds objects in a fixed order, so the same settings give the same objects
+        key = hashlib.sha1(repr(builder.object_settings).encode()).hexdigest()
+        if key in self._snapshots:
+            world = self._restore(builder, self._snapshots[key])
+        else:
+            world = builder.get_world()
+            self._snapshots[key] = pickle.dumps((list(world._GridWorld__environment_objects.values()),
+                                                 world._GridWorld__obj_indices), protocol=pickle.HIGHEST_PROTOCOL)
+        # Every world gets its own ID, so the visualization resets when the next world starts
+        self._nr_worlds += 1
+        world.world_id = f"world_{self._nr_worlds}"
+        builder.api_info['api_thread'] = self._api_thread
+        # Without started servers the world runs headless, without the MATRX api
+        builder.api_info['run_matrx_api'] = self._api_thread is not None
+        builder.tick_scheduler.install(world)
+        builder.decisions.install(world)
+        if self._vis_thread is not None:
+            from SaR_gui import assets, visualization_server
+            visualization_server.load_world_images(assets.world_images(builder), self.media_folder)
+        return builder, world
+
+    def _restore(self, builder, snapshot):
+        '''
+        Creates a world as WorldBuilder.get_world does, with a copy of the snapshotted objects instead of new ones.
+        '''
+        builder.worlds_created += 1
+        world = GridWorld(**builder.world_settings)
+        env_objects, obj_indices = pickle.loads(snapshot)
+        # MATRX has no way to add objects without checking their placement against all others again, which is what
+        # makes building a world slow, while the objects of the snapshot were checked when it was taken
+        for env_object in env_objects:
+            world._GridWorld__environment_objects[env_object.obj_id] = env_object
+        world._GridWorld__obj_indices.update(obj_indices)
+
+        for agent_settings in builder.agent_settings:
+            agent, agent_body = builder._WorldBuilder__create_agent_avatar(agent_settings)
+            if agent_body is not None:
+                world._register_agent(agent, agent_body)
+        world._register_teams()
+        for logger_class, arguments in builder.loggers:
+            logger = logger_class(**arguments)
+            logger._set_world_nr(builder.worlds_created)
+            world._register_logger(logger)
+        return world